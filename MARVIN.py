@@ -13,7 +13,25 @@ import numpy as np
 import sounddevice as sd
 import scipy.io.wavfile as wav
 import sys
+import threading
+import hashlib
 import camFeatures  # Camera features with face detection and analysis
+from llm_client import get_client  # Shared pooled OpenAI client with timeouts and retries
+from memory_store import open_memory_store  # In-process memory with background persistence
+from memory_retrieval import MemoryRetriever  # Relevance-ranked memory for the system prompt
+from memory_retention import RetentionPolicy  # Hot-tier caps with a compressed cold archive
+from conversation import ConversationHistory, build_messages, history_text  # Token-budgeted history
+from prompt_cache import PromptCache, UsageStats, cwd_key, path_key  # Prompt caching + usage stats
+from path_index import PathIndex  # Background PATH executable index with an on-disk cache
+from speech_stream import SpeechQueue  # Speak replies while they stream
+from intent_tools import TOOLS, TOOLS_GUIDANCE, ToolCallCollector  # Tool-calling intent router
+from fast_intent import FastIntentClassifier  # Local answers for routine requests
+from response_cache import ResponseCache  # Reuse GPT decisions for repeated requests
+from health import HealthCheck  # Background health checks cached with a TTL
+from speculative import SpeculativeDecoder  # Start GPT on partial transcripts
+from ollama_client import OllamaClient  # Optional local backend
+from llm_backends import (BackendError, LLMRouter, LocalFirst, OllamaBackend, OpenAIBackend,  # Routed LLM calls
+                          SingleBackend, TaskSplit)
 
 # ========== Configuration Constants ==========
 AUDIO_DURATION = 5  # seconds for voice recording
@@ -23,6 +41,30 @@ TTS_VOICE_ID = 1  # 0=male, 1=female
 GPT_MODEL = "gpt-4o-mini"  # Main model for decisions
 WHISPER_MODEL = "whisper-1"  # Transcription model
 MAX_HISTORY = 10  # Number of conversation exchanges to remember
+INTENT_MODE = "tools"  # "tools" (function calling, several actions per turn) or "json" (INTENT_SCHEMA prompt)
+FAST_INTENT_THRESHOLD = 88  # Similarity (0-100) needed to answer locally instead of asking GPT
+RESPONSE_CACHE_FILE = "marvin_response_cache.json"  # Set to None to disable the response cache
+STREAM_RESPONSES = True  # Speak GPT replies sentence by sentence as they stream in
+HEALTH_CHECK_TTL = 300  # Seconds a successful health check (or GPT request) is trusted
+SPECULATIVE_DECODING = False  # Start GPT on stable partial transcripts (needs a streaming recognizer)
+# LLM routing: "cloud" (OpenAI only), "local_first" (Ollama first, OpenAI when it misses LATENCY_SLO_MS
+# or fails) or "split" (history summaries on Ollama, everything else on OpenAI). Tool calls always use OpenAI.
+LLM_ROUTING = "cloud"
+OLLAMA_BASE_URL = "http://localhost:11434"
+OLLAMA_MODEL = "gpt-oss:20b"
+LATENCY_SLO_MS = 2500  # Time to first token Ollama must meet in "local_first" mode
+HISTORY_TOKEN_BUDGET = 1200  # Max tokens of verbatim history sent with each request
+HISTORY_SUMMARY_TOKENS = 200  # Older turns are folded into a summary of at most this size
+MEMORY_BACKEND = "json"  # "json" (rewrite marvin_memory.json), "journal" (append-only log) or "sqlite"
+MEMORY_TOP_K = 5  # Most relevant memories injected into each prompt
+MEMORY_TOKEN_BUDGET = 150  # Max tokens of memory context per prompt
+SEMANTIC_MEMORY = False  # Add embedding-based recall (needs numpy; sentence-transformers optional)
+MEMORY_MAX_ENTRIES = 2000  # Facts (and notes) kept in the hot tier; older ones are archived
+MEMORY_MAX_AGE_DAYS = 365  # Entries older than this move to the cold archive
+MEMORY_DEDUPE_RATIO = 95  # Near-identical facts (rapidfuzz ratio) keep only the newest copy
+
+PATH_INDEX_FILE = "marvin_path_index.json"  # Executables per PATH directory, keyed by directory mtime
+PATH_INDEX_WAIT_SECONDS = 5  # Max wait for the first background PATH scan when building a prompt
 
 # Camera Configuration
 CAMERA_WARMUP_SECONDS = 3  # Seconds to warm up camera before snapshot
@@ -117,109 +159,73 @@ class _TTS:
         self.rate = rate
 
 tts = _TTS()
+# Speaks streamed sentences in order on a background thread while the rest of the reply arrives
+speech = SpeechQueue(tts.speak)
 
 # ========== Memory System ==========
 MEMORY_FILE = "marvin_memory.json"
-CONVERSATION_HISTORY = []
+HISTORY_FILE = "marvin_history.jsonl"  # Append-only log of recent turns, restored on first use
 
-def load_memory():
-    """Load persistent memory from JSON file"""
-    try:
-        if os.path.exists(MEMORY_FILE):
-            with open(MEMORY_FILE, "r", encoding="utf-8") as f:
-                return json.load(f)
-    except Exception as e:
-        print(f"Error loading memory: {e}")
-    return {
-        "facts": [],
-        "preferences": {},
-        "notes": [],
-        "created": datetime.now().isoformat()
-    }
-
-def save_memory(memory_data):
-    """Save memory data to JSON file"""
-    try:
-        memory_data["last_updated"] = datetime.now().isoformat()
-        with open(MEMORY_FILE, "w", encoding="utf-8") as f:
-            json.dump(memory_data, f, ensure_ascii=False, indent=2)
-        return True
-    except Exception as e:
-        print(f"Error saving memory: {e}")
-        return False
+# Loaded once at startup; reads are served from RAM and writes are flushed in the background
+MEMORY = open_memory_store(MEMORY_FILE, backend=MEMORY_BACKEND, retention=RetentionPolicy(
+    max_entries=MEMORY_MAX_ENTRIES, max_age_days=MEMORY_MAX_AGE_DAYS, dedupe_ratio=MEMORY_DEDUPE_RATIO))
+# Prune the hot tier at startup if it is over its caps, without delaying the greeting
+threading.Thread(target=MEMORY.enforce_retention, daemon=True).start()
+# Optional semantic index, persisted next to the memory file and memory-mapped at startup
+VECTORS = None
+if SEMANTIC_MEMORY:
+    from memory_vectors import VectorMemory
+    VECTORS = VectorMemory(MEMORY, os.path.splitext(MEMORY_FILE)[0])
+# Picks only the memories relevant to each request (BM25 + fuzzy matching) within a token budget
+RETRIEVER = MemoryRetriever(MEMORY, top_k=MEMORY_TOP_K, token_budget=MEMORY_TOKEN_BUDGET, vectors=VECTORS)
+
+def summarize_history(summary, messages):
+    """Fold turns evicted from the history window into the running summary (background thread)"""
+    transcript = "\n".join(f"{m['role']}: {m['content']}" for m in messages)
+    return LLM_ROUTER.complete([
+        {"role": "system", "content": "Update the running summary of a conversation between a user and "
+                                      "Marvin, a voice assistant. Keep names, requests, decisions and open "
+                                      "tasks. Reply with the summary only, in a few short sentences."},
+        {"role": "user", "content": f"Summary so far: {summary or '(none)'}\n\nNew turns:\n{transcript}"}
+    ], task="summary", max_tokens=HISTORY_SUMMARY_TOKENS, temperature=0)
+
+# Recent turns within a token budget; older turns live on as a rolling summary
+CONVERSATION_HISTORY = ConversationHistory(
+    token_budget=HISTORY_TOKEN_BUDGET,
+    summarizer=summarize_history,
+    summary_tokens=HISTORY_SUMMARY_TOKENS,
+    max_messages=MAX_HISTORY * 2,  # *2 because user+assistant pairs
+    model=GPT_MODEL,
+    log_path=HISTORY_FILE
+)
 
 def add_to_conversation_history(role, content):
     """Add message to conversation history"""
-    global CONVERSATION_HISTORY
-    CONVERSATION_HISTORY.append({
-        "role": role, 
-        "content": content, 
-        "timestamp": datetime.now().isoformat()
-    })
-    # Keep only recent history
-    if len(CONVERSATION_HISTORY) > MAX_HISTORY * 2:  # *2 because user+assistant pairs
-        CONVERSATION_HISTORY = CONVERSATION_HISTORY[-MAX_HISTORY * 2:]
+    CONVERSATION_HISTORY.add(role, content)
 
 def remember_fact(fact):
     """Store a fact in long-term memory"""
-    memory = load_memory()
-    fact_entry = {
-        "content": fact,
-        "timestamp": datetime.now().isoformat(),
-        "source": "user_input"
-    }
-    memory["facts"].append(fact_entry)
-    return save_memory(memory)
+    return MEMORY.remember_fact(fact)
 
 def remember_note(note):
     """Store a note in long-term memory"""
-    memory = load_memory()
-    note_entry = {
-        "content": note,
-        "timestamp": datetime.now().isoformat()
-    }
-    memory["notes"].append(note_entry)
-    return save_memory(memory)
+    return MEMORY.remember_note(note)
 
 def set_preference(key, value):
     """Store a user preference"""
-    memory = load_memory()
-    memory["preferences"][key] = {
-        "value": value,
-        "timestamp": datetime.now().isoformat()
-    }
-    return save_memory(memory)
+    return MEMORY.set_preference(key, value)
 
 def recall_facts(limit=5):
     """Retrieve recent facts from memory"""
-    memory = load_memory()
-    facts = memory.get("facts", [])
-    return facts[-limit:] if facts else []
+    return MEMORY.recall_facts(limit)
 
 def recall_notes(limit=5):
     """Retrieve recent notes from memory"""
-    memory = load_memory()
-    notes = memory.get("notes", [])
-    return notes[-limit:] if notes else []
-
-def get_memory_summary():
-    """Get a summary of stored memory for context"""
-    memory = load_memory()
-    summary = []
-    
-    # Recent facts
-    facts = memory.get("facts", [])
-    if facts:
-        recent_facts = [f["content"] for f in facts[-3:]]
-        summary.append(f"Recent facts: {'; '.join(recent_facts)}")
-    
-    # User preferences
-    prefs = memory.get("preferences", {})
-    if prefs:
-        pref_list = [f"{k}: {v['value']}" for k, v in prefs.items()]
-        summary.append(f"User preferences: {'; '.join(pref_list)}")
-    
-    return " | ".join(summary) if summary else "No stored memories"
+    return MEMORY.recall_notes(limit)
+
+def get_memory_summary(user_text=""):
+    """Get the stored memories relevant to the current request for context"""
+    return RETRIEVER.summary(user_text)
 
 # ========== Audio Record + Whisper ==========
 def record_audio(duration=AUDIO_DURATION, samplerate=AUDIO_SAMPLERATE):
@@ -237,7 +243,7 @@ def transcribe_with_whisper(audio, samplerate):
         tmpfile_path = tmpfile.name
     try:
         with open(tmpfile_path, "rb") as f:
-            transcript = openai.audio.transcriptions.create(
+            transcript = get_client().audio.transcriptions.create(
                 model=WHISPER_MODEL,
                 file=f
             )
@@ -257,48 +263,14 @@ def list_current_dir(max_items=500):
     except Exception:
         return []
 
+# Complete, deduplicated PATH executable set, built in the background and cached on disk
+PATH_INDEX = PathIndex(PATH_INDEX_FILE).start()
+
 def list_path_executables(max_items=500):
     """Collect a lightweight list of executable names in PATH so GPT knows what exists."""
-    seen = set()
-    out = []
-    path_dirs = os.getenv("PATH", "").split(os.pathsep)
-    exts = []
-    if os.name == "nt":
-        # On Windows, PATHEXT defines executable suffixes.
-        exts = os.getenv("PATHEXT", ".EXE;.BAT;.CMD;.COM").lower().split(";")
-    for d in path_dirs:
-        if not d or not os.path.isdir(d):
-            continue
-        try:
-            for entry in os.listdir(d):
-                full = os.path.join(d, entry)
-                if os.name == "nt":
-                    lower = entry.lower()
-                    if any(lower.endswith(ext) for ext in exts):
-                        base = lower
-                        # strip extension for readability
-                        for ext in exts:
-                            if base.endswith(ext):
-                                base = base[: -len(ext)]
-                                break
-                        if base not in seen:
-                            seen.add(base)
-                            out.append(base)
-                else:
-                    # Unix: executable bit
-                    try:
-                        st = os.stat(full)
-                        if st.st_mode & 0o111 and os.path.isfile(full):
-                            if entry not in seen:
-                                seen.add(entry)
-                                out.append(entry)
-                    except Exception:
-                        continue
-                if len(out) >= max_items:
-                    return out
-        except Exception:
-            continue
-    return out
+    PATH_INDEX.wait(PATH_INDEX_WAIT_SECONDS)
+    PATH_INDEX.refresh()  # One stat per directory; only changed directories are rescanned
+    return PATH_INDEX.names()[:max_items]
 
 def canonical_os_info():
     sysname = platform.system()  # 'Windows', 'Darwin', 'Linux'
@@ -453,19 +425,46 @@ def takeCommandWhisper():
         print(f"Error with Whisper recognition: {e}")
         return None
 
-def check_openai_connection():
-    """Check if OpenAI API is available"""
-    try:
-        # Simple test to check if API key is working
-        response = openai.chat.completions.create(
-            model=GPT_MODEL,
-            messages=[{"role": "user", "content": "test"}],
-            max_tokens=1
-        )
-        return True
-    except Exception as e:
-        print(f"OpenAI API Error: {e}")
-        return False
+def probe_openai():
+    """Cheap OpenAI probe: fetch the model's metadata (a GET, no tokens billed)"""
+    get_client().with_options(max_retries=0, timeout=5).models.retrieve(GPT_MODEL)
+
+# Probed in the background at startup; afterwards every GPT request refreshes the result
+OPENAI_HEALTH = HealthCheck("OpenAI", probe_openai, ttl=HEALTH_CHECK_TTL)
+
+def report_openai_health(check):
+    if check.ok:
+        print("✓ OpenAI API is available")
+    else:
+        print(f"✗ OpenAI API is not available: {check.error}")
+
+def check_openai_connection(timeout=5):
+    """Check if OpenAI API is available (cached; probes only when the last result is stale)"""
+    return bool(OPENAI_HEALTH.check(timeout))
+
+# Every GPT request goes through one router, so routing policies and per-backend latency apply
+OPENAI_BACKEND = OpenAIBackend(GPT_MODEL, health=OPENAI_HEALTH)
+OLLAMA_BACKEND = OllamaBackend(OllamaClient(OLLAMA_BASE_URL, OLLAMA_MODEL)) if LLM_ROUTING != "cloud" else None
+
+def build_router():
+    """Routing policy from LLM_ROUTING"""
+    if LLM_ROUTING == "local_first":
+        return LLMRouter(LocalFirst(OLLAMA_BACKEND, OPENAI_BACKEND, slo_ms=LATENCY_SLO_MS))
+    if LLM_ROUTING == "split":
+        return LLMRouter(TaskSplit({"summary": OLLAMA_BACKEND}, default=OPENAI_BACKEND))
+    return LLMRouter(SingleBackend(OPENAI_BACKEND))
+
+LLM_ROUTER = build_router()
+
+def report_llm_usage(usage, start):
+    """Print the prompt/cached tokens the API reported, or the answering backend's latency"""
+    backend = LLM_ROUTER.last_backend
+    if usage:
+        turn = PROMPT_USAGE.record(usage[-1], time.perf_counter() - start)
+        print(f"📊 Prompt: {turn['prompt_tokens']} tokens ({turn['cached_tokens']} cached), "
+              f"{turn['latency_ms']:.0f} ms")
+    elif backend is not None:
+        print(f"📊 {backend.name}: p50 first token {backend.metrics.percentile(50):.0f} ms")
 
 def test_microphone():
     """Test if microphone is working with detailed diagnostics"""
@@ -571,22 +570,19 @@ def exec_shell(command: str) -> tuple[str, int]:
 
 
 
-def chat_with_gpt(prompt):
-    """Send a prompt to OpenAI GPT and get a response"""
+def chat_with_gpt(prompt, on_sentence=None):
+    """Send a prompt to the routed LLM and get a response (streamed to `on_sentence` if given)"""
     try:
-        response = openai.chat.completions.create(
-            model=GPT_MODEL,
-            messages=[{"role": "user", "content": prompt}]
-        )
-        return response.choices[0].message.content.strip()
-    except openai.AuthenticationError:
-        return "Sorry, there's an authentication error with OpenAI. Please check your API key."
-    except openai.RateLimitError:
-        return "Sorry, I've hit the rate limit. Please try again in a moment."
-    except openai.APIConnectionError:
-        return "Sorry, I cannot connect to OpenAI. Please check your internet connection."
-    except Exception as e:
-        return f"Sorry, there was an error: {str(e)}"
+        return LLM_ROUTER.complete([{"role": "user", "content": prompt}], task="chat", on_sentence=on_sentence)
+    except BackendError as e:
+        cause = e.__cause__
+        if isinstance(cause, openai.AuthenticationError):
+            return "Sorry, there's an authentication error with OpenAI. Please check your API key."
+        if isinstance(cause, openai.RateLimitError):
+            return "Sorry, I've hit the rate limit. Please try again in a moment."
+        if isinstance(cause, openai.APIConnectionError):
+            return "Sorry, I cannot connect to OpenAI. Please check your internet connection."
+        return f"Sorry, there was an error: {str(cause or e)}"
 
 # ====== GPT Orchestrator ======
 INTENT_SCHEMA = """
@@ -606,12 +602,33 @@ Rules:
 - Do NOT include markdown, backticks, or extra keys. One compact JSON line only.
 """
 
+# Per-component caches for the prompt; PROMPT_CACHE.stats() has the hit/miss counters
+PROMPT_CACHE = PromptCache()
+# Prompt/cached token counts per request, from the API usage field
+PROMPT_USAGE = UsageStats()
+
 def build_system_prompt():
-    # Give GPT visibility of directory + available commands + OS
-    dir_items = list_current_dir()
-    path_bins = list_path_executables()
-    memory_context = get_memory_summary()
+    """
+    Static system prompt: persona, OS, PATH sample, OS hints and the JSON schema.
+
+    It stays byte-identical across turns (until PATH changes) so the API's prefix
+    prompt cache can reuse it; per-turn context goes in build_context_block().
+    """
+    bins_key = path_key()
+    path_bins = PROMPT_CACHE.path_bins.get(bins_key, list_path_executables)
+    return PROMPT_CACHE.prefix.get(bins_key, lambda: render_static_prompt(path_bins))
+
+def build_context_block(user_text=""):
+    """Volatile context (working directory, relevant memories), sent just before the user turn."""
+    dir_key = cwd_key()
+    dir_items = PROMPT_CACHE.dir_items.get(dir_key, list_current_dir)
+    # Memory context depends on the request (relevance ranking), so it is keyed on the text too
+    memory_context = PROMPT_CACHE.memory.get(
+        (MEMORY.version, MEMORY.generation, user_text), lambda: get_memory_summary(user_text))
+    return PROMPT_CACHE.context.get(
+        (dir_key, memory_context), lambda: render_context_block(dir_items, memory_context))
 
+def render_static_prompt(path_bins):
     sysname = platform.system()
     os_hint = {
         "Windows": (
@@ -638,53 +655,25 @@ def build_system_prompt():
     sys_prompt = f"""You are Marvin, a voice assistant that can either chat or run local shell commands.
 OS: {canonical_os_info()}
 
-You can see the current working directory files:
-{os.getcwd()}
-- {chr(10).join(dir_items)}
-
 You can see a sample of executables available on PATH:
 - {", ".join(path_bins[:100])}
 
-Memory Context: {memory_context}
-
 Guidance (choose appropriate commands for THIS OS):
 {os_hint}
 
-{INTENT_SCHEMA}
+{INTENT_SCHEMA if INTENT_MODE == "json" else TOOLS_GUIDANCE}
 """
     return sys_prompt
 
-def gpt_decide(user_text: str) -> dict:
-    """Ask GPT to either produce a run command or a chat reply (JSON-only contract)."""
-    system_prompt = build_system_prompt()
-    
-    # Add user input to conversation history
-    add_to_conversation_history("user", user_text)
-    
-    # Build messages with conversation history for context
-    messages = [{"role": "system", "content": system_prompt}]
-    
-    # Add recent conversation history (excluding current user input)
-    if CONVERSATION_HISTORY[:-1]:  # All except the just-added user input
-        for msg in CONVERSATION_HISTORY[-8:]:  # Last 8 messages for context
-            if msg["role"] in ["user", "assistant"]:
-                messages.append({"role": msg["role"], "content": msg["content"]})
-    
-    # Add current user input
-    messages.append({"role": "user", "content": user_text})
-
-    # Use chat.completions for compatibility with user's original pattern
-    resp = openai.chat.completions.create(
-        model=GPT_MODEL,
-        temperature=0,
-        messages=messages
-    )
-    content = resp.choices[0].message.content.strip()
-    
-    # Add assistant response to conversation history
-    add_to_conversation_history("assistant", content)
+def render_context_block(dir_items, memory_context):
+    return f"""You can see the current working directory files:
+{os.getcwd()}
+- {chr(10).join(dir_items)}
+
+Memory Context: {memory_context}"""
 
-    # Content must be JSON one-liner. Try to parse; if fail, fallback to chat.
+def parse_decision(content: str) -> dict:
+    """Parse GPT's JSON one-liner into a run/chat decision; anything else is treated as chat."""
     try:
         data = json.loads(content)
         # minimal sanity
@@ -699,15 +688,176 @@ def gpt_decide(user_text: str) -> dict:
         # If GPT ever violates, treat as chat
         return {"mode": "chat", "command": "", "say": content}
 
+def gpt_decide(user_text: str, on_sentence=None, cancel=None, record=True) -> dict:
+    """
+    Ask GPT to either produce a run command or a chat reply (JSON-only contract).
+
+    With `on_sentence`, the response is streamed and each finished sentence of
+    the "say" field is passed on as soon as it arrives; the returned decision
+    then has spoken=True if anything was passed on. Setting the `cancel` event
+    closes the stream and raises Cancelled; with record=False the exchange is
+    left out of the conversation history (speculative requests).
+    """
+    # Stable prefix first (static prompt, summary, earlier turns), volatile context last
+    messages = build_messages(build_system_prompt(), CONVERSATION_HISTORY, user_text,
+                              context=build_context_block(user_text))
+
+    start = time.perf_counter()
+    spoken = []
+    usage = []
+    def speak_sentence(sentence):
+        spoken.append(sentence)
+        on_sentence(sentence)
+    content = LLM_ROUTER.complete(messages, task="route", on_sentence=speak_sentence if on_sentence else None,
+                                  field="say", cancel=cancel, temperature=0, on_usage=usage.append)
+    report_llm_usage(usage, start)
+    decision = parse_decision(content)
+    decision["spoken"] = bool(spoken)
+
+    # Record the exchange; keep the spoken reply (or command) rather than the JSON envelope
+    if record:
+        add_to_conversation_history("user", user_text)
+        add_to_conversation_history("assistant", history_text(decision))
+    return decision
+
+def gpt_route(user_text: str, on_sentence=None, cancel=None, record=True) -> list:
+    """
+    Ask GPT which actions answer `user_text`.
+
+    In "tools" mode chat replies come back as plain (streamable) text and actions
+    as schema-checked tool calls, possibly several per request; in "json" mode
+    this wraps gpt_decide's single decision. `cancel` and `record` are as for
+    gpt_decide.
+    """
+    if INTENT_MODE != "tools":
+        return [gpt_decide(user_text, on_sentence, cancel, record)]
+
+    messages = build_messages(build_system_prompt(), CONVERSATION_HISTORY, user_text,
+                              context=build_context_block(user_text))
+    calls = ToolCallCollector()
+    spoken = []
+    usage = []
+    start = time.perf_counter()
+    def speak_sentence(sentence):
+        spoken.append(sentence)
+        on_sentence(sentence)
+    content = LLM_ROUTER.complete(messages, task="route", on_sentence=speak_sentence if on_sentence else None,
+                                  cancel=cancel, temperature=0, tools=TOOLS,
+                                  on_tool_calls=calls.add_delta, on_usage=usage.append)
+    report_llm_usage(usage, start)
+    actions = calls.actions(content, spoken=bool(spoken))
+    if not actions:
+        actions = [{"mode": "chat", "command": "", "say": "Sorry, I'm not sure how to help with that.",
+                    "fallback": True}]  # Not cached: the next try should ask GPT again
+
+    if record:
+        add_to_conversation_history("user", user_text)
+        add_to_conversation_history("assistant", " ".join(history_text(a) for a in actions))
+    return actions
+
+def perform_action(action: dict):
+    """Carry out one routed action and tell the user about it."""
+    mode = action["mode"]
+    if mode == "run":
+        cmd = action["command"]
+        missing = PATH_INDEX.missing_program(cmd)
+        if missing:
+            response = f"I can't run that: {missing} isn't installed on this system."
+            print(f"🤖 {response} ({cmd})")
+            tts.speak(response)
+            return
+        print(f"⚙️ Executing: {cmd}")
+        out, code = exec_shell(cmd)
+        if out.strip():
+            print(out)
+        speak_msg = f"Done. Exit code {code}."
+        print(f"🤖 {speak_msg}")
+        tts.speak(speak_msg)
+    elif mode == "camera":
+        camera = action["action"]
+        if camera == "open":
+            tts.speak("Opening camera with face and hand detection. Press Q to close the window.")
+            camFeatures.open_camera()
+        elif camera == "compare":
+            tts.speak("Opening dual camera comparison. Press Q to close.")
+            camFeatures.compare_cameras()
+        elif camera == "snapshot":
+            tts.speak("Taking a snapshot. Hold still for 3 seconds.")
+            camFeatures.take_snapshot(SNAPSHOT_FILENAME)
+            tts.speak("Snapshot captured and saved.")
+        elif camera == "describe":
+            description = camFeatures.describe_scene()
+            print(f"🤖 Scene: {description}")
+            tts.speak(description)
+        elif camera == "analyze_expression":
+            analysis = camFeatures.analyze_expression_from_camera()
+            print(f"🧠 Facial Analysis:\n{analysis}")
+            tts.speak(analysis)
+    elif mode == "memory":
+        response = perform_memory_action(action["action"], action["text"], action["key"])
+        print(f"🤖 {response}")
+        tts.speak(response)
+    else:
+        # Plain chat
+        reply = action["say"]
+        print(f"🤖 Marvin: {reply}")
+        if action.get("spoken"):
+            speech.wait()  # Already playing sentence by sentence; let it finish
+        else:
+            tts.speak(reply)
+
+def perform_memory_action(kind, text, key=""):
+    """Run a memory tool call; returns the reply to speak"""
+    if kind == "remember_fact":
+        return "I've stored that in my memory." if text and remember_fact(text) else "Sorry, I had trouble saving that to memory."
+    if kind == "remember_note":
+        return "I've added that note." if text and remember_note(text) else "Sorry, I couldn't save that note."
+    if kind == "set_preference":
+        if key and text and set_preference(key, text):
+            return f"I've saved your preference: {key} = {text}"
+        return "Sorry, I couldn't save that preference."
+    if kind == "search" and text:
+        matches = MEMORY.search(text) or MEMORY.search_archive(text)
+        if matches:
+            return f"Here's what I remember about {text}: {'; '.join(m['content'] for m in matches)}"
+        return f"I don't remember anything about {text}."
+    if kind == "recall_notes":
+        notes = recall_notes()
+        return f"Here are my notes: {'; '.join(n['content'] for n in notes)}" if notes else "I don't have any notes stored."
+    facts = recall_facts()
+    return f"Here's what I remember: {'; '.join(f['content'] for f in facts)}" if facts else "I don't have any facts stored in memory yet."
+
+# Routine requests (time, date, open the browser, list files...) skip the GPT round trip
+FAST_INTENTS = FastIntentClassifier(threshold=FAST_INTENT_THRESHOLD)
+FAST_INTENT_VALUES = {"time": get_current_time, "date": get_current_date, "greeting": greeting}
+
+# Repeated requests reuse GPT's earlier decision (commands with side effects are never cached)
+RESPONSE_CACHE = ResponseCache(RESPONSE_CACHE_FILE) if RESPONSE_CACHE_FILE else None
+
+def response_fingerprint(user_text):
+    """What a cached decision depends on besides the text: model, router, static prompt, memories, conversation"""
+    memory_context = PROMPT_CACHE.memory.get(
+        (MEMORY.version, MEMORY.generation, user_text), lambda: get_memory_summary(user_text))
+    # Follow-ups ("yes", "why") mean something else after every turn, so the history is part of the key
+    history = json.dumps(CONVERSATION_HISTORY.messages(), ensure_ascii=False)
+    parts = [GPT_MODEL, INTENT_MODE, build_system_prompt(), memory_context, history]
+    return hashlib.sha1("\x00".join(parts).encode("utf-8")).hexdigest()
+
+# GPT starts on the stable prefix of a partial transcript; committed only if the final text is the same.
+# Speculative requests stay out of the history until main() records the committed turn.
+SPECULATOR = SpeculativeDecoder(
+    lambda text, on_sentence, cancel: gpt_route(text, on_sentence, cancel, record=False)
+) if SPECULATIVE_DECODING else None
+
+def on_partial_transcript(text):
+    """Hook for a streaming recognizer: call with each partial transcript while the user speaks"""
+    if SPECULATOR:
+        SPECULATOR.feed(text)
+
 def main():
-    # Check OpenAI connection
+    # Check OpenAI connection in the background so the greeting isn't delayed by a round trip
     print("Checking OpenAI connection...")
-    if check_openai_connection():
-        tts.speak("OpenAI GPT is ready.")
-        print("✓ OpenAI API is available")
-    else:
-        tts.speak("Warning: Cannot connect to OpenAI. Please check your API key.")
-        print("✗ OpenAI API is not available")
+    OPENAI_HEALTH.start(report_openai_health)
 
     # Test microphone
     print("Testing microphone...")
@@ -722,8 +872,13 @@ def main():
     hello = f"Hello, I am Marvin. {greeting()} How can I assist you today?"
     print(f"🤖 {hello}")
     tts.speak(hello)
+    # Only warn once the background check has actually failed; unknown means keep going
+    if OPENAI_HEALTH.status() is False:
+        tts.speak("Warning: Cannot connect to OpenAI. Please check your API key.")
     
     while True:
+        if SPECULATOR:
+            SPECULATOR.reset()  # A speculation from the previous turn must never be committed to this one
         try:
             input("\n➡ Press Enter to speak...")
         except (EOFError, KeyboardInterrupt):
@@ -790,6 +945,22 @@ def main():
                 tts.speak(response)
             continue
             
+        # Topic recall - search memory instead of listing the latest facts
+        if "what do you remember about" in user_input:
+            topic = user_input.split("what do you remember about", 1)[1].strip(" ?.")
+            matches = MEMORY.search(topic) if topic else []
+            if topic and not matches:
+                # Only now open the compressed archive of older memories
+                matches = MEMORY.search_archive(topic)
+            if matches:
+                match_list = [m["content"] for m in matches]
+                response = f"Here's what I remember about {topic}: {'; '.join(match_list)}"
+            else:
+                response = f"I don't remember anything about {topic}."
+            print(f"🤖 {response}")
+            tts.speak(response)
+            continue
+
         # Recall commands
         if "what do you remember" in user_input or "recall facts" in user_input:
             facts = recall_facts()
@@ -893,23 +1064,45 @@ def main():
             tts.speak(analysis)
             continue
 
-        # Use GPT to decide whether to run a command or chat
-        decision = gpt_decide(user_input)
-
-        if decision["mode"] == "run":
-            cmd = decision["command"]
-            print(f"⚙️ Executing: {cmd}")
-            out, code = exec_shell(cmd)
-            if out.strip():
-                print(out)
-            speak_msg = f"Done. Exit code {code}."
-            print(f"🤖 {speak_msg}")
-            tts.speak(speak_msg)
+        # Confident local match: answer without GPT, but keep it in the history for follow-ups
+        decision = FAST_INTENTS.decide(user_input, FAST_INTENT_VALUES)
+        if decision:
+            print(f"⚡ Local intent: {decision['intent']}")
+            perform_action(decision)
+            add_to_conversation_history("user", user_input)
+            add_to_conversation_history("assistant", history_text(decision))
+            continue
+
+        # Ask GPT what to do: chat, run a command, or (tools mode) several actions in one round trip
+        fingerprint = response_fingerprint(user_input) if RESPONSE_CACHE else None
+        actions = RESPONSE_CACHE.get(user_input, fingerprint) if RESPONSE_CACHE else None
+        if actions:
+            print("♻️ Reusing a cached response")
+            add_to_conversation_history("user", user_input)
+            add_to_conversation_history("assistant", " ".join(history_text(a) for a in actions))
         else:
-            # Plain chat
-            reply = decision["say"]
-            print(f"🤖 Marvin: {reply}")
-            tts.speak(reply)
+            try:
+                if SPECULATOR:
+                    actions = SPECULATOR.finish(user_input, speech.put)  # Speculation always streams
+                    add_to_conversation_history("user", user_input)
+                    add_to_conversation_history("assistant", " ".join(history_text(a) for a in actions))
+                    stats = SPECULATOR.stats()
+                    print(f"🔮 Speculation: {stats['committed']}/{stats['requests']} committed, "
+                          f"{stats['avg_saved_ms']:.0f} ms saved on average")
+                else:
+                    actions = gpt_route(user_input, speech.put if STREAM_RESPONSES else None)
+            except BackendError as e:  # The backends keep OPENAI_HEALTH current themselves
+                response = "Sorry, I cannot reach OpenAI right now. Please check your connection and API key."
+                print(f"🤖 {response} ({e})")
+                tts.speak(response)
+                continue
+            if RESPONSE_CACHE:
+                RESPONSE_CACHE.put(user_input, fingerprint, actions)
+        for action in actions:
+            perform_action(action)
+
+    # Persist any memory writes still waiting in the debounce window
+    MEMORY.flush()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
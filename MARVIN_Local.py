@@ -4,6 +4,7 @@ import json
 from datetime import datetime
 import speech_recognition as sr 
 import os
+import platform
 import subprocess
 import time
 import dotenv
@@ -16,6 +17,12 @@ from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import InstalledAppFlow
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
+from health import HealthCheck  # Background health checks cached with a TTL
+from ollama_client import ModelWarmup, OllamaClient  # Streaming Ollama client on a keep-alive session
+from speech_stream import SpeechQueue  # Speak replies while they stream
+from conversation import ConversationHistory, build_messages, history_text  # Token-budgeted history
+from llm_backends import (LLMRouter, LocalFirst, OllamaBackend, OpenAIBackend, SingleBackend,  # Pluggable LLMs
+                          TaskSplit, BackendError)
 
 # Load environment variables from .env.dev file
 dotenv.load_dotenv(".env.dev")
@@ -23,6 +30,30 @@ dotenv.load_dotenv(".env.dev")
 # Ollama configuration
 OLLAMA_BASE_URL = "http://localhost:11434"
 OLLAMA_MODEL = "gpt-oss:20b"  # The 20B parameter model we installed in the Docker container
+OLLAMA_KEEP_ALIVE = "30m"  # Keep the model loaded between turns instead of reloading it ("-1" = forever)
+STREAM_RESPONSES = True  # Speak Ollama replies sentence by sentence as they stream in
+WARMUP_WAIT_SECONDS = 300  # Max wait for the background model load if the user speaks before it's done
+OLLAMA_CHAT_MODE = True  # /api/chat with conversation history; False = stateless /api/generate
+HISTORY_TOKEN_BUDGET = 1500  # Max tokens of earlier turns sent with each chat request
+MAX_HISTORY = 10  # Number of conversation exchanges to remember
+LOCAL_SYSTEM_PROMPT = ("You are Marvin, a helpful voice assistant running locally. "
+                       "Keep replies short and conversational; they are read aloud.")
+HEALTH_CHECK_TTL = 300  # Seconds a successful health check (or Ollama request) is trusted
+
+# LLM routing: "local" (Ollama only), "local_first" (cloud when Ollama misses LATENCY_SLO_MS or fails)
+# or "split" (Ollama classifies intents, the cloud writes long-form chat). Cloud needs OPENAI_API_KEY.
+LLM_ROUTING = "local"
+CLOUD_MODEL = "gpt-4o-mini"
+LATENCY_SLO_MS = 2500  # Time to first token Ollama must meet in "local_first" mode
+# Let the model decide between running a command and chatting. Costs no extra round trip: one streamed
+# JSON reply carries the decision and the spoken answer (only "split" asks the intent backend first).
+LOCAL_INTENT_ROUTER = True
+INTENT_INSTRUCTION = (
+    "Decide how to handle the user's next message. Reply with one JSON object only: "
+    '{"mode": "run", "command": "<shell command for ' + platform.system() + '>", "say": ""} to do something '
+    'on this computer (open an app, list files, show system info), or '
+    '{"mode": "chat", "command": "", "say": "<your spoken reply>"} for anything else.'
+)
 
 # Gmail API configuration
 SCOPES = ['https://www.googleapis.com/auth/gmail.readonly', 
@@ -82,6 +113,7 @@ class _TTS:
         self.rate = rate
 
 tts = _TTS()
+speech = SpeechQueue(tts.speak)
 
 class GmailManager:
     def __init__(self):
@@ -330,15 +362,59 @@ def takeCommandMic():
         print(f"Error during speech recognition: {e}")
         return None
 
-def check_ollama_connection():
-    """Check if Ollama is available"""
-    try:
-        url = f"{OLLAMA_BASE_URL}/api/tags"
-        response = requests.get(url, timeout=5)
-        response.raise_for_status()
-        return True
-    except:
-        return False
+def probe_ollama():
+    """Raise unless the Ollama server answers /api/tags"""
+    OLLAMA.tags(timeout=5)
+
+# One streaming client for the whole session: pooled connection, model pinned with keep_alive
+OLLAMA = OllamaClient(OLLAMA_BASE_URL, OLLAMA_MODEL, keep_alive=OLLAMA_KEEP_ALIVE)
+
+# Loads the model in the background at startup; requests only wait if they arrive first
+OLLAMA_WARMUP = ModelWarmup(OLLAMA)
+
+def wait_for_model():
+    """Block only if the user spoke before the background warm-up finished"""
+    if not OLLAMA_WARMUP.ready:
+        print("⏳ Waiting for the model to finish loading...")
+        OLLAMA_WARMUP.wait(WARMUP_WAIT_SECONDS)
+        if OLLAMA_WARMUP.error:
+            print(f"⚠️ Model warm-up failed: {OLLAMA_WARMUP.error}")
+
+# Append-only history trimmed in blocks, so the same prefix is resent for several turns
+# and Ollama's KV cache only has to evaluate the new messages
+LOCAL_HISTORY = ConversationHistory(
+    token_budget=HISTORY_TOKEN_BUDGET,
+    max_messages=MAX_HISTORY * 2,  # *2 because user+assistant pairs
+    evict_ratio=0.5
+)
+
+# Probed in the background at startup; afterwards every chat request refreshes the result
+OLLAMA_HEALTH = HealthCheck("Ollama", probe_ollama, ttl=HEALTH_CHECK_TTL)
+
+LOCAL_BACKEND = OllamaBackend(OLLAMA, health=OLLAMA_HEALTH)
+CLOUD_BACKEND = OpenAIBackend(CLOUD_MODEL) if os.getenv("OPENAI_API_KEY") else None
+
+def build_router():
+    """Routing policy from LLM_ROUTING; falls back to Ollama only when no cloud key is set"""
+    if LLM_ROUTING != "local" and CLOUD_BACKEND is None:
+        print(f"⚠️ LLM_ROUTING={LLM_ROUTING!r} needs OPENAI_API_KEY; using Ollama only")
+    elif LLM_ROUTING == "local_first":
+        return LLMRouter(LocalFirst(LOCAL_BACKEND, CLOUD_BACKEND, slo_ms=LATENCY_SLO_MS))
+    elif LLM_ROUTING == "split":
+        return LLMRouter(TaskSplit({"intent": LOCAL_BACKEND, "chat": CLOUD_BACKEND}, default=LOCAL_BACKEND))
+    return LLMRouter(SingleBackend(LOCAL_BACKEND))
+
+LLM_ROUTER = build_router()
+
+def report_ollama_health(check):
+    if check.ok:
+        print("✓ Ollama is available")
+    else:
+        print(f"✗ Ollama is not available: {check.error}")
+
+def check_ollama_connection(timeout=5):
+    """Check if Ollama is available (cached; probes only when the last result is stale)"""
+    return bool(OLLAMA_HEALTH.check(timeout))
 
 def test_microphone():
     """Test if microphone is working with detailed diagnostics"""
@@ -429,29 +505,99 @@ def monitor_audio_levels():
         print(f"Audio monitoring failed: {e}")
         print("This is normal - just means we can't monitor levels")
 
-def chat_with_ollama(prompt):
-    """Send a prompt to Ollama and get a response"""
-    try:
-        url = f"{OLLAMA_BASE_URL}/api/generate"
-        
-        data = {
-            "model": OLLAMA_MODEL,
-            "prompt": prompt,
-            "stream": False
-        }
-        
-        response = requests.post(url, json=data, timeout=60)
-        response.raise_for_status()
-        
-        result = response.json()
-        return result.get("response", "Sorry, I couldn't generate a response.")
-        
-    except requests.exceptions.ConnectionError:
+def llm_error_reply(error):
+    """Spoken apology for a BackendError, naming the underlying cause"""
+    cause = error.__cause__
+    if isinstance(cause, requests.exceptions.ConnectionError):
         return "Sorry, I cannot connect to Ollama. Make sure the Docker containers are running."
-    except requests.exceptions.Timeout:
+    if isinstance(cause, requests.exceptions.Timeout):
         return "Sorry, the request timed out. The AI model might be processing."
-    except Exception as e:
-        return f"Sorry, there was an error: {str(e)}"
+    return f"Sorry, there was an error: {str(cause or error)}"
+
+def report_llm_stats():
+    backend = LLM_ROUTER.last_backend
+    if backend is LOCAL_BACKEND:
+        stats = OLLAMA.last_stats
+        print(f"📊 Ollama: prompt {stats['prompt_tokens']} tokens evaluated in {stats['prompt_eval_ms']:.0f} ms, "
+              f"first token {stats['ttft_ms']:.0f} ms, {stats['tokens']} tokens at {stats['tokens_per_sec']:.1f} tokens/s")
+    else:
+        print(f"📊 {backend.name}: p50 first token {backend.metrics.percentile(50):.0f} ms")
+
+def parse_intent(content):
+    """Run/chat decision from the model's JSON reply; anything unusable is treated as chat"""
+    try:
+        data = json.loads(content[content.index("{"):content.rindex("}") + 1])
+        if data.get("mode") == "run" and isinstance(data.get("command"), str) and data["command"].strip():
+            return {"mode": "run", "command": data["command"].strip(), "say": ""}
+        say = data.get("say")
+        return {"mode": "chat", "command": "", "say": say.strip() if isinstance(say, str) else ""}
+    except (ValueError, AttributeError):
+        return {"mode": "chat", "command": "", "say": content.strip()}  # Not JSON: take it as the reply
+
+def decide_intent(user_text):
+    """Ask the intent backend whether to run a command or chat (same message prefix as chat requests)"""
+    messages = build_messages(LOCAL_SYSTEM_PROMPT, LOCAL_HISTORY, user_text, context=INTENT_INSTRUCTION)
+    wait_for_model()
+    try:
+        content = LLM_ROUTER.complete(messages, task="intent", max_tokens=128, temperature=0, json_mode=True)
+    except BackendError as e:
+        print(f"Intent routing failed: {e}")
+        return {"mode": "chat", "command": "", "say": ""}
+    return parse_intent(content)
+
+def decide_and_reply(user_text, on_sentence=None):
+    """
+    Run command or chat reply for `user_text`, recorded in the history.
+
+    One streamed JSON request (the shape MARVIN's gpt_decide uses): with
+    `on_sentence`, the "say" field is spoken as it arrives, so routing adds no
+    round trip before the first word. With the "split" policy a cheap intent
+    call on the local model comes first and the cloud writes chat replies.
+    """
+    if LLM_ROUTING == "split" and CLOUD_BACKEND is not None:
+        decision = decide_intent(user_text)
+        if decision["mode"] == "chat":
+            return {"mode": "chat", "command": "", "say": chat_with_llm(user_text, on_sentence)}
+    else:
+        messages = build_messages(LOCAL_SYSTEM_PROMPT, LOCAL_HISTORY, user_text, context=INTENT_INSTRUCTION)
+        wait_for_model()
+        try:
+            content = LLM_ROUTER.complete(messages, task="chat", on_sentence=on_sentence, field="say",
+                                          temperature=0, json_mode=True)
+        except BackendError as e:
+            return {"mode": "chat", "command": "", "say": llm_error_reply(e)}
+        report_llm_stats()
+        decision = parse_intent(content)
+        if decision["mode"] == "chat" and not decision["say"]:
+            return {"mode": "chat", "command": "", "say": "Sorry, I couldn't generate a response."}
+    LOCAL_HISTORY.add("user", user_text)
+    LOCAL_HISTORY.add("assistant", history_text(decision))
+    return decision
+
+def chat_with_llm(prompt, on_sentence=None, history=True):
+    """
+    Send a prompt to the routed LLM and get a response.
+
+    With `on_sentence`, sentences are passed on as they stream in; with
+    history=False the prompt is sent on its own and not remembered.
+    """
+    history = history and OLLAMA_CHAT_MODE
+    if history:
+        # Static system prompt, then earlier turns unchanged, then the new one
+        messages = build_messages(LOCAL_SYSTEM_PROMPT, LOCAL_HISTORY, prompt)
+    else:
+        messages = [{"role": "user", "content": prompt}]
+    wait_for_model()
+    try:
+        reply = LLM_ROUTER.complete(messages, task="chat", on_sentence=on_sentence)
+    except BackendError as e:
+        return llm_error_reply(e)
+
+    if history and reply:
+        LOCAL_HISTORY.add("user", prompt)
+        LOCAL_HISTORY.add("assistant", reply)
+    report_llm_stats()
+    return reply or "Sorry, I couldn't generate a response."
 
 def handle_check_emails():
     """Handle checking recent emails"""
@@ -485,7 +631,7 @@ def handle_check_emails():
             # Use AI to summarize long emails
             if len(email['body']) > 200:
                 summary_prompt = f"Summarize this email in 2-3 sentences: {email['body']}"
-                summary = chat_with_ollama(summary_prompt)
+                summary = chat_with_llm(summary_prompt, history=False)
                 tts.speak(f"Email summary: {summary}")
             else:
                 tts.speak(f"Email content: {email['body']}")
@@ -589,14 +735,11 @@ def run_local_command(command):
 
 
 def main():
-    # Check Ollama connection
+    # Check Ollama connection in the background so the greeting isn't delayed by a round trip
     print("Checking Ollama connection...")
-    if check_ollama_connection():
-        tts.speak("Ollama AI is ready.")
-        print("✓ Ollama is available")
-    else:
-        tts.speak("Warning: Cannot connect to Ollama. Make sure Docker containers are running.")
-        print("✗ Ollama is not available")
+    OLLAMA_HEALTH.start(report_ollama_health)
+    # Load the model while the microphone test and greeting run
+    OLLAMA_WARMUP.start()
 
     # Test microphone
     print("Testing microphone...")
@@ -612,6 +755,9 @@ def main():
     # tts.speak(f"Current time is: {get_current_time()}")  # Speak current time for reference
     # tts.speak(f"Current date is: {date()}")  # Speak current date for reference
     tts.speak(greeting())  # Speak greeting based on the time of day
+    # Only warn once the background check has actually failed; unknown means keep going
+    if OLLAMA_HEALTH.status() is False:
+        tts.speak("Warning: Cannot connect to Ollama. Make sure Docker containers are running.")
     
     while True:
         input("\n➡ Press Enter to speak...")
@@ -650,9 +796,27 @@ def main():
             print(f"Command Output: {result}")
             tts.speak(result)
         else:
-            response = chat_with_ollama(user_input)
-            print(f"Ollama Response: {response}")
-            tts.speak(response)
+            spoken = []
+            def speak_sentence(sentence):
+                spoken.append(sentence)
+                speech.put(sentence)
+            on_sentence = speak_sentence if STREAM_RESPONSES else None
+            if LOCAL_INTENT_ROUTER:
+                decision = decide_and_reply(user_input, on_sentence)
+                if decision["mode"] == "run":
+                    print(f"⚙️ Executing: {decision['command']}")
+                    result = run_local_command(decision["command"])
+                    print(f"Command Output: {result}")
+                    tts.speak(result or "Done.")
+                    continue
+                response = decision["say"]
+            else:
+                response = chat_with_llm(user_input, on_sentence)
+            print(f"Marvin: {response}")
+            if spoken:
+                speech.wait()  # Already playing sentence by sentence; let it finish
+            else:
+                tts.speak(response)
 
 if __name__ == "__main__":
     main()
@@ -18,6 +18,8 @@ import sounddevice as sd
 import scipy.io.wavfile as wav
 import pyttsx3
 
+from memory_store import open_memory_store
+
 # -------- OpenAI client (compat w/ openai>=1.0 or legacy) --------
 try:
     import openai
@@ -188,29 +190,13 @@ def canonical_os_info():
     release = platform.release()
     return f"{sysname} {release}"
 
-# ====== Memory System (persistent JSON) ======
+# ====== Memory System (shared, process-safe store) ======
 MEMORY_FILE = "marvin_memory.json"
 CONVERSATION_HISTORY = []
 MAX_HISTORY = 10
 
-def load_memory():
-    try:
-        if os.path.exists(MEMORY_FILE):
-            with open(MEMORY_FILE, "r", encoding="utf-8") as f:
-                return json.load(f)
-    except Exception as e:
-        print(f"Error loading memory: {e}")
-    return {"facts": [], "preferences": {}, "notes": [], "created": datetime.now().isoformat()}
-
-def save_memory(memory_data):
-    try:
-        memory_data["last_updated"] = datetime.now().isoformat()
-        with open(MEMORY_FILE, "w", encoding="utf-8") as f:
-            json.dump(memory_data, f, ensure_ascii=False, indent=2)
-        return True
-    except Exception as e:
-        print(f"Error saving memory: {e}")
-        return False
+# Same store as MARVIN.py: saves are locked + atomic and merge other processes' writes
+MEMORY = open_memory_store(MEMORY_FILE)
 
 def add_to_conversation_history(role, content):
     global CONVERSATION_HISTORY
@@ -219,40 +205,27 @@ def add_to_conversation_history(role, content):
         CONVERSATION_HISTORY = CONVERSATION_HISTORY[-MAX_HISTORY * 2:]
 
 def remember_fact(fact):
-    memory = load_memory()
-    fact_entry = {"content": fact, "timestamp": datetime.now().isoformat(), "source": "user_input"}
-    memory["facts"].append(fact_entry)
-    return save_memory(memory)
+    return MEMORY.remember_fact(fact)
 
 def remember_note(note):
-    memory = load_memory()
-    note_entry = {"content": note, "timestamp": datetime.now().isoformat()}
-    memory["notes"].append(note_entry)
-    return save_memory(memory)
+    return MEMORY.remember_note(note)
 
 def set_preference(key, value):
-    memory = load_memory()
-    memory["preferences"][key] = {"value": value, "timestamp": datetime.now().isoformat()}
-    return save_memory(memory)
+    return MEMORY.set_preference(key, value)
 
 def recall_facts(limit=5):
-    memory = load_memory()
-    facts = memory.get("facts", [])
-    return facts[-limit:] if facts else []
+    return MEMORY.recall_facts(limit)
 
 def recall_notes(limit=5):
-    memory = load_memory()
-    notes = memory.get("notes", [])
-    return notes[-limit:] if notes else []
+    return MEMORY.recall_notes(limit)
 
 def get_memory_summary():
-    memory = load_memory()
     summary = []
-    facts = memory.get("facts", [])
+    facts = MEMORY.recall_facts(3)
     if facts:
-        recent_facts = [f["content"] for f in facts[-3:]]
+        recent_facts = [f["content"] for f in facts]
         summary.append(f"Recent facts: {'; '.join(recent_facts)}")
-    prefs = memory.get("preferences", {})
+    prefs = MEMORY.get_preferences()
     if prefs:
         pref_list = [f"{k}: {v['value']}" for k, v in prefs.items()]
         summary.append(f"User preferences: {'; '.join(pref_list)}")
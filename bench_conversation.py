@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Benchmark prompt tokens per turn: legacy gpt_decide message assembly vs the message builder
+
+Replays recorded transcripts (user utterance + raw GPT reply per turn) and counts
+the tokens each approach sends besides the system prompt, which is identical in both.
+
+Usage: python bench_conversation.py [--transcripts sample_transcripts.json] [--window 8]
+"""
+
+import argparse
+import json
+
+from conversation import ConversationHistory, build_messages, count_message_tokens, history_text
+
+
+def _decision(reply: str) -> dict:
+    """Same contract as MARVIN.parse_decision, without importing the voice assistant."""
+    try:
+        data = json.loads(reply)
+        if data.get("mode") == "run" and str(data.get("command", "")).strip():
+            return {"mode": "run", "command": data["command"].strip(), "say": ""}
+        return {"mode": "chat", "command": "", "say": data.get("say", reply)}
+    except (ValueError, AttributeError):
+        return {"mode": "chat", "command": "", "say": reply}
+
+
+def legacy_tokens(session: list, window: int, max_history: int) -> list:
+    """Old gpt_decide: user turn added first, last `window` messages sent, then the user turn again."""
+    history, per_turn = [], []
+    for turn in session:
+        history.append({"role": "user", "content": turn["user"]})
+        history = history[-max_history * 2:]
+        messages = []
+        if history[:-1]:
+            messages.extend({"role": m["role"], "content": m["content"]} for m in history[-window:])
+        messages.append({"role": "user", "content": turn["user"]})
+        per_turn.append(count_message_tokens(messages))
+        history.append({"role": "assistant", "content": turn["reply"]})  # Raw JSON envelope
+        history = history[-max_history * 2:]
+    return per_turn
+
+
+def builder_tokens(session: list, window: int) -> list:
+    """build_messages() with history_text(): utterance sent once, spoken replies stored."""
+    history, per_turn = ConversationHistory(max_messages=window), []
+    for turn in session:
+        messages = build_messages("", history, turn["user"])[1:]  # Drop the shared system prompt
+        per_turn.append(count_message_tokens(messages))
+        history.add("user", turn["user"])
+        history.add("assistant", history_text(_decision(turn["reply"])))
+    return per_turn
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--transcripts", default="sample_transcripts.json")
+    parser.add_argument("--window", type=int, default=8, help="history messages sent per request")
+    parser.add_argument("--max-history", type=int, default=10)
+    args = parser.parse_args()
+
+    with open(args.transcripts, "r", encoding="utf-8") as f:
+        sessions = json.load(f)
+
+    total_legacy = total_builder = turns = 0
+    for number, session in enumerate(sessions, 1):
+        legacy = legacy_tokens(session, args.window, args.max_history)
+        builder = builder_tokens(session, args.window)
+        print(f"\n📜 Session {number} ({len(session)} turns)")
+        print(f"{'turn':>4} {'legacy':>8} {'builder':>8} {'saved':>7}")
+        for i, (old, new) in enumerate(zip(legacy, builder), 1):
+            print(f"{i:>4} {old:>8} {new:>8} {old - new:>7}")
+        total_legacy += sum(legacy)
+        total_builder += sum(builder)
+        turns += len(session)
+
+    saved = total_legacy - total_builder
+    print(f"\n📊 {turns} turns: {total_legacy} -> {total_builder} prompt tokens "
+          f"({saved / turns:.1f} saved per turn, {100 * saved / max(total_legacy, 1):.0f}%)")
+
+
+if __name__ == "__main__":
+    main()
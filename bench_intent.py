@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Benchmark the local fast-path intent classifier on a labelled utterance corpus
+
+Reports accuracy, GPT calls avoided and estimated end-to-end latency, where
+utterances that fall through pay the classifier time plus a GPT round trip.
+
+Usage: python bench_intent.py [--corpus intent_corpus.json] [--llm-ms 900]
+"""
+
+import argparse
+import json
+import statistics
+import time
+
+from fast_intent import FastIntentClassifier
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--corpus", default="intent_corpus.json")
+    parser.add_argument("--llm-ms", type=float, default=900, help="typical gpt_decide round trip")
+    args = parser.parse_args()
+
+    with open(args.corpus, "r", encoding="utf-8") as f:
+        corpus = json.load(f)
+    classifier = FastIntentClassifier(system="Linux")
+    values = {"time": lambda: "09:41 AM", "date": lambda: "17/10/2026", "greeting": lambda: "Hello!"}
+
+    answered = correct = wrong = missed = 0
+    latencies, classify_ms = [], []
+    for item in corpus:
+        start = time.perf_counter()
+        decision = classifier.decide(item["text"], values)
+        elapsed = (time.perf_counter() - start) * 1000
+        classify_ms.append(elapsed)
+        if decision is None:
+            latencies.append(elapsed + args.llm_ms)
+            missed += item["intent"] is not None
+            continue
+        latencies.append(elapsed)
+        answered += 1
+        if decision["intent"] == item["intent"]:
+            correct += 1
+        else:
+            wrong += 1
+            print(f"❌ '{item['text']}' -> {decision['intent']} (expected {item['intent']})")
+
+    routine = sum(1 for item in corpus if item["intent"] is not None)
+    print(f"📊 {len(corpus)} utterances ({routine} routine): {answered} answered locally, "
+          f"{correct} correct, {wrong} wrong, {missed} routine fell through to GPT")
+    print(f"   GPT calls avoided: {answered}/{len(corpus)} ({100 * answered / len(corpus):.0f}%)")
+    print(f"   Classifier: {statistics.mean(classify_ms):.3f} ms mean per utterance")
+    print(f"   End-to-end: {args.llm_ms:.0f} ms (always GPT) -> {statistics.mean(latencies):.0f} ms mean")
+
+
+if __name__ == "__main__":
+    main()
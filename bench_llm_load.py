@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Load-test Marvin's LLM backends against the mock LLM server (or a real endpoint)
+
+Runs --requests chat requests from --concurrency threads through the OpenAI and
+Ollama backends and reports throughput, time to first token and errors per
+backend. Without --base-url an in-process mock server is started with the given
+latency, token rate and error rate, so the numbers are reproducible offline.
+
+Usage: python bench_llm_load.py [--concurrency 8] [--requests 64] [--latency-ms 150] [--token-rate 40]
+                                [--error-rate 0.0] [--base-url http://127.0.0.1:11500]
+"""
+
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import llm_client
+from llm_backends import OllamaBackend, OpenAIBackend
+from mock_llm_server import MockConfig, MockLLMServer
+from ollama_client import OllamaClient, close_sessions
+
+MESSAGES = [{"role": "system", "content": "You are Marvin, a helpful voice assistant."},
+            {"role": "user", "content": "Tell me something about Mars."}]
+
+
+def run_load(backend, concurrency: int, requests: int) -> dict:
+    def one(_):
+        try:
+            backend.complete(MESSAGES, max_tokens=64)
+            return True
+        except Exception:
+            return False
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        ok = sum(pool.map(one, range(requests)))
+    elapsed = time.perf_counter() - start
+    summary = backend.metrics.summary()
+    return {"ok": ok, "failed": requests - ok, "req_per_sec": requests / elapsed,
+            "p50_ttft_ms": summary["p50_ttft_ms"] or 0.0, "p95_ttft_ms": summary["p95_ttft_ms"] or 0.0,
+            "p50_total_ms": summary["p50_total_ms"] or 0.0}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=64)
+    parser.add_argument("--latency-ms", type=float, default=150)
+    parser.add_argument("--token-rate", type=float, default=40)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--base-url", help="existing server speaking both APIs (default: in-process mock)")
+    parser.add_argument("--openai-model", default="gpt-4o-mini")
+    parser.add_argument("--ollama-model", default="gpt-oss:20b")
+    args = parser.parse_args()
+
+    server = None
+    base_url = args.base_url
+    if not base_url:
+        server = MockLLMServer(MockConfig(latency_ms=args.latency_ms, token_rate=args.token_rate,
+                                          error_rate=args.error_rate)).start()
+        base_url = server.url
+
+    backends = [
+        OpenAIBackend(args.openai_model, api_key="mock-key", base_url=f"{base_url}/v1"),
+        OllamaBackend(OllamaClient(base_url, args.ollama_model)),
+    ]
+    try:
+        print(f"{'backend':>8} {'ok':>5} {'failed':>6} {'req/s':>7} {'p50 ttft':>9} {'p95 ttft':>9} {'p50 total':>10}")
+        for backend in backends:
+            result = run_load(backend, args.concurrency, args.requests)
+            print(f"{backend.name:>8} {result['ok']:>5} {result['failed']:>6} {result['req_per_sec']:>7.1f} "
+                  f"{result['p50_ttft_ms']:>9.0f} {result['p95_ttft_ms']:>9.0f} {result['p50_total_ms']:>10.0f}")
+    finally:
+        llm_client.close_clients()
+        close_sessions()
+        if server:
+            server.stop()
+    print(f"\n📊 {args.requests} requests per backend at concurrency {args.concurrency}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Benchmark MARVIN's memory backends (JSON file vs SQLite) at increasing sizes
+
+Usage: python bench_memory.py [--sizes 1000 100000 1000000]
+"""
+
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from memory_sqlite import migrate_json_to_sqlite
+from memory_store import open_memory_store
+
+WORDS = ["coffee", "python", "blue", "guitar", "berlin", "marathon", "sister", "dentist",
+         "birthday", "laptop", "garden", "pizza", "meeting", "dog", "vacation", "piano"]
+
+
+def _make_memory_file(path: str, count: int) -> None:
+    """Write a synthetic marvin_memory.json with `count` facts."""
+    start = datetime(2024, 1, 1)
+    facts = [{
+        "content": f"fact {i}: {WORDS[i % len(WORDS)]} {WORDS[(i * 7) % len(WORDS)]}",
+        "timestamp": (start + timedelta(seconds=i)).isoformat(),
+        "source": "user_input"
+    } for i in range(count)]
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"facts": facts, "preferences": {}, "notes": [],
+                   "created": start.isoformat()}, f)
+
+
+def _timed(fn, repeat: int = 1) -> float:
+    """Return the mean wall time of `fn` in milliseconds."""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) * 1000 / repeat
+
+
+def bench_size(count: int, workdir: str) -> dict:
+    json_path = os.path.join(workdir, f"memory_{count}.json")
+    db_path = os.path.join(workdir, f"memory_{count}.db")
+    _make_memory_file(json_path, count)
+
+    results = {}
+    migrate_ms = _timed(lambda: migrate_json_to_sqlite(json_path, db_path))
+
+    for backend in ("json", "sqlite"):
+        # flush_delay=0 makes every JSON write pay its real cost instead of being deferred
+        options = {"flush_delay": 0} if backend == "json" else {}
+        stores = []
+        load_ms = _timed(lambda: stores.append(open_memory_store(json_path, backend=backend, **options)))
+        store = stores[0]
+        recall_ms = _timed(lambda: store.recall_facts(5), repeat=100)
+        search_ms = _timed(lambda: store.search("guitar berlin"), repeat=10)
+        write_ms = _timed(lambda: store.remember_fact("benchmark fact"), repeat=5 if backend == "json" else 100)
+        store.close()
+        results[backend] = {"load": load_ms, "recall": recall_ms, "search": search_ms, "write": write_ms}
+    results["migrate"] = migrate_ms
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 100_000, 1_000_000])
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="marvin_bench_")
+    try:
+        print(f"{'facts':>9} {'backend':>8} {'load ms':>10} {'recall ms':>10} "
+              f"{'search ms':>10} {'write ms':>10}")
+        for count in args.sizes:
+            results = bench_size(count, workdir)
+            for backend in ("json", "sqlite"):
+                r = results[backend]
+                print(f"{count:>9} {backend:>8} {r['load']:>10.2f} {r['recall']:>10.4f} "
+                      f"{r['search']:>10.3f} {r['write']:>10.3f}")
+            print(f"{count:>9} {'migrate':>8} {results['migrate']:>10.2f}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Benchmark Ollama prompt evaluation per turn: stable-prefix /api/chat vs re-evaluating the whole conversation
+
+Replays the user turns of a recorded session against a running Ollama server
+twice, with the same growing history both times:
+  stable   static system prompt, earlier turns unchanged, new turn last (MARVIN_Local's chat mode),
+           so the server's KV cache covers everything but the new messages
+  resend   the same messages behind a per-turn header (time of day), as a naively
+           rebuilt prompt would be, so every turn re-evaluates the whole conversation
+and reports the prompt tokens the server evaluated and its prompt-eval time per turn.
+
+Usage: python bench_ollama_chat.py [--base-url http://localhost:11434] [--model gpt-oss:20b]
+                                   [--transcripts sample_transcripts.json] [--session 0]
+"""
+
+import argparse
+import json
+import time
+
+import requests
+
+from conversation import ConversationHistory, build_messages
+from ollama_client import OllamaClient
+
+SYSTEM_PROMPT = ("You are Marvin, a helpful voice assistant running locally. "
+                 "Keep replies short and conversational; they are read aloud.")
+
+
+def run_session(client: OllamaClient, utterances: list, volatile_header: bool, max_reply_tokens: int) -> list:
+    """Per-turn server stats for one replay of the session."""
+    history = ConversationHistory(token_budget=100_000, max_messages=1000)
+    turns = []
+    for n, text in enumerate(utterances, 1):
+        system = SYSTEM_PROMPT
+        if volatile_header:
+            system = f"Turn {n}, current time {time.strftime('%H:%M:%S')}.\n{SYSTEM_PROMPT}"
+        reply = client.chat(build_messages(system, history, text), options={"num_predict": max_reply_tokens})
+        history.add("user", text)
+        history.add("assistant", reply or "...")
+        turns.append(dict(client.last_stats))
+    return turns
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--base-url", default="http://localhost:11434")
+    parser.add_argument("--model", default="gpt-oss:20b")
+    parser.add_argument("--transcripts", default="sample_transcripts.json")
+    parser.add_argument("--session", type=int, default=0)
+    parser.add_argument("--max-reply-tokens", type=int, default=64)
+    args = parser.parse_args()
+
+    with open(args.transcripts, "r", encoding="utf-8") as f:
+        utterances = [turn["user"] for turn in json.load(f)[args.session]]
+
+    client = OllamaClient(args.base_url, args.model)
+    try:
+        client.tags()
+    except requests.RequestException as e:
+        print(f"❌ Ollama is not reachable at {args.base_url}: {e}")
+        return
+    client.generate("", options={"num_predict": 1})  # Load the model so turn 1 isn't a cold start
+
+    results = {}
+    for mode, volatile in (("stable", False), ("resend", True)):
+        results[mode] = run_session(client, utterances, volatile, args.max_reply_tokens)
+
+    print(f"{'turn':>4} {'stable tok':>10} {'stable ms':>10} {'resend tok':>10} {'resend ms':>10}")
+    for i, (stable, resend) in enumerate(zip(results["stable"], results["resend"]), 1):
+        print(f"{i:>4} {stable['prompt_tokens']:>10} {stable['prompt_eval_ms']:>10.0f} "
+              f"{resend['prompt_tokens']:>10} {resend['prompt_eval_ms']:>10.0f}")
+
+    last_stable, last_resend = results["stable"][-1], results["resend"][-1]
+    print(f"\n📊 Turn {len(utterances)}: {last_resend['prompt_tokens']} -> {last_stable['prompt_tokens']} "
+          f"prompt tokens evaluated, {last_resend['prompt_eval_ms']:.0f} ms -> {last_stable['prompt_eval_ms']:.0f} ms "
+          f"prompt eval, first token {last_resend['ttft_ms']:.0f} ms -> {last_stable['ttft_ms']:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Benchmark first-response latency from Ollama with the model cold (unloaded) vs pre-warmed
+
+For each round the model is unloaded (keep_alive=0), then:
+  cold   the user's first question goes straight to the server and pays for the model load
+  warm   ModelWarmup loads it first (empty prompt + keep_alive), then the same question is asked
+and the time to first token of that question is reported.
+
+Usage: python bench_ollama_warmup.py [--base-url http://localhost:11434] [--model gpt-oss:20b] [--rounds 3]
+"""
+
+import argparse
+import statistics
+import time
+
+import requests
+
+from ollama_client import ModelWarmup, OllamaClient
+
+QUESTION = [{"role": "user", "content": "Say hello in one short sentence."}]
+
+
+def unload(client: OllamaClient) -> None:
+    client.session.post(f"{client.base_url}/api/generate",
+                        json={"model": client.model, "keep_alive": 0, "stream": False}, timeout=60).raise_for_status()
+    time.sleep(1)  # Let the server release the model before the next load
+
+
+def first_response_ms(client: OllamaClient) -> float:
+    client.chat(QUESTION, options={"num_predict": 16})
+    return client.last_stats["ttft_ms"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--base-url", default="http://localhost:11434")
+    parser.add_argument("--model", default="gpt-oss:20b")
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    client = OllamaClient(args.base_url, args.model)
+    try:
+        client.tags()
+    except requests.RequestException as e:
+        print(f"❌ Ollama is not reachable at {args.base_url}: {e}")
+        return
+
+    cold, warm, loads = [], [], []
+    print(f"{'round':>5} {'cold ttft (ms)':>15} {'warm-up (ms)':>13} {'warm ttft (ms)':>15}")
+    for i in range(1, args.rounds + 1):
+        unload(client)
+        cold.append(first_response_ms(client))
+
+        unload(client)
+        warmup = ModelWarmup(client)
+        warmup.start()
+        warmup.wait()
+        if warmup.error:
+            print(f"❌ Warm-up failed: {warmup.error}")
+            return
+        loads.append(warmup.stats["total_ms"])
+        warm.append(first_response_ms(client))
+        print(f"{i:>5} {cold[-1]:>15.0f} {loads[-1]:>13.0f} {warm[-1]:>15.0f}")
+
+    print(f"\n📊 First response (median of {args.rounds}): {statistics.median(cold):.0f} ms cold -> "
+          f"{statistics.median(warm):.0f} ms warm; the {statistics.median(loads):.0f} ms load moves to startup")
+
+
+if __name__ == "__main__":
+    main()
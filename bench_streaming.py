@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Benchmark time-to-first-audio: speak after the full reply vs streamed sentence-level TTS
+
+Replays the chat replies in the recorded transcripts as simulated token streams
+(fixed delay per ~4-character token) into a simulated TTS, and reports when the
+first audio would start for each path.
+
+Usage: python bench_streaming.py [--transcripts sample_transcripts.json] [--token-ms 25]
+"""
+
+import argparse
+import json
+import statistics
+import time
+
+from speech_stream import SpeechQueue, stream_say
+
+
+def _token_stream(text: str, token_ms: float):
+    for i in range(0, len(text), 4):
+        time.sleep(token_ms / 1000)
+        yield text[i:i + 4]
+
+
+def ttfa_full_reply(reply: str, token_ms: float) -> float:
+    """Current path: wait for the whole response, parse it, then start speaking."""
+    start = time.perf_counter()
+    content = "".join(_token_stream(reply, token_ms))
+    json.loads(content)
+    return (time.perf_counter() - start) * 1000
+
+
+def ttfa_streamed(reply: str, token_ms: float) -> float:
+    """Streaming path: the first finished sentence of "say" goes straight to the TTS queue."""
+    speech = SpeechQueue(lambda sentence: None)
+    start = time.perf_counter()
+    stream_say(_token_stream(reply, token_ms), speech.put)
+    speech.wait()
+    speech.close()
+    return (speech.first_audio_at - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--transcripts", default="sample_transcripts.json")
+    parser.add_argument("--token-ms", type=float, default=25, help="simulated delay per token")
+    args = parser.parse_args()
+
+    with open(args.transcripts, "r", encoding="utf-8") as f:
+        replies = [turn["reply"] for session in json.load(f) for turn in session
+                   if json.loads(turn["reply"]).get("mode") == "chat"]
+
+    print(f"{'say chars':>9} {'full (ms)':>10} {'streamed (ms)':>14}")
+    full, streamed = [], []
+    for reply in replies:
+        full.append(ttfa_full_reply(reply, args.token_ms))
+        streamed.append(ttfa_streamed(reply, args.token_ms))
+        print(f"{len(json.loads(reply)['say']):>9} {full[-1]:>10.0f} {streamed[-1]:>14.0f}")
+
+    print(f"\n📊 {len(replies)} chat replies, time to first audio: "
+          f"{statistics.mean(full):.0f} ms -> {statistics.mean(streamed):.0f} ms mean, "
+          f"{statistics.median(full):.0f} ms -> {statistics.median(streamed):.0f} ms median")
+
+
+if __name__ == "__main__":
+    main()
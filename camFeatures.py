@@ -18,7 +18,7 @@ with redirect_stderr(f):
 import platform
 import time
 import subprocess
-import openai
+from llm_client import get_client  # Shared pooled OpenAI client with timeouts and retries
 import numpy as np
 from typing import Optional, Tuple
 import base64
@@ -272,7 +272,7 @@ def describe_scene() -> str:
         with open(filename, "rb") as img_file:
             b64 = base64.b64encode(img_file.read()).decode()
 
-        response = openai.chat.completions.create(
+        response = get_client().chat.completions.create(
             model="gpt-4o-mini",  # Vision-capable model
             messages=[{
                 "role": "user",
@@ -345,7 +345,7 @@ def analyze_expression_from_camera(cam_index: int = 0) -> str:
                 "and energy, and describe what kind of situation this might be, including environmental cues."
             )
 
-        response = openai.chat.completions.create(
+        response = get_client().chat.completions.create(
             model="gpt-4o-mini",  # Vision + reasoning
             messages=[{
                 "role": "user",
@@ -0,0 +1,301 @@
+"""
+Conversation History Module for MARVIN AI Assistant
+Keeps recent turns within a token budget and folds older turns into a rolling summary
+"""
+
+import json
+import os
+import threading
+from datetime import datetime
+from typing import Callable, Optional
+
+from memory_retrieval import estimate_tokens
+
+try:
+    import tiktoken
+except ImportError:  # Fall back to the byte-based estimate
+    tiktoken = None
+
+# ========== Configuration Constants ==========
+DEFAULT_TOKEN_BUDGET = 1200      # Tokens of verbatim history sent with each request
+DEFAULT_SUMMARY_TOKENS = 200     # Cap on the rolling summary of evicted turns
+DEFAULT_MAX_MESSAGES = 20        # Hard cap on verbatim messages, whatever their size
+MESSAGE_OVERHEAD_TOKENS = 4      # Per-message framing tokens in the chat format
+TRUNCATION_MARKER = " …[truncated]"
+SUMMARY_PREFIX = "Summary of the earlier conversation: "
+COMPACT_FACTOR = 4               # Rewrite the log once it holds this many windows' worth of lines
+
+_ENCODINGS = {}
+
+
+def _encoding(model: Optional[str]):
+    """tiktoken encoding for `model`, or None (byte estimate) when tiktoken can't load one."""
+    if tiktoken is None:
+        return None
+    if model not in _ENCODINGS:
+        try:
+            _ENCODINGS[model] = tiktoken.encoding_for_model(model) if model \
+                else tiktoken.get_encoding("o200k_base")
+        except Exception:
+            try:
+                _ENCODINGS[model] = tiktoken.get_encoding("o200k_base")
+            except Exception:  # e.g. offline: the encoding file can't be downloaded
+                _ENCODINGS[model] = None
+    return _ENCODINGS[model]
+
+
+def count_tokens(text: str, model: Optional[str] = None) -> int:
+    """Exact token count with tiktoken when installed, otherwise ~4 bytes per token."""
+    encoding = _encoding(model)
+    if encoding is None:
+        return estimate_tokens(text)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def truncate_to_tokens(text: str, max_tokens: int, model: Optional[str] = None) -> str:
+    """Cut `text` to roughly `max_tokens`, marking the cut."""
+    if count_tokens(text, model) <= max_tokens:
+        return text
+    encoding = _encoding(model)
+    if encoding is not None:
+        return encoding.decode(encoding.encode(text, disallowed_special=())[:max_tokens]) + TRUNCATION_MARKER
+    return text.encode("utf-8")[:max_tokens * 4].decode("utf-8", "ignore") + TRUNCATION_MARKER
+
+
+def count_message_tokens(messages: list, model: Optional[str] = None) -> int:
+    """Prompt tokens of a chat payload, including per-message framing."""
+    return sum(count_tokens(m["content"], model) + MESSAGE_OVERHEAD_TOKENS for m in messages)
+
+
+def build_messages(system_prompt: str, history, user_text: str, context: Optional[str] = None) -> list:
+    """
+    Chat payload for one request: system prompt, history, optional context, then the new user turn.
+
+    Stable parts come first so consecutive requests share the longest possible
+    prefix (for the API's prompt cache); per-turn `context` goes last, just
+    before the user turn. `history` must not contain `user_text` yet; record
+    the exchange with `history.add()` once the reply is back so the utterance
+    is sent exactly once.
+    """
+    messages = [{"role": "system", "content": system_prompt}]
+    messages.extend(history.messages())
+    if context:
+        messages.append({"role": "system", "content": context})
+    messages.append({"role": "user", "content": user_text})
+    return messages
+
+
+def history_text(decision: dict) -> str:
+    """What an assistant turn keeps in history: the spoken reply, not the JSON envelope."""
+    mode = decision.get("mode")
+    if mode == "run":
+        return f"Ran: {decision.get('command', '')}"
+    if mode == "camera":
+        return f"Used the camera: {decision.get('action', '')}"
+    if mode == "memory":
+        detail = " ".join(filter(None, (decision.get("key"), decision.get("text"))))
+        return f"Memory {decision.get('action', '')}: {detail}".rstrip(": ")
+    return decision.get("say", "")
+
+
+class ConversationHistory:
+    """
+    Recent chat turns kept within a fixed token budget.
+
+    When the verbatim window goes over `token_budget` (or `max_messages`) the
+    oldest turns are evicted and handed to `summarizer(summary, messages)` on a
+    background thread, which returns the new rolling summary. `messages()` then
+    returns that summary followed by the verbatim window, so the request size
+    stays bounded however long the session runs. Without a summarizer evicted
+    turns are simply dropped.
+
+    With `evict_ratio` below 1, eviction trims the window down to that
+    fraction of the limits in one go instead of one turn at a time, so the
+    history prefix stays byte-identical for several turns (servers that reuse
+    a cached prompt prefix, like Ollama's KV cache, then only evaluate the
+    new turns).
+
+    With a `log_path` every turn and summary is appended to a JSON-lines log.
+    Nothing is read at construction: the latest window and summary are
+    restored on first use. When the log reaches `COMPACT_FACTOR` times
+    `max_messages` lines it is rewritten to hold just the current summary and
+    window.
+    """
+
+    def __init__(self, token_budget: int = DEFAULT_TOKEN_BUDGET,
+                 summarizer: Optional[Callable] = None,
+                 summary_tokens: int = DEFAULT_SUMMARY_TOKENS,
+                 max_messages: int = DEFAULT_MAX_MESSAGES,
+                 model: Optional[str] = None, log_path: Optional[str] = None,
+                 evict_ratio: float = 1.0):
+        self.token_budget = token_budget
+        self.summarizer = summarizer
+        self.summary_tokens = summary_tokens
+        self.max_messages = max_messages
+        self.model = model
+        self.evict_ratio = evict_ratio
+        self.summary = ""
+        self._turns: list = []   # {"role", "content", "timestamp", "tokens"}
+        self._tokens = 0
+        self._evicted: list = []  # Turns waiting to be folded into the summary
+        self._lock = threading.Lock()
+        self._worker: Optional[threading.Thread] = None
+        self.log_path = log_path
+        self._loaded = log_path is None
+        self._log_lines = 0
+
+    def __len__(self):
+        with self._lock:
+            self._ensure_loaded()
+            return len(self._turns)
+
+    @property
+    def tokens(self) -> int:
+        """Tokens of the verbatim window, including per-message framing."""
+        with self._lock:
+            self._ensure_loaded()
+            return self._tokens
+
+    # ---------- Persistence ----------
+    def _ensure_loaded(self) -> None:
+        """Restore summary + window from the log on first use (caller holds the lock)."""
+        if self._loaded:
+            return
+        self._loaded = True
+        try:
+            with open(self.log_path, "r", encoding="utf-8") as f:
+                lines = f.readlines()
+        except OSError:
+            return
+        restored = []
+        for line in lines:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # Torn line from a crash mid-append
+            if record.get("type") == "summary":
+                self.summary = record.get("content", "")
+            elif record.get("type") == "turn":
+                restored.append(record)
+        self._log_lines = len(lines)
+        # Turns evicted before the restart are already in the summary (or were dropped)
+        for record in restored:
+            content = record.get("content", "")
+            self._turns.append({"role": record.get("role"), "content": content,
+                                "timestamp": record.get("timestamp"),
+                                "tokens": count_tokens(content, self.model) + MESSAGE_OVERHEAD_TOKENS})
+            self._tokens += self._turns[-1]["tokens"]
+        summarizer, self.summarizer = self.summarizer, None
+        self._evict()
+        self.summarizer = summarizer
+
+    def _log(self, record: dict) -> None:
+        """Append one record, compacting when the log outgrows the window (caller holds the lock)."""
+        if self.log_path is None:
+            return
+        try:
+            with open(self.log_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n")
+            self._log_lines += 1
+        except OSError as e:
+            print(f"⚠️ Could not save conversation history: {e}")
+        if self._log_lines >= self.max_messages * COMPACT_FACTOR:
+            self._compact()
+
+    def _compact(self) -> None:
+        """Rewrite the log as the current summary + window (caller holds the lock)."""
+        records = [{"type": "summary", "content": self.summary}] if self.summary else []
+        records.extend({"type": "turn", "role": t["role"], "content": t["content"],
+                        "timestamp": t["timestamp"]} for t in self._turns)
+        tmp_path = f"{self.log_path}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                for record in records:
+                    f.write(json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n")
+            os.replace(tmp_path, self.log_path)
+            self._log_lines = len(records)
+        except OSError as e:
+            print(f"⚠️ Could not compact conversation history: {e}")
+
+    def add(self, role: str, content: str) -> None:
+        """Append a turn, evicting the oldest ones if the window is over budget."""
+        # A single turn may use at most half the budget, so one long reply can't flush everything else
+        content = truncate_to_tokens(content, self.token_budget // 2, self.model)
+        turn = {"role": role, "content": content, "timestamp": datetime.now().isoformat(),
+                "tokens": count_tokens(content, self.model) + MESSAGE_OVERHEAD_TOKENS}
+        with self._lock:
+            self._ensure_loaded()
+            self._turns.append(turn)
+            self._tokens += turn["tokens"]
+            self._evict()
+            self._log({"type": "turn", "role": role, "content": content, "timestamp": turn["timestamp"]})
+        self._start_summarizer()
+
+    def _evict(self) -> None:
+        """Move the oldest turns out of the window (caller holds the lock)."""
+        if self._tokens <= self.token_budget and len(self._turns) <= self.max_messages:
+            return
+        max_tokens = self.token_budget * self.evict_ratio
+        max_messages = self.max_messages * self.evict_ratio
+        while len(self._turns) > 1 and (self._tokens > max_tokens or len(self._turns) > max_messages):
+            turn = self._turns.pop(0)
+            self._tokens -= turn["tokens"]
+            if self.summarizer is not None:
+                self._evicted.append(turn)
+
+    def messages(self) -> list:
+        """Chat messages for the next request: rolling summary, then the verbatim window."""
+        with self._lock:
+            self._ensure_loaded()
+            out = [{"role": "system", "content": SUMMARY_PREFIX + self.summary}] if self.summary else []
+            out.extend({"role": t["role"], "content": t["content"]} for t in self._turns)
+            return out
+
+    def clear(self) -> None:
+        with self._lock:
+            self._loaded = True
+            self._turns = []
+            self._tokens = 0
+            self._evicted = []
+            self.summary = ""
+            if self.log_path is not None:
+                self._compact()
+
+    # ---------- Rolling summary ----------
+    def _start_summarizer(self) -> None:
+        with self._lock:
+            if not self._evicted or self._worker is not None:
+                return
+            self._worker = threading.Thread(target=self._summarize_pending, daemon=True)
+            self._worker.start()
+
+    def _summarize_pending(self) -> None:
+        """Fold evicted turns into the summary until none are left (background thread)."""
+        while True:
+            with self._lock:
+                batch, self._evicted = self._evicted, []
+                summary = self.summary
+                if not batch:
+                    self._worker = None
+                    return
+            try:
+                new_summary = self.summarizer(summary, [{"role": t["role"], "content": t["content"]}
+                                                        for t in batch])
+            except Exception as e:
+                print(f"⚠️ Could not summarize conversation history: {e}")
+                with self._lock:
+                    # Retry with the next eviction, but never hold more than one budget's worth
+                    self._evicted = batch + self._evicted
+                    while sum(t["tokens"] for t in self._evicted) > self.token_budget:
+                        self._evicted.pop(0)
+                    self._worker = None
+                return
+            with self._lock:
+                self.summary = truncate_to_tokens(new_summary.strip(), self.summary_tokens, self.model)
+                self._log({"type": "summary", "content": self.summary})
+
+    def wait(self, timeout: Optional[float] = None) -> None:
+        """Block until any running summarization finishes."""
+        worker = self._worker
+        if worker is not None:
+            worker.join(timeout)
@@ -0,0 +1,149 @@
+"""
+Fast Intent Module for MARVIN AI Assistant
+Answers routine requests (time, date, open the browser, list files...) locally without a GPT round trip
+"""
+
+import platform
+import re
+from typing import Optional
+
+try:
+    from rapidfuzz import fuzz, process
+except ImportError:  # Fall back to difflib when rapidfuzz isn't installed
+    fuzz = process = None
+    import difflib
+
+# ========== Configuration Constants ==========
+DEFAULT_THRESHOLD = 88  # Similarity (0-100) to the closest example needed to skip GPT
+DEFAULT_MARGIN = 8      # Required lead over the runner-up intent, so ambiguous requests go to GPT
+FILLER = re.compile(r"^(hey |ok |okay )?(marvin )?(can you |could you |please )*|( please| for me| marvin)+$")
+
+# Each intent: example utterances plus either a reply template or a shell command per OS.
+# Command intents also list required words: the utterance needs one word from every group
+# (verb and object), so near-misses like "open home" or "list filters" never reach the shell.
+INTENTS = {
+    "time": {
+        "examples": ["what time is it", "what's the time", "tell me the time", "what is the time now",
+                     "current time", "do you know what time it is"],
+        "reply": "It's {time}.",
+    },
+    "date": {
+        "examples": ["what's the date", "what is today's date", "what day is it today", "today's date",
+                     "what's the date today", "tell me the date", "what day is it"],
+        "reply": "Today is {date}.",
+    },
+    "greeting": {
+        "examples": ["hello", "hi", "hey", "hello marvin", "hi there", "good morning", "good evening"],
+        "reply": "{greeting} How can I help?",
+    },
+    "open_browser": {
+        "examples": ["open chrome", "open google chrome", "launch chrome", "open the browser",
+                     "open my browser", "start chrome", "open a browser"],
+        "require": [{"open", "launch", "start"}, {"chrome", "browser"}],
+        "commands": {
+            "Windows": "start chrome",
+            "Darwin": 'open -a "Google Chrome"',
+            "Linux": 'google-chrome || chromium || xdg-open "https://www.google.com"',
+        },
+    },
+    "list_directory": {
+        "examples": ["list files", "list the files", "list the files here", "show files", "show me the files",
+                     "what files are here", "list directory", "list this folder"],
+        "require": [{"list", "show", "what"}, {"files", "directory", "folder"}],
+        "commands": {"Windows": "dir", "Darwin": "ls -la", "Linux": "ls -la"},
+    },
+    "list_services": {
+        "examples": ["list services", "show services", "show running services", "list all services",
+                     "what services are running"],
+        "require": [{"list", "show", "what"}, {"services"}],
+        "commands": {
+            "Windows": "sc query type= service state= all",
+            "Darwin": "launchctl list",
+            "Linux": "systemctl list-units --type=service --all",
+        },
+    },
+    "disk_usage": {
+        "examples": ["show disk usage", "how much disk space is left", "disk space", "check disk usage",
+                     "how full is my disk"],
+        "require": [{"disk"}],
+        "commands": {
+            "Windows": "wmic logicaldisk get caption,freespace,size",
+            "Darwin": "df -h",
+            "Linux": "df -h",
+        },
+    },
+}
+
+
+def normalize(text: str) -> str:
+    """Lowercase, drop punctuation and polite filler ("hey marvin, could you ... please")."""
+    text = "".join(c if c.isalnum() or c in " '" else " " for c in str(text).lower())
+    text = " ".join(text.split())
+    return FILLER.sub("", text).strip()
+
+
+def _best_score(text: str, examples: list) -> float:
+    if process is not None:
+        match = process.extractOne(text, examples, scorer=fuzz.ratio)
+        return match[1] if match else 0.0
+    return max(difflib.SequenceMatcher(None, text, e).ratio() * 100 for e in examples)
+
+
+class FastIntentClassifier:
+    """
+    Fuzzy-matches an utterance against example phrases per intent.
+
+    Only a close match (>= `threshold`) that clearly beats every other intent
+    (by `margin`) is answered locally; anything else falls through to GPT.
+    Matching is whole-utterance, so "what time is it in Tokyo" is not "time",
+    and an intent's required words must all be present ("show devices" is
+    close to "show services" but never runs it).
+    """
+
+    def __init__(self, intents: dict = INTENTS, threshold: float = DEFAULT_THRESHOLD,
+                 margin: float = DEFAULT_MARGIN, system: Optional[str] = None):
+        self.intents = intents
+        self.threshold = threshold
+        self.margin = margin
+        self.system = system or platform.system()
+        self._examples = {name: [normalize(e) for e in spec["examples"]] for name, spec in intents.items()}
+
+    def _has_required_words(self, name: str, words: set) -> bool:
+        return all(words & group for group in self.intents[name].get("require", []))
+
+    def classify(self, text: str):
+        """Return (intent or None, score)."""
+        query = normalize(text)
+        if not query:
+            return None, 0.0
+        words = set(query.split())
+        scores = sorted(((_best_score(query, examples) if self._has_required_words(name, words) else 0.0, name)
+                         for name, examples in self._examples.items()), reverse=True)
+        best_score, best = scores[0]
+        runner_up = scores[1][0] if len(scores) > 1 else 0.0
+        if best_score >= self.threshold and best_score - runner_up >= self.margin:
+            return best, best_score
+        return None, best_score
+
+    def decide(self, text: str, values: Optional[dict] = None) -> Optional[dict]:
+        """
+        A run/chat decision for `text`, or None to ask GPT.
+
+        `values` maps template fields to callables (e.g. {"time": get_current_time}),
+        evaluated only when their template is used.
+        """
+        intent, _ = self.classify(text)
+        if intent is None:
+            return None
+        spec = self.intents[intent]
+        if "commands" in spec:
+            command = spec["commands"].get(self.system)
+            if not command:
+                return None
+            return {"mode": "run", "command": command, "say": "", "intent": intent}
+        fields = {key: fn() for key, fn in (values or {}).items() if "{" + key + "}" in spec["reply"]}
+        try:
+            say = spec["reply"].format(**fields)
+        except KeyError:
+            return None
+        return {"mode": "chat", "command": "", "say": say, "intent": intent}
@@ -0,0 +1,99 @@
+"""
+Health Module for MARVIN AI Assistant
+Background service health checks with a cached result that real requests keep up to date
+"""
+
+import threading
+import time
+from typing import Callable, Iterable, Optional
+
+# ========== Configuration Constants ==========
+DEFAULT_TTL = 300.0          # Seconds a healthy result is trusted before probing again
+DEFAULT_FAILURE_TTL = 15.0   # Failures expire sooner so a service that comes back is noticed
+
+
+class HealthCheck:
+    """
+    Cached health of one backend (OpenAI, Ollama...).
+
+    `start()` runs the probe on a daemon thread so startup never waits for a
+    network round trip; `status()` returns the cached result without blocking
+    (None while unknown or stale). Real requests call `record()` with their
+    outcome, so in normal use the first user request is the probe and no
+    extra calls are made.
+    """
+
+    def __init__(self, name: str, probe: Callable[[], object], ttl: float = DEFAULT_TTL,
+                 failure_ttl: float = DEFAULT_FAILURE_TTL):
+        self.name = name
+        self.probe = probe  # Raises (or returns False) when the service is unavailable
+        self.ttl = ttl
+        self.failure_ttl = failure_ttl
+        self.ok: Optional[bool] = None
+        self.error: Optional[str] = None
+        self.checked_at = 0.0
+        self.probes = 0
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+        self._done.set()
+        self._worker: Optional[threading.Thread] = None
+
+    def status(self) -> Optional[bool]:
+        """Cached result if still fresh, else None. Never blocks."""
+        with self._lock:
+            if self.ok is None:
+                return None
+            ttl = self.ttl if self.ok else self.failure_ttl
+            return self.ok if time.monotonic() - self.checked_at < ttl else None
+
+    def record(self, ok: bool, error: Optional[object] = None) -> None:
+        """Store the outcome of a probe or of a real request."""
+        with self._lock:
+            self.ok = bool(ok)
+            self.error = None if ok else (str(error) if error is not None else "unavailable")
+            self.checked_at = time.monotonic()
+
+    def _run(self, on_result: Optional[Callable]) -> None:
+        try:
+            ok, error = self.probe() is not False, None
+        except Exception as e:
+            ok, error = False, e
+        self.record(ok, error)
+        with self._lock:
+            self._worker = None
+            self._done.set()
+        if on_result:
+            on_result(self)
+
+    def start(self, on_result: Optional[Callable[["HealthCheck"], None]] = None) -> bool:
+        """Probe in the background unless a fresh result is cached or a probe is running. Returns whether one started."""
+        if self.status() is not None:
+            return False
+        with self._lock:
+            if self._worker is not None:
+                return False
+            self.probes += 1
+            self._done.clear()
+            self._worker = threading.Thread(target=self._run, args=(on_result,),
+                                            name=f"health-{self.name}", daemon=True)
+            self._worker.start()
+        return True
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until a running probe finishes. Returns False on timeout."""
+        return self._done.wait(timeout)
+
+    def check(self, timeout: Optional[float] = None) -> Optional[bool]:
+        """Cached result, probing (and waiting up to `timeout`) only when it is stale."""
+        cached = self.status()
+        if cached is not None:
+            return cached
+        self.start()
+        self.wait(timeout)
+        return self.status()
+
+
+def start_all(checks: Iterable[HealthCheck], on_result: Optional[Callable[[HealthCheck], None]] = None) -> None:
+    """Start every check concurrently; each reports through `on_result` when it finishes."""
+    for check in checks:
+        check.start(on_result)
@@ -0,0 +1,135 @@
+"""
+Intent Tools Module for MARVIN AI Assistant
+Tool-calling schema for the GPT router: chat replies come back as plain text, actions as typed tool calls
+"""
+
+import json
+from typing import Callable, Optional
+
+# ========== Configuration Constants ==========
+CAMERA_ACTIONS = ["open", "compare", "snapshot", "describe", "analyze_expression"]
+MEMORY_ACTIONS = ["remember_fact", "remember_note", "set_preference", "recall_facts", "recall_notes", "search"]
+
+TOOLS = [
+    {
+        "type": "function",
+        "function": {
+            "name": "run_command",
+            "description": "Run one shell command on the user's computer for an OS action (open an app, "
+                           "list files or services, run a script). It must be correct for the user's OS.",
+            "strict": True,
+            "parameters": {
+                "type": "object",
+                "properties": {"command": {"type": "string"}},
+                "required": ["command"],
+                "additionalProperties": False,
+            },
+        },
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "camera",
+            "description": "Use the webcam: open the live view, compare two cameras, take a snapshot, "
+                           "describe the scene, or analyze the user's facial expression.",
+            "strict": True,
+            "parameters": {
+                "type": "object",
+                "properties": {"action": {"type": "string", "enum": CAMERA_ACTIONS}},
+                "required": ["action"],
+                "additionalProperties": False,
+            },
+        },
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "memory",
+            "description": "Store or recall things about the user in long-term memory.",
+            "strict": True,
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "action": {"type": "string", "enum": MEMORY_ACTIONS},
+                    "text": {"type": "string",
+                             "description": "Fact, note, preference value or search topic; empty to list recent"},
+                    "key": {"type": "string", "description": "Preference name for set_preference, else empty"},
+                },
+                "required": ["action", "text", "key"],
+                "additionalProperties": False,
+            },
+        },
+    },
+]
+
+TOOLS_GUIDANCE = """Reply to conversational requests directly in plain text, in the user's language.
+Your reply is spoken aloud, so no markdown, lists or code blocks.
+For actions call the tools: run_command for OS actions, camera for the webcam, memory to store or
+recall things about the user. Call several tools at once when the request needs more than one action.
+"""
+
+
+def _action(name: str, args: dict) -> Optional[dict]:
+    """Turn one tool call into a decision dict, or None if its arguments don't fit the schema."""
+    if name == "run_command" and isinstance(args.get("command"), str) and args["command"].strip():
+        return {"mode": "run", "command": args["command"].strip(), "say": ""}
+    if name == "camera" and args.get("action") in CAMERA_ACTIONS:
+        return {"mode": "camera", "action": args["action"], "command": "", "say": ""}
+    if name == "memory" and args.get("action") in MEMORY_ACTIONS:
+        return {"mode": "memory", "action": args["action"], "text": str(args.get("text") or "").strip(),
+                "key": str(args.get("key") or "").strip(), "command": "", "say": ""}
+    return None
+
+
+class ToolCallCollector:
+    """
+    Collects tool calls from a chat completion, whole or streamed.
+
+    Streamed tool calls arrive as fragments keyed by index; `wrap()` yields the
+    text deltas (the spoken reply) while assembling the calls on the side.
+    """
+
+    def __init__(self):
+        self._calls: dict = {}  # index -> {"name": str, "arguments": [str]}
+
+    def add_message(self, tool_calls) -> None:
+        for index, call in enumerate(tool_calls or []):
+            self._calls[index] = {"name": call.function.name, "arguments": [call.function.arguments or ""]}
+
+    def add_delta(self, tool_calls) -> None:
+        for call in tool_calls or []:
+            entry = self._calls.setdefault(call.index, {"name": "", "arguments": []})
+            function = call.function
+            if function is not None:
+                entry["name"] += function.name or ""
+                entry["arguments"].append(function.arguments or "")
+
+    def wrap(self, stream, usage_sink: Optional[Callable] = None):
+        """Yield content deltas of a streamed completion, collecting tool-call fragments."""
+        for chunk in stream:
+            if getattr(chunk, "usage", None) is not None and usage_sink is not None:
+                usage_sink(chunk.usage)
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta
+            self.add_delta(getattr(delta, "tool_calls", None))
+            if delta.content:
+                yield delta.content
+
+    def actions(self, content: str, spoken: bool = False) -> list:
+        """Decisions in order: the tool calls, preceded by the text reply if there is one."""
+        actions = []
+        if content.strip():
+            actions.append({"mode": "chat", "command": "", "say": content.strip(), "spoken": spoken})
+        for index in sorted(self._calls):
+            call = self._calls[index]
+            try:
+                args = json.loads("".join(call["arguments"]) or "{}")
+            except ValueError:
+                args = {}
+            action = _action(call["name"], args if isinstance(args, dict) else {})
+            if action is None:
+                print(f"⚠️ Ignoring malformed tool call: {call['name']}")
+                continue
+            actions.append(action)
+        return actions
@@ -0,0 +1,352 @@
+"""
+LLM Backends Module for MARVIN AI Assistant
+One interface over OpenAI and Ollama (sync, async, streaming) with latency-driven routing between them
+"""
+
+import asyncio
+import threading
+import time
+from collections import deque
+from typing import Callable, Iterator, Optional
+
+from llm_client import get_async_client, get_client
+from ollama_client import OllamaClient
+from speculative import Cancelled, cancellable
+from speech_stream import stream_say
+
+# ========== Configuration Constants ==========
+DEFAULT_WINDOW = 20          # Recent calls per backend kept for latency percentiles
+DEFAULT_SLO_MS = 2500        # Time to first token the preferred backend has to meet
+DEFAULT_RETRY_AFTER = 60.0   # Seconds before a demoted backend is tried first again
+
+
+class BackendError(Exception):
+    """Every candidate backend failed; the last error is chained as __cause__."""
+
+
+class LatencyMetrics:
+    """Time-to-first-token and total latency of a backend's recent calls, plus error counts."""
+
+    def __init__(self, window: int = DEFAULT_WINDOW):
+        self.calls = 0
+        self.errors = 0
+        self.last_error: Optional[str] = None
+        self._samples = deque(maxlen=window)  # (finished_at, ttft_ms, total_ms, ok)
+        self._lock = threading.Lock()
+
+    def record(self, ttft: float, total: float, ok: bool = True, error: Optional[object] = None) -> None:
+        """Record one call (`ttft` and `total` in seconds)."""
+        with self._lock:
+            self.calls += 1
+            if not ok:
+                self.errors += 1
+                self.last_error = str(error) if error is not None else "failed"
+            self._samples.append((time.monotonic(), ttft * 1000, total * 1000, ok))
+
+    def samples(self, since: float = 0.0) -> list:
+        with self._lock:
+            return [s for s in self._samples if s[0] >= since]
+
+    def percentile(self, p: float, field: str = "ttft", since: float = 0.0) -> Optional[float]:
+        """p-th percentile (ms) of successful calls finished after `since` (monotonic), or None."""
+        index = 1 if field == "ttft" else 2
+        values = sorted(s[index] for s in self.samples(since) if s[3])
+        if not values:
+            return None
+        return values[min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))]
+
+    def last_failed(self, since: float = 0.0) -> bool:
+        samples = self.samples(since)
+        return bool(samples) and not samples[-1][3]
+
+    def summary(self) -> dict:
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "p50_ttft_ms": self.percentile(50),
+            "p95_ttft_ms": self.percentile(95),
+            "p50_total_ms": self.percentile(50, "total"),
+        }
+
+
+class LLMBackend:
+    """
+    Base class: subclasses implement `_stream()` (and may override `acomplete()`).
+
+    `stream()` yields reply text as it is generated and times every call into
+    `metrics`; `complete()` returns the whole reply, passing finished sentences
+    (of the JSON string `field`, if given) to `on_sentence` on the way. Common
+    options: `max_tokens`, `temperature` and `json_mode` (reply with a JSON object).
+    Setting the `cancel` event stops the stream and raises Cancelled.
+    """
+
+    name = "llm"
+    supports_tools = False  # Whether the `tools` option (function calling) is understood
+
+    def __init__(self, health=None):
+        self.metrics = LatencyMetrics()
+        self.health = health  # Optional HealthCheck kept current by real calls
+
+    def _stream(self, messages: list, **options) -> Iterator[str]:
+        raise NotImplementedError
+
+    def _record(self, start: float, first: Optional[float], ok: bool, error: Optional[object] = None) -> None:
+        end = time.perf_counter()
+        self.metrics.record((first or end) - start, end - start, ok, error)
+        if self.health is not None:
+            self.health.record(ok, error)
+
+    def stream(self, messages: list, cancel: Optional[threading.Event] = None, **options) -> Iterator[str]:
+        start = time.perf_counter()
+        first = None
+        chunks = self._stream(messages, **options)
+        try:
+            for chunk in cancellable(chunks, cancel):
+                if first is None:
+                    first = time.perf_counter()
+                yield chunk
+        except (GeneratorExit, Cancelled):  # Consumer stopped reading; not the backend's fault
+            self._record(start, first, True)
+            raise
+        except Exception as e:
+            self._record(start, first, False, e)
+            raise
+        finally:
+            close = getattr(chunks, "close", None)
+            if close is not None:
+                close()  # Release the HTTP stream now rather than when it is garbage-collected
+        self._record(start, first, True)
+
+    def complete(self, messages: list, on_sentence: Optional[Callable[[str], None]] = None,
+                 field: Optional[str] = None, **options) -> str:
+        chunks = self.stream(messages, **options)
+        if on_sentence is None:
+            return "".join(chunks).strip()
+        return stream_say(chunks, on_sentence, field=field).strip()
+
+    async def acomplete(self, messages: list, **options) -> str:
+        """Async completion; by default the sync call on a worker thread."""
+        return await asyncio.to_thread(self.complete, messages, **options)
+
+
+class OpenAIBackend(LLMBackend):
+    """
+    Chat completions on the shared pooled OpenAI clients (see llm_client).
+
+    Extra options: `tools` (function definitions), `on_tool_calls` (receives
+    each streamed batch of tool-call fragments) and `on_usage` (receives the
+    request's token usage).
+    """
+
+    name = "openai"
+    supports_tools = True
+
+    def __init__(self, model: str = "gpt-4o-mini", api_key: Optional[str] = None,
+                 base_url: Optional[str] = None, health=None):
+        super().__init__(health)
+        self.model = model
+        self.api_key = api_key
+        self.base_url = base_url
+
+    def _params(self, messages: list, options: dict) -> dict:
+        params = {"model": self.model, "messages": messages}
+        if options.get("max_tokens") is not None:
+            params["max_tokens"] = options["max_tokens"]
+        if options.get("temperature") is not None:
+            params["temperature"] = options["temperature"]
+        if options.get("json_mode"):
+            params["response_format"] = {"type": "json_object"}
+        if options.get("tools"):
+            params["tools"] = options["tools"]
+        return params
+
+    def _stream(self, messages: list, **options) -> Iterator[str]:
+        on_usage = options.get("on_usage")
+        on_tool_calls = options.get("on_tool_calls")
+        stream = get_client(self.api_key, self.base_url).chat.completions.create(
+            stream=True, stream_options={"include_usage": True}, **self._params(messages, options))
+        try:
+            for chunk in stream:
+                if getattr(chunk, "usage", None) is not None and on_usage is not None:
+                    on_usage(chunk.usage)
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta
+                if on_tool_calls is not None and getattr(delta, "tool_calls", None):
+                    on_tool_calls(delta.tool_calls)
+                if delta.content:
+                    yield delta.content
+        finally:
+            stream.close()
+
+    async def acomplete(self, messages: list, **options) -> str:
+        start = time.perf_counter()
+        try:
+            resp = await get_async_client(self.api_key, self.base_url).chat.completions.create(
+                **self._params(messages, options))
+        except Exception as e:
+            self._record(start, None, False, e)
+            raise
+        self._record(start, None, True)
+        if options.get("on_usage") is not None and resp.usage is not None:
+            options["on_usage"](resp.usage)
+        return (resp.choices[0].message.content or "").strip()
+
+
+class OllamaBackend(LLMBackend):
+    """Ollama /api/chat through a streaming OllamaClient (keep-alive session, model pinned)."""
+
+    name = "ollama"
+
+    def __init__(self, client: OllamaClient, health=None):
+        super().__init__(health)
+        self.client = client
+
+    def _stream(self, messages: list, **options) -> Iterator[str]:
+        model_options = {}
+        if options.get("max_tokens") is not None:
+            model_options["num_predict"] = options["max_tokens"]
+        if options.get("temperature") is not None:
+            model_options["temperature"] = options["temperature"]
+        return self.client.stream_chat(messages, model_options or None,
+                                       format="json" if options.get("json_mode") else None)
+
+
+# ========== Routing Policies ==========
+class RoutingPolicy:
+    """Decides which backends to try for a task ("intent", "chat"...), in order."""
+
+    def candidates(self, task: str) -> list:
+        raise NotImplementedError
+
+    def backends(self) -> list:
+        """Every backend this policy can route to."""
+        raise NotImplementedError
+
+
+class SingleBackend(RoutingPolicy):
+    def __init__(self, backend: LLMBackend):
+        self.backend = backend
+
+    def candidates(self, task: str) -> list:
+        return [self.backend]
+
+    def backends(self) -> list:
+        return [self.backend]
+
+
+class LocalFirst(RoutingPolicy):
+    """
+    Local backend first, cloud as fallback.
+
+    When the local backend's median time to first token since it was last
+    promoted goes over `slo_ms` (or its last call failed) it is demoted: the
+    cloud goes first for `retry_after` seconds, then local gets another try.
+    """
+
+    def __init__(self, local: LLMBackend, cloud: LLMBackend, slo_ms: float = DEFAULT_SLO_MS,
+                 retry_after: float = DEFAULT_RETRY_AFTER):
+        self.local = local
+        self.cloud = cloud
+        self.slo_ms = slo_ms
+        self.retry_after = retry_after
+        self._promoted_at = 0.0
+        self._demoted_until: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def local_preferred(self) -> bool:
+        with self._lock:
+            now = time.monotonic()
+            if self._demoted_until is not None:
+                if now < self._demoted_until:
+                    return False
+                self._demoted_until = None
+                self._promoted_at = now  # Judge it only on calls made after this retry
+                return True
+            median = self.local.metrics.percentile(50, since=self._promoted_at)
+            if self.local.metrics.last_failed(self._promoted_at) or (median is not None and median > self.slo_ms):
+                self._demoted_until = now + self.retry_after
+                print(f"⚠️ {self.local.name} is over its {self.slo_ms:.0f} ms SLO; "
+                      f"using {self.cloud.name} for {self.retry_after:g} s")
+                return False
+            return True
+
+    def candidates(self, task: str) -> list:
+        return [self.local, self.cloud] if self.local_preferred() else [self.cloud, self.local]
+
+    def backends(self) -> list:
+        return [self.local, self.cloud]
+
+
+class TaskSplit(RoutingPolicy):
+    """Per-task backends (e.g. a cheap local model for intents, the cloud for long-form chat); others as fallback."""
+
+    def __init__(self, routes: dict, default: LLMBackend):
+        self.routes = routes
+        self.default = default
+
+    def candidates(self, task: str) -> list:
+        first = self.routes.get(task, self.default)
+        return [first] + [b for b in self.backends() if b is not first]
+
+    def backends(self) -> list:
+        unique = []
+        for backend in [self.default, *self.routes.values()]:
+            if backend not in unique:
+                unique.append(backend)
+        return unique
+
+
+class LLMRouter:
+    """
+    Sends each request to the first backend the policy picks, falling back to the next on failure.
+
+    Requests with `tools` only go to backends that support function calling.
+    """
+
+    def __init__(self, policy: RoutingPolicy):
+        self.policy = policy
+        self.last_backend: Optional[LLMBackend] = None
+
+    def _candidates(self, task: str, options: dict) -> list:
+        candidates = self.policy.candidates(task)
+        if options.get("tools"):
+            candidates = [b for b in candidates if b.supports_tools]
+        return candidates
+
+    def complete(self, messages: list, task: str = "chat", on_sentence: Optional[Callable[[str], None]] = None,
+                 field: Optional[str] = None, **options) -> str:
+        error = None
+        for backend in self._candidates(task, options):
+            spoken = []
+            def speak_sentence(sentence):
+                spoken.append(sentence)
+                on_sentence(sentence)
+            try:
+                reply = backend.complete(messages, speak_sentence if on_sentence else None, field, **options)
+                self.last_backend = backend
+                return reply
+            except Cancelled:
+                raise
+            except Exception as e:
+                error = e
+                if spoken:
+                    break  # Part of the reply was already spoken; another backend would start over
+                print(f"⚠️ {backend.name} failed ({e}), trying the next backend")
+        raise BackendError(f"no backend could answer the {task} request: {error}") from error
+
+    async def acomplete(self, messages: list, task: str = "chat", **options) -> str:
+        error = None
+        for backend in self._candidates(task, options):
+            try:
+                reply = await backend.acomplete(messages, **options)
+                self.last_backend = backend
+                return reply
+            except Exception as e:
+                error = e
+                print(f"⚠️ {backend.name} failed ({e}), trying the next backend")
+        raise BackendError(f"no backend could answer the {task} request: {error}") from error
+
+    def stats(self) -> dict:
+        """Latency summary per backend."""
+        return {backend.name: backend.metrics.summary() for backend in self.policy.backends()}
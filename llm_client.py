@@ -0,0 +1,93 @@
+"""
+LLM Client Module for MARVIN AI Assistant
+Shared OpenAI clients on a persistent connection pool with explicit timeouts and retries
+"""
+
+import os
+import threading
+from typing import Optional
+
+import httpx
+import openai
+
+try:
+    import h2  # noqa: F401  (enables HTTP/2 in httpx)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# ========== Configuration Constants ==========
+CONNECT_TIMEOUT = 5.0    # Seconds to establish a connection (DNS + TCP + TLS)
+READ_TIMEOUT = 30.0      # Max silence between bytes, so a stalled response can't hang the loop
+WRITE_TIMEOUT = 10.0
+POOL_TIMEOUT = 5.0       # Max wait for a free pooled connection
+MAX_CONNECTIONS = 20
+MAX_KEEPALIVE = 10
+KEEPALIVE_EXPIRY = 120.0  # Keep idle connections (and their TLS sessions) between turns
+MAX_RETRIES = 3           # 408/409/429/5xx and connection errors, exponential backoff with jitter
+
+_lock = threading.Lock()
+_clients: dict = {}
+
+
+def _timeout() -> httpx.Timeout:
+    return httpx.Timeout(connect=CONNECT_TIMEOUT, read=READ_TIMEOUT, write=WRITE_TIMEOUT, pool=POOL_TIMEOUT)
+
+
+def _limits() -> httpx.Limits:
+    return httpx.Limits(max_connections=MAX_CONNECTIONS, max_keepalive_connections=MAX_KEEPALIVE,
+                        keepalive_expiry=KEEPALIVE_EXPIRY)
+
+
+def _api_key(api_key: Optional[str]) -> Optional[str]:
+    return api_key or openai.api_key or os.getenv("OPENAI_API_KEY")
+
+
+def get_client(api_key: Optional[str] = None, base_url: Optional[str] = None) -> openai.OpenAI:
+    """
+    The process-wide OpenAI client for this key/base URL, created on first use.
+
+    Requests share one keep-alive connection pool (HTTP/2 when `h2` is
+    installed), so only the first call pays DNS/TCP/TLS setup. The SDK retries
+    429/5xx and connection errors with jittered exponential backoff (honouring
+    Retry-After) up to MAX_RETRIES times.
+    """
+    key = ("sync", _api_key(api_key), base_url or os.getenv("OPENAI_BASE_URL"))
+    with _lock:
+        client = _clients.get(key)
+        if client is None:
+            client = openai.OpenAI(
+                api_key=key[1],
+                base_url=key[2],
+                timeout=_timeout(),
+                max_retries=MAX_RETRIES,
+                http_client=httpx.Client(http2=HTTP2_AVAILABLE, limits=_limits(), timeout=_timeout()),
+            )
+            _clients[key] = client
+        return client
+
+
+def get_async_client(api_key: Optional[str] = None, base_url: Optional[str] = None) -> openai.AsyncOpenAI:
+    """Async counterpart of get_client(), with its own pool (use it from one event loop)."""
+    key = ("async", _api_key(api_key), base_url or os.getenv("OPENAI_BASE_URL"))
+    with _lock:
+        client = _clients.get(key)
+        if client is None:
+            client = openai.AsyncOpenAI(
+                api_key=key[1],
+                base_url=key[2],
+                timeout=_timeout(),
+                max_retries=MAX_RETRIES,
+                http_client=httpx.AsyncClient(http2=HTTP2_AVAILABLE, limits=_limits(), timeout=_timeout()),
+            )
+            _clients[key] = client
+        return client
+
+
+def close_clients() -> None:
+    """Close the sync pools (async clients are closed with `await client.close()`)."""
+    with _lock:
+        for key, client in list(_clients.items()):
+            if key[0] == "sync":
+                client.close()
+                del _clients[key]
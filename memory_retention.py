@@ -0,0 +1,168 @@
+"""
+Memory Retention Module for MARVIN AI Assistant
+Caps the hot memory tier by count and age, drops near-duplicate facts and archives the rest
+"""
+
+import gzip
+import io
+import json
+import os
+from datetime import datetime, timedelta
+from typing import Optional
+
+try:
+    from rapidfuzz import fuzz, process
+except ImportError:  # Fall back to difflib when rapidfuzz isn't installed
+    fuzz = process = None
+    import difflib
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# ========== Configuration Constants ==========
+DEFAULT_MAX_ENTRIES = 2000  # Per kind (facts, notes) kept in the hot tier
+DEFAULT_MAX_AGE_DAYS = 365
+DEFAULT_DEDUPE_RATIO = 95   # rapidfuzz ratio (0-100) above which two facts count as the same
+RETENTION_SLACK = 0.1       # Let the hot tier overshoot by 10% before pruning, so pruning is rare
+
+
+def _is_duplicate(content: str, kept: list, ratio: float) -> bool:
+    """Whether `content` is at least `ratio` (0-100) similar to any kept entry."""
+    if process is not None:
+        return process.extractOne(content, kept, scorer=fuzz.ratio, score_cutoff=ratio) is not None
+    for other in kept:
+        matcher = difflib.SequenceMatcher(None, content, other)
+        if matcher.quick_ratio() * 100 >= ratio and matcher.ratio() * 100 >= ratio:
+            return True
+    return False
+
+
+def _parse_timestamp(value) -> Optional[datetime]:
+    try:
+        parsed = datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
+    # Compare everything as naive local time, like the timestamps MARVIN writes
+    return parsed.astimezone().replace(tzinfo=None) if parsed.tzinfo else parsed
+
+
+class RetentionPolicy:
+    """
+    How much memory stays in the hot tier.
+
+    Args:
+        max_entries (int): Facts (and, separately, notes) kept hot; oldest beyond this are archived.
+        max_age_days (float): Entries older than this are archived. None disables.
+        dedupe_ratio (float): Near-identical facts/notes (rapidfuzz ratio >= this) keep only
+                              the newest copy. None disables.
+    """
+
+    def __init__(self, max_entries: Optional[int] = DEFAULT_MAX_ENTRIES,
+                 max_age_days: Optional[float] = DEFAULT_MAX_AGE_DAYS,
+                 dedupe_ratio: Optional[float] = DEFAULT_DEDUPE_RATIO):
+        self.max_entries = max_entries
+        self.max_age_days = max_age_days
+        self.dedupe_ratio = dedupe_ratio
+
+    def is_over_limit(self, data: dict, now: Optional[datetime] = None) -> bool:
+        """Cheap check (counts + oldest timestamp) for whether a pruning pass is due."""
+        now = now or datetime.now()
+        for key in ("facts", "notes"):
+            entries = data.get(key, [])
+            if self.max_entries is not None and len(entries) > self.max_entries * (1 + RETENTION_SLACK):
+                return True
+            if self.max_age_days is not None and entries:
+                oldest = _parse_timestamp(entries[0].get("timestamp"))
+                if oldest and now - oldest > timedelta(days=self.max_age_days):
+                    return True
+        return False
+
+    def split(self, entries: list, now: Optional[datetime] = None):
+        """
+        Partition chronological entries into (keep, archive, duplicates).
+
+        Duplicates are dropped outright; archived entries go to the cold tier.
+        """
+        now = now or datetime.now()
+        cutoff = now - timedelta(days=self.max_age_days) if self.max_age_days is not None else None
+        keep, archive, duplicates = [], [], []
+        kept_contents = []
+        # Walk newest first so the newest copy of a duplicate survives
+        for entry in reversed(entries):
+            content = str(entry.get("content", "")).strip().lower()
+            if self.dedupe_ratio is not None and kept_contents \
+                    and _is_duplicate(content, kept_contents, self.dedupe_ratio):
+                duplicates.append(entry)
+                continue
+            timestamp = _parse_timestamp(entry.get("timestamp"))
+            too_old = cutoff is not None and timestamp is not None and timestamp < cutoff
+            too_many = self.max_entries is not None and len(keep) >= self.max_entries
+            if too_old or too_many:
+                archive.append(entry)
+                continue
+            keep.append(entry)
+            kept_contents.append(content)
+        keep.reverse()
+        archive.reverse()
+        return keep, archive, duplicates
+
+
+class ColdArchive:
+    """
+    Compressed JSON-lines archive of evicted memories (gzip, or zstd for `.zst` paths).
+
+    Appends add a new compressed member/frame, so the file is never rewritten.
+    It is only opened when the user explicitly asks to recall older memories.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        if path.endswith(".zst") and zstandard is None:
+            raise ImportError("zstandard is required for .zst archives (pip install zstandard)")
+
+    def append(self, kind: str, entries: list) -> None:
+        if not entries:
+            return
+        payload = "".join(json.dumps(dict(e, kind=kind), ensure_ascii=False) + "\n"
+                          for e in entries).encode("utf-8")
+        if self.path.endswith(".zst"):
+            with open(self.path, "ab") as f:
+                f.write(zstandard.ZstdCompressor().compress(payload))
+        else:
+            with gzip.open(self.path, "ab") as f:
+                f.write(payload)
+
+    def _open(self):
+        if self.path.endswith(".zst"):
+            raw = open(self.path, "rb")
+            reader = zstandard.ZstdDecompressor().stream_reader(raw, read_across_frames=True,
+                                                                closefd=True)
+            return io.TextIOWrapper(reader, encoding="utf-8")
+        return gzip.open(self.path, "rt", encoding="utf-8")
+
+    def iter_entries(self):
+        if not os.path.exists(self.path):
+            return
+        with self._open() as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+
+    def search(self, query: str, limit: int = 5) -> list:
+        """Find archived facts and notes sharing words with `query`, best matches first."""
+        terms = set("".join(c if c.isalnum() else " " for c in query.lower()).split())
+        if not terms:
+            return []
+        scored = []
+        for entry in self.iter_entries():
+            words = set("".join(c if c.isalnum() else " "
+                                for c in entry.get("content", "").lower()).split())
+            hits = len(terms & words)
+            if hits:
+                scored.append((hits, entry.get("timestamp", ""), entry))
+        scored.sort(key=lambda s: (s[0], s[1]), reverse=True)
+        return [entry for _, _, entry in scored[:limit]]
@@ -0,0 +1,206 @@
+"""
+Memory Retrieval Module for MARVIN AI Assistant
+Ranks stored facts, notes and preferences against the user's request (BM25 + fuzzy term matching)
+"""
+
+import math
+import threading
+from collections import Counter, defaultdict
+from typing import Optional
+
+try:
+    from rapidfuzz import fuzz, process
+except ImportError:  # Fall back to difflib when rapidfuzz isn't installed
+    fuzz = process = None
+    import difflib
+
+# ========== Configuration Constants ==========
+BM25_K1 = 1.5
+BM25_B = 0.75
+FUZZY_CUTOFF = 85        # rapidfuzz ratio (0-100) for a misheard term to count as a match
+FUZZY_WEIGHT = 0.5       # Score multiplier for fuzzy (non-exact) term matches
+DEFAULT_TOP_K = 5
+DEFAULT_TOKEN_BUDGET = 150  # Max tokens of memory injected into the system prompt
+VECTOR_MIN_SIMILARITY = 0.3  # Cosine floor for semantic hits to be considered at all
+RRF_K = 60                   # Reciprocal-rank-fusion constant for merging keyword + semantic ranks
+
+STOPWORDS = frozenset(
+    "a an and are as at be but by can do does for from has have how i if in is it me my "
+    "of on or so that the this to was what when where which who why will with you your".split()
+)
+
+
+def tokenize(text: str) -> list:
+    """Lowercase alphanumeric terms without stopwords."""
+    words = "".join(c if c.isalnum() else " " for c in str(text).lower()).split()
+    return [w for w in words if w not in STOPWORDS]
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 bytes per token) used for prompt budgeting."""
+    return len(text.encode("utf-8")) // 4 + 1
+
+
+class BM25Index:
+    """Inverted index with Okapi BM25 scoring and incremental add/remove."""
+
+    def __init__(self, k1: float = BM25_K1, b: float = BM25_B):
+        self.k1 = k1
+        self.b = b
+        self.postings = defaultdict(dict)  # term -> {doc_id: term frequency}
+        self.doc_lengths = {}
+        self.doc_terms = {}  # doc_id -> distinct terms, so remove() only touches its postings
+        self.docs = {}
+        self._total_length = 0
+
+    def __len__(self):
+        return len(self.docs)
+
+    def add(self, doc_id, text: str, payload=None) -> None:
+        if doc_id in self.docs:
+            self.remove(doc_id)
+        terms = tokenize(text)
+        counts = Counter(terms)
+        for term, tf in counts.items():
+            self.postings[term][doc_id] = tf
+        self.doc_terms[doc_id] = tuple(counts)
+        self.doc_lengths[doc_id] = len(terms)
+        self.docs[doc_id] = payload if payload is not None else text
+        self._total_length += len(terms)
+
+    def remove(self, doc_id) -> None:
+        if doc_id not in self.docs:
+            return
+        for term in self.doc_terms.pop(doc_id):
+            postings = self.postings[term]
+            postings.pop(doc_id, None)
+            if not postings:
+                del self.postings[term]
+        self._total_length -= self.doc_lengths.pop(doc_id)
+        del self.docs[doc_id]
+
+    def _expand(self, term: str) -> list:
+        """Return (vocabulary term, weight) pairs for a query term, adding fuzzy matches."""
+        if term in self.postings:
+            return [(term, 1.0)]
+        if len(term) < 4:
+            return []
+        if process is not None:
+            matches = process.extract(term, list(self.postings), scorer=fuzz.ratio,
+                                      score_cutoff=FUZZY_CUTOFF, limit=3)
+            return [(match, FUZZY_WEIGHT) for match, _, _ in matches]
+        matches = difflib.get_close_matches(term, self.postings.keys(), n=3,
+                                            cutoff=FUZZY_CUTOFF / 100)
+        return [(match, FUZZY_WEIGHT) for match in matches]
+
+    def search(self, query: str, limit: int = DEFAULT_TOP_K) -> list:
+        """Return [(score, doc_id)] best first."""
+        n = len(self.docs)
+        if not n:
+            return []
+        avg_len = self._total_length / n or 1
+        scores = defaultdict(float)
+        for term in set(tokenize(query)):
+            for vocab_term, weight in self._expand(term):
+                postings = self.postings[vocab_term]
+                idf = math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+                for doc_id, tf in postings.items():
+                    norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[doc_id] / avg_len)
+                    scores[doc_id] += weight * idf * tf * (self.k1 + 1) / (tf + norm)
+        ranked = sorted(((score, doc_id) for doc_id, score in scores.items()),
+                        key=lambda pair: pair[0], reverse=True)
+        return ranked[:limit]
+
+
+class MemoryRetriever:
+    """
+    Keeps a BM25 index in step with a memory store and picks the memories worth
+    sending to GPT for the current request.
+
+    New facts/notes are indexed incrementally (keyed on `store.version`); the
+    index is rebuilt only when `store.generation` says entries were removed.
+    With an optional `vectors` index (memory_vectors.VectorMemory) keyword and
+    semantic rankings are merged with reciprocal rank fusion.
+    """
+
+    def __init__(self, store, top_k: int = DEFAULT_TOP_K, token_budget: int = DEFAULT_TOKEN_BUDGET,
+                 vectors=None):
+        self.store = store
+        self.vectors = vectors
+        self.top_k = top_k
+        self.token_budget = token_budget
+        self.index = BM25Index()
+        self._lock = threading.Lock()
+        self._version = None
+        self._generation = None
+        self._counts = {"fact": 0, "note": 0}
+
+    def _sync(self) -> None:
+        """Index anything added to the store since the last call (caller holds the lock)."""
+        # Read the counters first: a write racing with this sync only causes a harmless re-sync
+        version, generation = self.store.version, self.store.generation
+        if self._version == version and self._generation == generation:
+            return
+        if self._generation != generation:
+            self.index = BM25Index()
+            self._counts = {"fact": 0, "note": 0}
+        for kind in ("fact", "note"):
+            for entry in self.store.entries(kind, self._counts[kind]):
+                doc_id = (kind, self._counts[kind])
+                self.index.add(doc_id, entry.get("content", ""), dict(entry, kind=kind))
+                self._counts[kind] += 1
+        # Preferences are few and overwritten in place: re-add them all
+        for doc_id in [d for d in self.index.docs if d[0] == "pref"]:
+            self.index.remove(doc_id)
+        for key, pref in self.store.get_preferences().items():
+            self.index.add(("pref", key), f"{key} {pref.get('value')}",
+                           {"content": f"{key}: {pref.get('value')}", "kind": "pref"})
+        self._version = version
+        self._generation = generation
+
+    def retrieve(self, user_text: str, top_k: Optional[int] = None,
+                 token_budget: Optional[int] = None) -> list:
+        """Return the most relevant memory entries for `user_text` within the token budget."""
+        top_k = top_k or self.top_k
+        budget = self.token_budget if token_budget is None else token_budget
+        with self._lock:
+            self._sync()
+            ranked = self.index.search(user_text, limit=top_k)
+            if self.vectors is not None:
+                semantic = [(sim, doc_id) for sim, doc_id in self.vectors.search(user_text, top_k)
+                            if sim >= VECTOR_MIN_SIMILARITY and doc_id in self.index.docs]
+                ranked = self._fuse(ranked, semantic)[:top_k]
+            selected = []
+            used = 0
+            for _, doc_id in ranked:
+                entry = self.index.docs[doc_id]
+                cost = estimate_tokens(entry["content"]) + 1  # +1 for the separator
+                if used + cost > budget:
+                    continue
+                selected.append(entry)
+                used += cost
+            return selected
+
+    @staticmethod
+    def _fuse(*rankings) -> list:
+        """Reciprocal rank fusion of several [(score, doc_id)] lists."""
+        fused = defaultdict(float)
+        for ranking in rankings:
+            for rank, (_, doc_id) in enumerate(ranking):
+                fused[doc_id] += 1.0 / (RRF_K + rank + 1)
+        return sorted(((score, doc_id) for doc_id, score in fused.items()),
+                      key=lambda pair: pair[0], reverse=True)
+
+    def summary(self, user_text: str) -> str:
+        """Format relevant memories for the system prompt."""
+        entries = self.retrieve(user_text)
+        if not entries:
+            return "No relevant memories"
+        memories = [e["content"] for e in entries if e["kind"] != "pref"]
+        prefs = [e["content"] for e in entries if e["kind"] == "pref"]
+        summary = []
+        if memories:
+            summary.append(f"Relevant memories: {'; '.join(memories)}")
+        if prefs:
+            summary.append(f"User preferences: {'; '.join(prefs)}")
+        return " | ".join(summary)
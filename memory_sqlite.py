@@ -0,0 +1,349 @@
+"""
+SQLite Memory Backend for MARVIN AI Assistant
+Stores facts, notes and preferences in tables with timestamp indexes and FTS5 search
+"""
+
+import json
+import os
+import sqlite3
+import sys
+import threading
+from datetime import datetime
+from typing import Optional
+
+from memory_retention import ColdArchive, RetentionPolicy
+from memory_store import normalize_memory
+
+RETENTION_CHECK_WRITES = 100  # Writes between automatic retention passes
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS facts (
+    id INTEGER PRIMARY KEY,
+    content TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    source TEXT
+);
+CREATE TABLE IF NOT EXISTS notes (
+    id INTEGER PRIMARY KEY,
+    content TEXT NOT NULL,
+    timestamp TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS preferences (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    timestamp TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_facts_timestamp ON facts(timestamp);
+CREATE INDEX IF NOT EXISTS idx_notes_timestamp ON notes(timestamp);
+"""
+
+# External-content FTS5 tables kept in sync by triggers
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS {table}_fts USING fts5(content, content='{table}', content_rowid='id');
+CREATE TRIGGER IF NOT EXISTS {table}_fts_insert AFTER INSERT ON {table} BEGIN
+    INSERT INTO {table}_fts(rowid, content) VALUES (new.id, new.content);
+END;
+CREATE TRIGGER IF NOT EXISTS {table}_fts_delete AFTER DELETE ON {table} BEGIN
+    INSERT INTO {table}_fts({table}_fts, rowid, content) VALUES ('delete', old.id, old.content);
+END;
+"""
+
+
+def _fts_query(text: str) -> str:
+    """Turn free text into an FTS5 OR-query of quoted terms (no operator injection)."""
+    terms = [t for t in "".join(c if c.isalnum() else " " for c in text.lower()).split() if t]
+    return " OR ".join(f'"{t}"' for t in terms)
+
+
+class SqliteMemoryStore:
+    """
+    SQLite-backed memory with the same public API as MemoryStore.
+
+    Every write is its own small transaction (WAL mode keeps these cheap), so
+    there is nothing to batch and `flush()` is a no-op kept for API parity.
+    `recall_facts(limit)` is an indexed ORDER BY timestamp LIMIT query and
+    `search()` ranks matches with FTS5 bm25. With a `retention` policy, evicted
+    rows move to a compressed cold archive next to the database.
+    """
+
+    def __init__(self, path: str, retention: Optional[RetentionPolicy] = None,
+                 archive_path: Optional[str] = None):
+        self.path = path
+        self.retention = retention
+        self.archive = ColdArchive(archive_path or f"{os.path.splitext(path)[0]}.archive.jsonl.gz")
+        self._writes_since_retention = 0
+        self.version = 0     # Bumped on every change; cheap cache key for callers
+        self.generation = 0  # Bumped when entries are removed or replaced (indexes must rebuild)
+        self._lock = threading.RLock()
+        # Other processes may write concurrently: WAL lets readers proceed, the timeout queues writers
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self.has_fts = self._init_fts()
+        self._conn.execute(
+            "INSERT OR IGNORE INTO meta(key, value) VALUES ('created', ?)",
+            (datetime.now().isoformat(),)
+        )
+        self._conn.commit()
+        self._data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+        self._pruned_generation = self._stored_generation()
+
+    def _check_external(self) -> None:
+        """Bump `version` if another process committed since we last looked (caller holds the lock)."""
+        data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+        if data_version != self._data_version:
+            self._data_version = data_version
+            self.version += 1
+            # Another process pruned rows: positional indexes over entries() must rebuild
+            generation = self._stored_generation()
+            if generation != self._pruned_generation:
+                self._pruned_generation = generation
+                self.generation += 1
+
+    def _stored_generation(self) -> int:
+        row = self._conn.execute("SELECT value FROM meta WHERE key = 'generation'").fetchone()
+        return int(row[0]) if row else 0
+
+    def _init_fts(self) -> bool:
+        try:
+            for table in ("facts", "notes"):
+                self._conn.executescript(FTS_SCHEMA.format(table=table))
+            return True
+        except sqlite3.OperationalError:
+            # SQLite built without FTS5: search() falls back to LIKE
+            return False
+
+    # ---------- Writes ----------
+    def _execute_write(self, sql: str, params: tuple) -> bool:
+        try:
+            with self._lock:
+                with self._conn:
+                    self._conn.execute(sql, params)
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO meta(key, value) VALUES ('last_updated', ?)",
+                        (datetime.now().isoformat(),)
+                    )
+                self.version += 1
+                self._writes_since_retention += 1
+            if self.retention is not None and self._writes_since_retention >= RETENTION_CHECK_WRITES:
+                self.enforce_retention()
+            return True
+        except sqlite3.Error as e:
+            print(f"Error saving memory: {e}")
+            return False
+
+    def enforce_retention(self) -> bool:
+        """Archive old/excess rows and delete near-duplicates according to the policy."""
+        if self.retention is None:
+            return True
+        try:
+            with self._lock:
+                self._writes_since_retention = 0
+                evicted = 0
+                for table, kind, columns in (("facts", "fact", "id, content, timestamp, source"),
+                                             ("notes", "note", "id, content, timestamp")):
+                    rows = [dict(r) for r in self._conn.execute(
+                        f"SELECT {columns} FROM {table} ORDER BY id")]
+                    if not self.retention.is_over_limit({"facts": rows}):
+                        continue
+                    keep, archive, duplicates = self.retention.split(rows)
+                    self.archive.append(kind, [{k: v for k, v in r.items() if k != "id"}
+                                               for r in archive])
+                    self._pruned_generation += 1
+                    with self._conn:
+                        self._conn.executemany(f"DELETE FROM {table} WHERE id = ?",
+                                               ((r["id"],) for r in archive + duplicates))
+                        self._conn.execute(
+                            "INSERT OR REPLACE INTO meta(key, value) VALUES ('generation', ?)",
+                            (str(self._pruned_generation),)
+                        )
+                    evicted += len(archive) + len(duplicates)
+                if evicted:
+                    self.generation += 1
+                    self.version += 1
+            return True
+        except sqlite3.Error as e:
+            print(f"Error applying memory retention: {e}")
+            return False
+
+    def search_archive(self, query: str, limit: int = 5) -> list:
+        """Search the cold archive; this is the only place it is opened."""
+        return self.archive.search(query, limit)
+
+    def remember_fact(self, fact: str, source: str = "user_input") -> bool:
+        """Store a fact in long-term memory"""
+        return self._execute_write(
+            "INSERT INTO facts(content, timestamp, source) VALUES (?, ?, ?)",
+            (fact, datetime.now().isoformat(), source)
+        )
+
+    def remember_note(self, note: str) -> bool:
+        """Store a note in long-term memory"""
+        return self._execute_write(
+            "INSERT INTO notes(content, timestamp) VALUES (?, ?)",
+            (note, datetime.now().isoformat())
+        )
+
+    def set_preference(self, key: str, value) -> bool:
+        """Store a user preference"""
+        return self._execute_write(
+            "INSERT OR REPLACE INTO preferences(key, value, timestamp) VALUES (?, ?, ?)",
+            (key, json.dumps(value, ensure_ascii=False), datetime.now().isoformat())
+        )
+
+    # ---------- Reads ----------
+    def _recent(self, table: str, columns: str, limit: int) -> list:
+        if limit <= 0:
+            return []
+        with self._lock:
+            self._check_external()
+            rows = self._conn.execute(
+                f"SELECT {columns} FROM {table} ORDER BY timestamp DESC, id DESC LIMIT ?",
+                (limit,)
+            ).fetchall()
+        return [dict(row) for row in reversed(rows)]
+
+    def recall_facts(self, limit: int = 5) -> list:
+        """Retrieve recent facts from memory"""
+        return self._recent("facts", "content, timestamp, source", limit)
+
+    def recall_notes(self, limit: int = 5) -> list:
+        """Retrieve recent notes from memory"""
+        return self._recent("notes", "content, timestamp", limit)
+
+    def get_preferences(self) -> dict:
+        """Get all user preferences"""
+        with self._lock:
+            self._check_external()
+            rows = self._conn.execute("SELECT key, value, timestamp FROM preferences").fetchall()
+        return {row["key"]: {"value": json.loads(row["value"]), "timestamp": row["timestamp"]}
+                for row in rows}
+
+    def entries(self, kind: str, start: int = 0, count: Optional[int] = None) -> list:
+        """Return facts or notes (oldest first) from position `start`, for incremental indexing."""
+        table = "facts" if kind == "fact" else "notes"
+        with self._lock:
+            self._check_external()
+            rows = self._conn.execute(
+                f"SELECT content, timestamp FROM {table} ORDER BY id LIMIT ? OFFSET ?",
+                (-1 if count is None else count, start)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def search(self, query: str, limit: int = 5) -> list:
+        """Find facts and notes matching `query`, best matches first."""
+        match = _fts_query(query)
+        if not match:
+            return []
+        results = []
+        with self._lock:
+            for table, kind in (("facts", "fact"), ("notes", "note")):
+                if self.has_fts:
+                    rows = self._conn.execute(
+                        f"SELECT t.content, t.timestamp, bm25({table}_fts) AS score "
+                        f"FROM {table}_fts JOIN {table} t ON t.id = {table}_fts.rowid "
+                        f"WHERE {table}_fts MATCH ? ORDER BY score LIMIT ?",
+                        (match, limit)
+                    ).fetchall()
+                else:
+                    rows = self._conn.execute(
+                        f"SELECT content, timestamp, 0 AS score FROM {table} "
+                        f"WHERE content LIKE ? ORDER BY timestamp DESC LIMIT ?",
+                        (f"%{query.strip()}%", limit)
+                    ).fetchall()
+                results.extend({"content": r["content"], "timestamp": r["timestamp"],
+                                "kind": kind, "score": r["score"]} for r in rows)
+        # bm25() is lower-is-better
+        results.sort(key=lambda r: r["score"])
+        for r in results:
+            del r["score"]
+        return results[:limit]
+
+    def snapshot(self) -> dict:
+        """Return the whole memory as a marvin_memory.json-style document."""
+        with self._lock:
+            meta = dict(self._conn.execute("SELECT key, value FROM meta").fetchall())
+            facts = [dict(r) for r in self._conn.execute(
+                "SELECT content, timestamp, source FROM facts ORDER BY id")]
+            notes = [dict(r) for r in self._conn.execute(
+                "SELECT content, timestamp FROM notes ORDER BY id")]
+        data = {"facts": facts, "preferences": self.get_preferences(), "notes": notes}
+        data.update(meta)
+        return data
+
+    # ---------- Lifecycle / Import / Export ----------
+    def flush(self) -> bool:
+        """Writes are committed immediately; kept for parity with MemoryStore."""
+        return True
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def export_json(self, path: str) -> bool:
+        """Write the whole memory as a marvin_memory.json-style document."""
+        try:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(self.snapshot(), f, ensure_ascii=False, indent=2)
+            return True
+        except Exception as e:
+            print(f"Error exporting memory: {e}")
+            return False
+
+    def import_json(self, path: str) -> bool:
+        """Append every entry of a marvin_memory.json-style document."""
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = normalize_memory(json.load(f))
+        except Exception as e:
+            print(f"Error importing memory: {e}")
+            return False
+        now = datetime.now().isoformat()
+        with self._lock:
+            with self._conn:
+                self._conn.executemany(
+                    "INSERT INTO facts(content, timestamp, source) VALUES (?, ?, ?)",
+                    ((f.get("content", ""), f.get("timestamp", now), f.get("source"))
+                     for f in data["facts"])
+                )
+                self._conn.executemany(
+                    "INSERT INTO notes(content, timestamp) VALUES (?, ?)",
+                    ((n.get("content", ""), n.get("timestamp", now)) for n in data["notes"])
+                )
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO preferences(key, value, timestamp) VALUES (?, ?, ?)",
+                    ((k, json.dumps(v.get("value"), ensure_ascii=False), v.get("timestamp", now))
+                     for k, v in data["preferences"].items())
+                )
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO meta(key, value) VALUES ('created', ?)",
+                    (data["created"],)
+                )
+            self.version += 1
+        return True
+
+
+def migrate_json_to_sqlite(json_path: str, db_path: str) -> bool:
+    """One-shot import of marvin_memory.json into a new SQLite database."""
+    if os.path.exists(db_path):
+        print(f"❌ {db_path} already exists; refusing to migrate twice")
+        return False
+    store = SqliteMemoryStore(db_path)
+    try:
+        return store.import_json(json_path)
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    # Usage: python memory_sqlite.py marvin_memory.json marvin_memory.db
+    if len(sys.argv) != 3:
+        print("Usage: python memory_sqlite.py <marvin_memory.json> <marvin_memory.db>")
+        sys.exit(1)
+    if migrate_json_to_sqlite(sys.argv[1], sys.argv[2]):
+        print(f"✅ Migrated {sys.argv[1]} -> {sys.argv[2]}")
+    else:
+        sys.exit(1)
@@ -0,0 +1,590 @@
+"""
+Memory Store Module for MARVIN AI Assistant
+Keeps long-term memory (facts, notes, preferences) in RAM and persists it in the background
+"""
+
+import atexit
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Optional
+
+from memory_retention import ColdArchive, RetentionPolicy
+
+if os.name == "nt":
+    import msvcrt
+else:
+    import fcntl
+
+# ========== Configuration Constants ==========
+FLUSH_DELAY_SECONDS = 1.0  # Debounce window: writes inside it are batched into one save
+COMPACT_AFTER_OPS = 1000   # Journal lines to accumulate before folding them into the snapshot
+REFRESH_INTERVAL_SECONDS = 0.5  # Min time between checks for other processes' writes
+
+
+def empty_memory() -> dict:
+    """Return a fresh, empty memory document."""
+    return {
+        "facts": [],
+        "preferences": {},
+        "notes": [],
+        "created": datetime.now().isoformat()
+    }
+
+
+def normalize_memory(data) -> dict:
+    """Ensure a loaded document has every top-level key MARVIN expects."""
+    if not isinstance(data, dict):
+        data = empty_memory()
+    data.setdefault("facts", [])
+    data.setdefault("preferences", {})
+    data.setdefault("notes", [])
+    data.setdefault("created", datetime.now().isoformat())
+    return data
+
+
+def apply_op(data: dict, op: dict) -> None:
+    """Apply one journal operation to a memory document in place."""
+    kind = op.get("op")
+    if kind == "fact":
+        data["facts"].append(op["entry"])
+    elif kind == "note":
+        data["notes"].append(op["entry"])
+    elif kind == "pref":
+        data["preferences"][op["key"]] = op["entry"]
+
+
+def _write_atomic(path: str, payload: str) -> None:
+    """Write to a temp file in the same directory, then rename over the target."""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(payload)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def _signature(path: str):
+    """Cheap change detector for a file: (mtime_ns, size, inode), or None if missing."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+class FileLock:
+    """Exclusive cross-process lock on `<path>.lock` (flock on Unix, msvcrt on Windows)."""
+
+    def __init__(self, path: str):
+        self.path = f"{path}.lock"
+        self._fh = None
+
+    def __enter__(self):
+        self._fh = open(self.path, "a+")
+        if os.name == "nt":
+            while True:
+                try:
+                    msvcrt.locking(self._fh.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    continue  # LK_LOCK gives up after ~10s; keep waiting
+        else:
+            fcntl.flock(self._fh.fileno(), fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc):
+        try:
+            if os.name == "nt":
+                self._fh.seek(0)
+                msvcrt.locking(self._fh.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                fcntl.flock(self._fh.fileno(), fcntl.LOCK_UN)
+        finally:
+            self._fh.close()
+            self._fh = None
+
+
+# ========== Storage Backends ==========
+# Every backend implements:
+#   load() -> dict                 read everything and remember what was seen
+#   refresh() -> None | ("ops", [op, ...]) | ("reload", dict)
+#                                  what other processes changed since load/refresh/write
+#   lock() -> context manager      cross-process exclusive section for refresh + write
+#   wants_snapshot(n) -> bool      whether write() needs the full serialized document
+#   write(ops, document) -> bool   persist ops (and the document, if given)
+class JsonFileBackend:
+    """The original marvin_memory.json format: the whole document is replaced on save."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._sig = None
+
+    def lock(self) -> FileLock:
+        return FileLock(self.path)
+
+    def load(self) -> dict:
+        data = None
+        try:
+            self._sig = _signature(self.path)
+            if self._sig is not None:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+        except Exception as e:
+            print(f"Error loading memory: {e}")
+        return normalize_memory(data)
+
+    def refresh(self):
+        if _signature(self.path) == self._sig:
+            return None
+        return ("reload", self.load())
+
+    def wants_snapshot(self, pending_ops: int) -> bool:
+        return True
+
+    def write(self, ops: list, document: Optional[str]) -> bool:
+        try:
+            _write_atomic(self.path, document)
+            self._sig = _signature(self.path)
+            return True
+        except Exception as e:
+            print(f"Error saving memory: {e}")
+            return False
+
+
+class JournalBackend:
+    """
+    Snapshot + append-only journal.
+
+    Each write appends one JSON line to `<base>.journal.jsonl`, so the cost of a
+    save is proportional to the change, not to the total memory. Once the
+    journal holds `compact_after` lines it is folded into `<base>.snapshot.json`
+    (during a background flush) and truncated. Startup replays snapshot + journal;
+    other processes' appends are picked up by reading only the journal tail.
+    """
+
+    def __init__(self, base_path: str, fsync: bool = False,
+                 compact_after: int = COMPACT_AFTER_OPS, import_path: Optional[str] = None):
+        self.base_path = base_path
+        self.snapshot_path = f"{base_path}.snapshot.json"
+        self.journal_path = f"{base_path}.journal.jsonl"
+        self.fsync = fsync
+        self.compact_after = compact_after
+        self.import_path = import_path  # Legacy JSON file used to seed an empty journal
+        self._seq = 0             # Sequence number of the last journaled op
+        self._journal_ops = 0     # Lines currently in the journal
+        self._offset = 0          # Bytes of the journal already applied
+        self._snapshot_sig = None
+        self._imported = False    # Seeded from import_path; first save must write a snapshot
+
+    def lock(self) -> FileLock:
+        return FileLock(self.base_path)
+
+    def load(self) -> dict:
+        data = None
+        snapshot_seq = 0
+        self._imported = False
+        try:
+            self._snapshot_sig = _signature(self.snapshot_path)
+            if self._snapshot_sig is not None:
+                with open(self.snapshot_path, "r", encoding="utf-8") as f:
+                    snapshot = json.load(f)
+                data = snapshot.get("memory")
+                snapshot_seq = snapshot.get("journal_seq", 0)
+            elif self.import_path and os.path.exists(self.import_path) \
+                    and not os.path.exists(self.journal_path):
+                with open(self.import_path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                self._imported = True
+        except Exception as e:
+            print(f"Error loading memory snapshot: {e}")
+        data = normalize_memory(data)
+        self._seq = snapshot_seq
+        self._journal_ops = 0
+        self._offset = 0
+        for op in self._read_tail():
+            apply_op(data, op)
+        return data
+
+    def _read_tail(self) -> list:
+        """Read complete journal lines past the applied offset; return ops not yet seen."""
+        try:
+            with open(self.journal_path, "rb") as f:
+                f.seek(self._offset)
+                chunk = f.read()
+        except OSError:
+            return []
+        end = chunk.rfind(b"\n") + 1  # Ignore a torn/in-progress last line
+        ops = []
+        for line in chunk[:end].splitlines():
+            try:
+                op = json.loads(line)
+            except ValueError:
+                continue  # Torn line from a crash mid-append
+            self._journal_ops += 1
+            if op.get("seq", 0) <= self._seq:
+                continue  # Already folded into the snapshot
+            self._seq = op["seq"]
+            ops.append(op)
+        self._offset += end
+        return ops
+
+    def refresh(self):
+        if _signature(self.snapshot_path) != self._snapshot_sig:
+            return ("reload", self.load())  # Another process compacted
+        try:
+            size = os.path.getsize(self.journal_path)
+        except OSError:
+            size = 0
+        if size < self._offset:
+            return ("reload", self.load())
+        if size == self._offset:
+            return None
+        ops = self._read_tail()
+        return ("ops", ops) if ops else None
+
+    def wants_snapshot(self, pending_ops: int) -> bool:
+        return self._imported or self._journal_ops + pending_ops >= self.compact_after
+
+    def write(self, ops: list, document: Optional[str]) -> bool:
+        try:
+            if ops:
+                lines = []
+                for op in ops:
+                    self._seq += 1
+                    lines.append(json.dumps(dict(op, seq=self._seq), ensure_ascii=False))
+                with open(self.journal_path, "ab") as f:
+                    f.write(("\n".join(lines) + "\n").encode("utf-8"))
+                    f.flush()
+                    if self.fsync:
+                        os.fsync(f.fileno())
+                    self._offset = f.tell()
+                self._journal_ops += len(ops)
+            if document is not None:
+                self._compact(document)
+            return True
+        except Exception as e:
+            print(f"Error saving memory journal: {e}")
+            return False
+
+    def _compact(self, document: str) -> None:
+        """Fold the journal into a new snapshot, then truncate the journal."""
+        _write_atomic(self.snapshot_path,
+                      f'{{"journal_seq": {self._seq}, "memory": {document}}}')
+        self._snapshot_sig = _signature(self.snapshot_path)
+        # A crash before this truncate is harmless: replay skips ops <= journal_seq
+        with open(self.journal_path, "w", encoding="utf-8"):
+            pass
+        self._journal_ops = 0
+        self._offset = 0
+        self._imported = False
+
+
+class MemoryStore:
+    """
+    In-process memory store.
+
+    The backing storage is read once at construction. Reads are served from RAM,
+    writes mark the store dirty and are saved by a background timer after
+    `flush_delay` seconds, so a burst of writes costs a single save.
+    Call `flush()` on shutdown (it is also registered with atexit).
+
+    Several processes may share the same files: saves run under a cross-process
+    lock and first merge whatever other processes wrote, and reads check (at most
+    every `refresh_interval` seconds, with a stat) whether anything changed,
+    reloading only when it did.
+
+    With a `retention` policy, saves that find the hot tier over its caps prune
+    it: near-duplicates are dropped and old/excess entries move to a compressed
+    cold archive (`<base>.archive.jsonl.gz`) that is only read by `search_archive()`.
+    """
+
+    def __init__(self, path: str, flush_delay: float = FLUSH_DELAY_SECONDS, backend=None,
+                 refresh_interval: float = REFRESH_INTERVAL_SECONDS,
+                 retention: Optional[RetentionPolicy] = None, archive_path: Optional[str] = None):
+        self.path = path
+        self.flush_delay = flush_delay
+        self.refresh_interval = refresh_interval
+        self.retention = retention
+        self.archive = ColdArchive(archive_path or f"{os.path.splitext(path)[0]}.archive.jsonl.gz")
+        self.backend = backend or JsonFileBackend(path)
+        self.version = 0     # Bumped on every change; cheap cache key for callers
+        self.generation = 0  # Bumped when entries are removed or replaced (indexes must rebuild)
+
+        self._lock = threading.RLock()
+        self._io_lock = threading.Lock()
+        self._timer: Optional[threading.Timer] = None
+        self._dirty = False
+        self._force_snapshot = False
+        self._pending: list = []  # Ops not yet handed to the backend
+        self._data = self.backend.load()
+        self._last_refresh = time.monotonic()
+
+        atexit.register(self.flush)
+
+    # ---------- Persistence ----------
+    def _mark_dirty(self) -> None:
+        """Record a change and schedule a background flush (caller holds the lock)."""
+        self.version += 1
+        self._dirty = True
+        if self.flush_delay <= 0:
+            return
+        if self._timer is None:
+            self._timer = threading.Timer(self.flush_delay, self._timer_flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _timer_flush(self) -> None:
+        with self._lock:
+            self._timer = None
+        self.flush()
+
+    def _apply_refresh(self, change) -> None:
+        """Merge another process's changes into RAM, keeping our unsaved ops on top."""
+        if change is None:
+            return
+        mode, payload = change
+        with self._lock:
+            if mode == "ops":
+                for op in payload:
+                    apply_op(self._data, op)
+            else:
+                for op in self._pending:
+                    apply_op(payload, op)
+                self._data = payload
+                self.generation += 1
+            self.version += 1
+
+    def _maybe_refresh(self) -> None:
+        """Pick up other processes' writes; a stat per interval, a parse only on change."""
+        if self.refresh_interval is None or self.refresh_interval < 0:
+            return
+        now = time.monotonic()
+        if now - self._last_refresh < self.refresh_interval:
+            return
+        with self._io_lock:
+            self._last_refresh = now
+            if self._force_snapshot:
+                return  # An import is about to overwrite the files
+            self._apply_refresh(self.backend.refresh())
+
+    def flush(self) -> bool:
+        """Write pending changes to disk now. Returns False only if a save failed."""
+        with self._io_lock:
+            with self._lock:
+                if self._timer is not None:
+                    self._timer.cancel()
+                    self._timer = None
+                if not self._dirty:
+                    return True
+            with self.backend.lock():
+                if not self._force_snapshot:
+                    # Optimistic check: only re-read if another process saved since we last looked
+                    self._apply_refresh(self.backend.refresh())
+                    self._last_refresh = time.monotonic()
+                with self._lock:
+                    ops = self._pending
+                    self._pending = []
+                    document = None
+                    if self.retention is not None and self.retention.is_over_limit(self._data):
+                        self._prune()
+                    if self._force_snapshot or self.backend.wants_snapshot(len(ops)):
+                        self._data["last_updated"] = datetime.now().isoformat()
+                        document = json.dumps(self._data, ensure_ascii=False, indent=2)
+                    self._dirty = False
+                    self._force_snapshot = False
+                if not self.backend.write(ops, document):
+                    with self._lock:
+                        self._pending = ops + self._pending
+                        self._dirty = True
+                    return False
+                return True
+
+    # ---------- Retention ----------
+    def _prune(self) -> None:
+        """Apply the retention policy to the hot tier (caller holds both locks)."""
+        evicted = 0
+        for key, kind in (("facts", "fact"), ("notes", "note")):
+            keep, archive, duplicates = self.retention.split(self._data[key])
+            self.archive.append(kind, archive)
+            evicted += len(archive) + len(duplicates)
+            self._data[key] = keep
+        if evicted:
+            self.generation += 1
+            self.version += 1
+            self._force_snapshot = True
+
+    def enforce_retention(self) -> bool:
+        """Run a retention pass now (e.g. in the background at startup) if the hot tier is over its caps."""
+        if self.retention is None:
+            return True
+        self._maybe_refresh()
+        with self._lock:
+            if not self.retention.is_over_limit(self._data):
+                return True  # Within the caps: no dedupe pass and no rewrite
+            self._dirty = True
+        return self.flush()
+
+    def search_archive(self, query: str, limit: int = 5) -> list:
+        """Search the cold archive; this is the only place it is opened."""
+        with self._io_lock:
+            return self.archive.search(query, limit)
+
+    def close(self) -> None:
+        """Flush and stop tracking this store at exit."""
+        self.flush()
+        atexit.unregister(self.flush)
+
+    # ---------- Import / Export (legacy marvin_memory.json format) ----------
+    def export_json(self, path: str) -> bool:
+        """Write the whole memory as a marvin_memory.json-style document."""
+        try:
+            with self._lock:
+                payload = json.dumps(self._data, ensure_ascii=False, indent=2)
+            _write_atomic(path, payload)
+            return True
+        except Exception as e:
+            print(f"Error exporting memory: {e}")
+            return False
+
+    def import_json(self, path: str) -> bool:
+        """Replace the memory with a marvin_memory.json-style document."""
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = normalize_memory(json.load(f))
+        except Exception as e:
+            print(f"Error importing memory: {e}")
+            return False
+        with self._lock:
+            self._data = data
+            self.generation += 1
+            self._pending = []
+            self._force_snapshot = True
+            self._mark_dirty()
+        return self._commit()
+
+    # ---------- Writes ----------
+    def _record(self, op: dict) -> None:
+        """Apply an op in RAM and queue it for the backend (caller holds the lock)."""
+        apply_op(self._data, op)
+        self._pending.append(op)
+        self._mark_dirty()
+
+    def _commit(self) -> bool:
+        """Finish a write (outside the lock): save now when batching is disabled."""
+        if self.flush_delay <= 0:
+            return self.flush()
+        return True
+
+    def remember_fact(self, fact: str, source: str = "user_input") -> bool:
+        """Store a fact in long-term memory"""
+        with self._lock:
+            self._record({"op": "fact", "entry": {
+                "content": fact,
+                "timestamp": datetime.now().isoformat(),
+                "source": source
+            }})
+        return self._commit()
+
+    def remember_note(self, note: str) -> bool:
+        """Store a note in long-term memory"""
+        with self._lock:
+            self._record({"op": "note", "entry": {
+                "content": note,
+                "timestamp": datetime.now().isoformat()
+            }})
+        return self._commit()
+
+    def set_preference(self, key: str, value) -> bool:
+        """Store a user preference"""
+        with self._lock:
+            self._record({"op": "pref", "key": key, "entry": {
+                "value": value,
+                "timestamp": datetime.now().isoformat()
+            }})
+        return self._commit()
+
+    # ---------- Reads (RAM, plus a throttled stat for other processes' writes) ----------
+    def recall_facts(self, limit: int = 5) -> list:
+        """Retrieve recent facts from memory"""
+        self._maybe_refresh()
+        with self._lock:
+            facts = self._data["facts"]
+            return facts[-limit:] if facts and limit > 0 else []
+
+    def recall_notes(self, limit: int = 5) -> list:
+        """Retrieve recent notes from memory"""
+        self._maybe_refresh()
+        with self._lock:
+            notes = self._data["notes"]
+            return notes[-limit:] if notes and limit > 0 else []
+
+    def get_preferences(self) -> dict:
+        """Get all user preferences"""
+        self._maybe_refresh()
+        with self._lock:
+            return dict(self._data["preferences"])
+
+    def entries(self, kind: str, start: int = 0, count: Optional[int] = None) -> list:
+        """Return facts or notes (oldest first) from position `start`, for incremental indexing."""
+        self._maybe_refresh()
+        with self._lock:
+            items = self._data["facts" if kind == "fact" else "notes"]
+            return items[start:] if count is None else items[start:start + count]
+
+    def search(self, query: str, limit: int = 5) -> list:
+        """Find facts and notes sharing words with `query`, best matches first."""
+        terms = set("".join(c if c.isalnum() else " " for c in query.lower()).split())
+        if not terms:
+            return []
+        scored = []
+        self._maybe_refresh()
+        with self._lock:
+            for kind, entries in (("fact", self._data["facts"]), ("note", self._data["notes"])):
+                for entry in entries:
+                    words = set("".join(c if c.isalnum() else " "
+                                        for c in entry.get("content", "").lower()).split())
+                    hits = len(terms & words)
+                    if hits:
+                        scored.append((hits, entry.get("timestamp", ""),
+                                       dict(entry, kind=kind)))
+        scored.sort(key=lambda s: (s[0], s[1]), reverse=True)
+        return [entry for _, _, entry in scored[:limit]]
+
+    def snapshot(self) -> dict:
+        """Return a deep copy of the whole memory document."""
+        self._maybe_refresh()
+        with self._lock:
+            return json.loads(json.dumps(self._data))
+
+
+def open_memory_store(path: str, backend: str = "json", **kwargs):
+    """
+    Open MARVIN's memory with the chosen storage backend.
+
+    Args:
+        path (str): The marvin_memory.json path. The journal backend derives its
+                    snapshot/journal file names from it and imports it on first start.
+        backend (str): "json" (whole-file rewrite), "journal" (append-only log) or
+                       "sqlite" (indexed tables + FTS5; migrates the JSON file on first start).
+    """
+    flush_delay = kwargs.pop("flush_delay", FLUSH_DELAY_SECONDS)
+    retention = kwargs.pop("retention", None)
+    if backend == "sqlite":
+        from memory_sqlite import SqliteMemoryStore
+        db_path = f"{os.path.splitext(path)[0]}.db"
+        is_new = not os.path.exists(db_path)
+        store = SqliteMemoryStore(db_path, retention=retention, **kwargs)
+        if is_new and os.path.exists(path):
+            store.import_json(path)
+        return store
+    if backend == "journal":
+        base_path = os.path.splitext(path)[0]
+        storage = JournalBackend(base_path, import_path=path, **kwargs)
+    elif backend == "json":
+        storage = JsonFileBackend(path)
+    else:
+        raise ValueError(f"Unknown memory backend: {backend}")
+    return MemoryStore(path, flush_delay=flush_delay, backend=storage, retention=retention)
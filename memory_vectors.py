@@ -0,0 +1,270 @@
+"""
+Semantic Memory Module for MARVIN AI Assistant
+Embeds facts and notes into a memory-mapped NumPy matrix for cosine-similarity recall
+"""
+
+import hashlib
+import json
+import os
+import threading
+from typing import Callable, Optional
+
+import numpy as np
+
+# ========== Configuration Constants ==========
+EMBEDDING_DIM = 384            # Matches all-MiniLM-L6-v2, so either embedder fits the same files
+INITIAL_CAPACITY = 1024        # Rows preallocated in the .npy file; doubled when full
+SENTENCE_MODEL = "all-MiniLM-L6-v2"
+KIND_CODES = {"fact": 0, "note": 1}
+KIND_NAMES = {code: kind for kind, code in KIND_CODES.items()}
+
+
+# ========== Embedders ==========
+class HashingEmbedder:
+    """
+    Dependency-free local embedder: hashed word and character trigram features.
+
+    Not a language model, but it captures lexical and sub-word similarity on the
+    CPU in microseconds and never needs a download.
+    """
+
+    name = "hashing-v1"
+
+    def __init__(self, dim: int = EMBEDDING_DIM):
+        self.dim = dim
+
+    def _features(self, text: str):
+        words = "".join(c if c.isalnum() else " " for c in text.lower()).split()
+        for word in words:
+            yield word, 1.0
+            padded = f"#{word}#"
+            for i in range(len(padded) - 2):
+                yield padded[i:i + 3], 0.5
+
+    def __call__(self, texts: list) -> np.ndarray:
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature, weight in self._features(text):
+                digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+                h = int.from_bytes(digest, "little")
+                out[row, h % self.dim] += weight if (h >> 63) else -weight
+        return out
+
+
+class SentenceTransformerEmbedder:
+    """Local CPU sentence-transformers model (optional dependency)."""
+
+    def __init__(self, model_name: str = SENTENCE_MODEL):
+        from sentence_transformers import SentenceTransformer
+        self.name = model_name
+        self.model = SentenceTransformer(model_name, device="cpu")
+        self.dim = self.model.get_sentence_embedding_dimension()
+
+    def __call__(self, texts: list) -> np.ndarray:
+        return np.asarray(self.model.encode(texts, batch_size=32), dtype=np.float32)
+
+
+def default_embedder():
+    """Use sentence-transformers when installed, otherwise the hashing embedder."""
+    try:
+        return SentenceTransformerEmbedder()
+    except Exception:
+        return HashingEmbedder()
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+# ========== Index ==========
+class FlatIndex:
+    """
+    Exact cosine top-k over a flat matrix of unit vectors.
+
+    Rows live in a memory-mapped `.npy` file, so opening the index is constant
+    time and only the pages touched by a search are read. `add()` appends in
+    place and doubles the preallocated capacity when full. Any object with the
+    same `add/search/reset/__len__` methods (e.g. an IVF or HNSW index) can be
+    passed to VectorMemory instead once the matrix grows too large to scan.
+    """
+
+    def __init__(self, path: str, dim: int, count: int = 0):
+        self.path = path
+        self.dim = dim
+        self.count = count
+        self._matrix = None
+        if os.path.exists(path):
+            self._matrix = np.load(path, mmap_mode="r+")
+            if self._matrix.shape[1] != dim:
+                self.reset()
+            else:
+                self.count = min(count, self._matrix.shape[0])
+
+    def __len__(self):
+        return self.count
+
+    def _grow(self, needed: int) -> None:
+        capacity = 0 if self._matrix is None else self._matrix.shape[0]
+        if needed <= capacity:
+            return
+        new_capacity = max(INITIAL_CAPACITY, capacity * 2)
+        while new_capacity < needed:
+            new_capacity *= 2
+        tmp_path = f"{self.path}.tmp.npy"
+        grown = np.lib.format.open_memmap(tmp_path, mode="w+", dtype=np.float32,
+                                          shape=(new_capacity, self.dim))
+        if self.count:
+            grown[:self.count] = self._matrix[:self.count]
+        grown.flush()
+        del grown
+        self._matrix = None  # Release the old mapping before replacing the file (Windows)
+        os.replace(tmp_path, self.path)
+        self._matrix = np.load(self.path, mmap_mode="r+")
+
+    def add(self, vectors: np.ndarray) -> None:
+        vectors = _normalize(np.asarray(vectors, dtype=np.float32))
+        self._grow(self.count + len(vectors))
+        self._matrix[self.count:self.count + len(vectors)] = vectors
+        self._matrix.flush()
+        self.count += len(vectors)
+
+    def search(self, query: np.ndarray, k: int) -> list:
+        """Return [(similarity, row)] best first."""
+        if not self.count:
+            return []
+        query = _normalize(np.asarray(query, dtype=np.float32).reshape(1, -1))[0]
+        sims = self._matrix[:self.count] @ query
+        k = min(k, self.count)
+        top = np.argpartition(-sims, k - 1)[:k]
+        top = top[np.argsort(-sims[top])]
+        return [(float(sims[i]), int(i)) for i in top]
+
+    def reset(self) -> None:
+        self._matrix = None
+        self.count = 0
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class VectorMemory:
+    """
+    Semantic recall over a memory store's facts and notes.
+
+    Entries added since the last call are embedded and appended incrementally
+    (keyed on `store.version`); the matrix is rebuilt only when
+    `store.generation` changes. Row -> entry ids are kept in a second
+    memory-mapped array, and counts in a small metadata file, so startup does
+    not read anything proportional to the number of facts.
+    """
+
+    def __init__(self, store, path_prefix: str, embedder: Optional[Callable] = None,
+                 index_factory: Optional[Callable] = None):
+        self.store = store
+        self.embedder = embedder or default_embedder()
+        self.dim = getattr(self.embedder, "dim", EMBEDDING_DIM)
+        self.meta_path = f"{path_prefix}.vectors.json"
+        self.ids_path = f"{path_prefix}.vector_ids.npy"
+        self._lock = threading.Lock()
+        self._version = None
+        self._generation = store.generation
+
+        # Reuse the files only if they were built by the same embedder from the same entries
+        meta = self._load_meta()
+        count = meta.get("count", 0)
+        counts = meta.get("counts") or {"fact": 0, "note": 0}
+        if meta.get("embedder") != getattr(self.embedder, "name", None) \
+                or meta.get("dim") != self.dim or not self._tails_match(counts, meta.get("tails", {})):
+            count = 0
+        factory = index_factory or (lambda dim, n: FlatIndex(f"{path_prefix}.vectors.npy", dim, n))
+        self.index = factory(self.dim, count)
+        self._ids = None
+        if count and len(self.index) == count and os.path.exists(self.ids_path):
+            self._ids = np.load(self.ids_path, mmap_mode="r+")
+            self._counts = counts
+        else:
+            self.index.reset()
+            self._counts = {"fact": 0, "note": 0}
+
+    def _tail_hash(self, kind: str, count: int) -> Optional[str]:
+        """Fingerprint of the last indexed entry of `kind`, to detect a rewritten store."""
+        if not count:
+            return None
+        tail = self.store.entries(kind, count - 1, 1)
+        if not tail:
+            return None
+        return hashlib.sha1(tail[0].get("content", "").encode("utf-8")).hexdigest()[:16]
+
+    def _tails_match(self, counts: dict, tails: dict) -> bool:
+        return all(self._tail_hash(kind, counts.get(kind, 0)) == tails.get(kind)
+                   for kind in ("fact", "note"))
+
+    def _load_meta(self) -> dict:
+        try:
+            with open(self.meta_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_meta(self) -> None:
+        tmp_path = f"{self.meta_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"count": len(self.index), "counts": self._counts, "dim": self.dim,
+                       "embedder": getattr(self.embedder, "name", None),
+                       "tails": {kind: self._tail_hash(kind, n) for kind, n in self._counts.items()}}, f)
+        os.replace(tmp_path, self.meta_path)
+
+    def _append_ids(self, ids: np.ndarray) -> None:
+        start = len(self.index) - len(ids)
+        capacity = 0 if self._ids is None else self._ids.shape[0]
+        if start + len(ids) > capacity:
+            new_capacity = max(INITIAL_CAPACITY, capacity * 2, start + len(ids))
+            tmp_path = f"{self.ids_path}.tmp.npy"
+            grown = np.lib.format.open_memmap(tmp_path, mode="w+", dtype=np.int64,
+                                              shape=(new_capacity, 2))
+            if start:
+                grown[:start] = self._ids[:start]
+            grown.flush()
+            del grown
+            self._ids = None
+            os.replace(tmp_path, self.ids_path)
+            self._ids = np.load(self.ids_path, mmap_mode="r+")
+        self._ids[start:start + len(ids)] = ids
+        self._ids.flush()
+
+    def sync(self) -> int:
+        """Embed entries added since the last sync. Returns how many were added."""
+        with self._lock:
+            version, generation = self.store.version, self.store.generation
+            if self._version == version:
+                return 0
+            if generation != self._generation:
+                self.index.reset()
+                self._ids = None
+                self._counts = {"fact": 0, "note": 0}
+            added = 0
+            for kind in ("fact", "note"):
+                entries = self.store.entries(kind, self._counts[kind])
+                if not entries:
+                    continue
+                vectors = self.embedder([e.get("content", "") for e in entries])
+                self.index.add(vectors)
+                positions = np.arange(self._counts[kind], self._counts[kind] + len(entries))
+                self._append_ids(np.column_stack([np.full(len(entries), KIND_CODES[kind]), positions]))
+                self._counts[kind] += len(entries)
+                added += len(entries)
+            self._version = version
+            self._generation = generation
+            if added:
+                self._save_meta()
+            return added
+
+    def search(self, text: str, k: int = 5) -> list:
+        """Return [(similarity, (kind, position))] best first."""
+        self.sync()
+        with self._lock:
+            query = self.embedder([text])[0]
+            hits = self.index.search(query, k)
+            return [(sim, (KIND_NAMES[int(self._ids[row, 0])], int(self._ids[row, 1])))
+                    for sim, row in hits]
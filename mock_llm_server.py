@@ -0,0 +1,436 @@
+#!/usr/bin/env python3
+"""
+Mock LLM Server Module for MARVIN AI Assistant
+Local stand-in for the OpenAI and Ollama endpoints Marvin uses, with configurable latency, token rate and errors
+
+OpenAI:  GET /v1/models[/<id>], POST /v1/chat/completions (text, JSON, vision; streamed or not),
+         POST /v1/audio/transcriptions
+Ollama:  GET /api/tags, POST /api/generate, POST /api/chat (NDJSON streaming, keep_alive, model load)
+Mock:    GET /mock/stats (request and injected-error counters)
+
+Replies are deterministic: a fixed text (or a run/chat JSON decision when the
+request asks for JSON) streamed one word per token at `token_rate`. Ollama
+requests pay `load_ms` when the model isn't loaded and `prompt_ms_per_token`
+for each prompt token outside the prefix shared with the previous request, like
+a server-side KV cache.
+
+Usage: python mock_llm_server.py [--port 11500] [--latency-ms 200] [--token-rate 30]
+                                 [--error-rate 0.1] [--load-ms 3000] [--prompt-ms-per-token 0.5]
+"""
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+# ========== Configuration Constants ==========
+DEFAULT_REPLY = ("This is a mock reply from the local test server. "
+                 "It streams one word at a time at a fixed token rate.")
+DEFAULT_TRANSCRIPT = "what time is it"
+DEFAULT_VISION_REPLY = "I can see a person sitting at a desk in front of a laptop."
+DEFAULT_MODELS = ("gpt-oss:20b", "gpt-4o-mini")
+DEFAULT_KEEP_ALIVE = 300.0  # Ollama's default: unload a model 5 minutes after its last request
+OPENAI_CACHE_MIN_TOKENS = 1024  # OpenAI only caches prompt prefixes at least this long...
+OPENAI_CACHE_BLOCK = 128        # ...in blocks of this many tokens
+
+TOKEN = re.compile(r"\S+\s*")
+
+
+class MockConfig:
+    """Knobs for the mock server; everything defaults to an instant, error-free server."""
+
+    def __init__(self, latency_ms: float = 0.0, token_rate: float = 0.0, reply: str = DEFAULT_REPLY,
+                 transcript: str = DEFAULT_TRANSCRIPT, vision_reply: str = DEFAULT_VISION_REPLY,
+                 error_rate: float = 0.0, error_status: int = 500, seed: int = 0,
+                 load_ms: float = 0.0, prompt_ms_per_token: float = 0.0, models=DEFAULT_MODELS):
+        self.latency_ms = latency_ms                    # Before the first byte of every response
+        self.token_rate = token_rate                    # Generated tokens per second (0 = all at once)
+        self.reply = reply
+        self.transcript = transcript
+        self.vision_reply = vision_reply
+        self.error_rate = error_rate                    # Fraction of requests answered with error_status
+        self.error_status = error_status
+        self.seed = seed
+        self.load_ms = load_ms                          # Ollama model load when it isn't resident
+        self.prompt_ms_per_token = prompt_ms_per_token  # Ollama prompt evaluation outside the cached prefix
+        self.models = list(models)
+
+
+def _tokens(text: str) -> list:
+    return TOKEN.findall(text)
+
+
+def _keep_alive_seconds(value) -> float:
+    """Ollama keep_alive ("30m", "10s", "1h", seconds, negative = forever) in seconds."""
+    if value is None:
+        return DEFAULT_KEEP_ALIVE
+    if isinstance(value, (int, float)):
+        return float("inf") if value < 0 else float(value)
+    match = re.fullmatch(r"\s*(-?[\d.]+)\s*(ms|s|m|h)?\s*", str(value))
+    if not match:
+        return DEFAULT_KEEP_ALIVE
+    amount = float(match.group(1))
+    if amount < 0:
+        return float("inf")
+    return amount * {"ms": 0.001, "s": 1, "m": 60, "h": 3600, None: 1}[match.group(2)]
+
+
+def _message_text(message: dict) -> str:
+    content = message.get("content") or ""
+    if isinstance(content, list):  # OpenAI content parts
+        content = " ".join(part.get("text", "") for part in content if isinstance(part, dict))
+    return f"{message.get('role', '')}: {content}"
+
+
+def _has_image(messages: list) -> bool:
+    return any(isinstance(m.get("content"), list) and any(
+        isinstance(part, dict) and part.get("type") == "image_url" for part in m["content"]) for m in messages)
+
+
+def _wants_json(messages: list, response_format=None) -> bool:
+    """JSON mode requested, or a system prompt describing Marvin's run/chat JSON contract."""
+    if response_format in ("json",) or (isinstance(response_format, dict)
+                                        and response_format.get("type") == "json_object"):
+        return True
+    return any(m.get("role") == "system" and '"mode"' in _message_text(m) for m in messages)
+
+
+class MockLLMServer:
+    """
+    The mock server on a background thread (or in the foreground via the CLI).
+
+    Use as a context manager in tests and benchmarks:
+
+        with MockLLMServer(MockConfig(token_rate=50)) as server:
+            client = OllamaClient(server.url)
+            openai_client = get_client(api_key="test", base_url=server.openai_base_url)
+    """
+
+    def __init__(self, config: Optional[MockConfig] = None, host: str = "127.0.0.1", port: int = 0):
+        self.config = config or MockConfig()
+        self.httpd = ThreadingHTTPServer((host, port), _Handler)
+        self.httpd.daemon_threads = True
+        self.httpd.mock = self
+        self._rng = random.Random(self.config.seed)
+        self._lock = threading.Lock()
+        self._counts: dict = {}
+        self._errors = 0
+        self._loaded_until: dict = {}   # Ollama model -> monotonic time it unloads
+        self._prompt_cache: dict = {}   # model -> prompt tokens of the last request (Ollama KV cache / OpenAI cache)
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def openai_base_url(self) -> str:
+        return f"{self.url}/v1"
+
+    def start(self) -> "MockLLMServer":
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="mock-llm-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self) -> "MockLLMServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"requests": dict(self._counts), "injected_errors": self._errors}
+
+    # ---------- Simulation state ----------
+    def _count(self, path: str) -> None:
+        with self._lock:
+            self._counts[path] = self._counts.get(path, 0) + 1
+
+    def _inject_error(self) -> bool:
+        with self._lock:
+            if self.config.error_rate and self._rng.random() < self.config.error_rate:
+                self._errors += 1
+                return True
+            return False
+
+    def _load_model(self, model: str, keep_alive) -> float:
+        """Seconds to wait for the model to be resident; (re)starts its keep_alive timer."""
+        now = time.monotonic()
+        with self._lock:
+            loaded = self._loaded_until.get(model, 0.0) > now
+            if not loaded:
+                self._prompt_cache.pop(("ollama", model), None)
+            # keep_alive 0 still answers this request, then unloads (the next one pays the load again)
+            self._loaded_until[model] = now + (_keep_alive_seconds(keep_alive) or 0.0)
+        return 0.0 if loaded else self.config.load_ms / 1000
+
+    def _unload_model(self, model: str) -> None:
+        with self._lock:
+            self._loaded_until.pop(model, None)
+            self._prompt_cache.pop(("ollama", model), None)
+
+    def _cached_prefix(self, key: tuple, prompt_tokens: list) -> int:
+        """Tokens shared with the previous prompt for `key`; remembers this prompt."""
+        with self._lock:
+            previous = self._prompt_cache.get(key, [])
+            self._prompt_cache[key] = prompt_tokens
+        shared = 0
+        for a, b in zip(previous, prompt_tokens):
+            if a != b:
+                break
+            shared += 1
+        return shared
+
+    def reply_text(self, messages: list, response_format=None) -> str:
+        if _has_image(messages):
+            return self.config.vision_reply
+        if _wants_json(messages, response_format):
+            return json.dumps({"mode": "chat", "command": "", "say": self.config.reply})
+        return self.config.reply
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep-alive, chunked streaming
+    server_version = "MockLLM/1.0"
+
+    @property
+    def mock(self) -> MockLLMServer:
+        return self.server.mock
+
+    def log_message(self, *args):
+        pass
+
+    # ---------- Response helpers ----------
+    def _send_json(self, data, status: int = 200) -> None:
+        body = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _start_stream(self, content_type: str) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+    def _write_chunk(self, data: bytes) -> None:
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+    def _end_stream(self) -> None:
+        self.wfile.write(b"0\r\n\r\n")
+        self.wfile.flush()
+
+    def _read_body(self) -> bytes:
+        return self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+    def _token_delay(self) -> None:
+        if self.mock.config.token_rate:
+            time.sleep(1 / self.mock.config.token_rate)
+
+    def _error(self, path: str) -> None:
+        status = self.mock.config.error_status
+        if path.startswith("/api/"):
+            self._send_json({"error": f"injected error {status}"}, status)
+        else:
+            self._send_json({"error": {"message": f"injected error {status}", "type": "server_error",
+                                       "code": None, "param": None}}, status)
+
+    def _begin(self, path: str) -> bool:
+        """Count the request, apply latency and error injection. Returns False if an error was sent."""
+        self.mock._count(path)
+        if self.mock.config.latency_ms:
+            time.sleep(self.mock.config.latency_ms / 1000)
+        if path != "/mock/stats" and self.mock._inject_error():
+            self._error(path)
+            return False
+        return True
+
+    # ---------- Routing ----------
+    def do_GET(self):
+        path = self.path.split("?", 1)[0]
+        route = "/v1/models" if path.startswith("/v1/models") else path
+        if not self._begin(route):
+            return
+        now = int(time.time())
+        if path == "/v1/models":
+            self._send_json({"object": "list", "data": [{"id": m, "object": "model", "created": now,
+                                                          "owned_by": "mock"} for m in self.mock.config.models]})
+        elif path.startswith("/v1/models/"):
+            self._send_json({"id": path[len("/v1/models/"):], "object": "model", "created": now, "owned_by": "mock"})
+        elif path == "/api/tags":
+            self._send_json({"models": [{"name": m, "model": m, "size": 0} for m in self.mock.config.models]})
+        elif path == "/mock/stats":
+            self._send_json(self.mock.stats())
+        else:
+            self._send_json({"error": f"unknown path {path}"}, 404)
+
+    def do_POST(self):
+        path = self.path.split("?", 1)[0]
+        raw = self._read_body()
+        if not self._begin(path):
+            return
+        if path == "/v1/audio/transcriptions":
+            self._send_json({"text": self.mock.config.transcript})
+            return
+        try:
+            body = json.loads(raw or b"{}")
+        except ValueError:
+            self._send_json({"error": "invalid JSON body"}, 400)
+            return
+        if path == "/v1/chat/completions":
+            self._openai_chat(body)
+        elif path in ("/api/generate", "/api/chat"):
+            self._ollama(path, body)
+        else:
+            self._send_json({"error": f"unknown path {path}"}, 404)
+
+    # ---------- OpenAI ----------
+    def _openai_chat(self, body: dict) -> None:
+        messages = body.get("messages", [])
+        model = body.get("model", "gpt-4o-mini")
+        tokens = _tokens(self.mock.reply_text(messages, body.get("response_format")))
+        limit = body.get("max_tokens") or body.get("max_completion_tokens")
+        if limit:
+            tokens = tokens[:limit]
+        prompt = _tokens(" ".join(_message_text(m) for m in messages))
+        shared = self.mock._cached_prefix(("openai", model), prompt)
+        cached = (shared // OPENAI_CACHE_BLOCK * OPENAI_CACHE_BLOCK) if shared >= OPENAI_CACHE_MIN_TOKENS else 0
+        usage = {"prompt_tokens": len(prompt), "completion_tokens": len(tokens),
+                 "total_tokens": len(prompt) + len(tokens), "prompt_tokens_details": {"cached_tokens": cached}}
+        base = {"id": f"chatcmpl-mock{int(time.time() * 1000)}", "created": int(time.time()), "model": model}
+
+        if not body.get("stream"):
+            for _ in tokens:
+                self._token_delay()
+            self._send_json(dict(base, object="chat.completion", usage=usage, choices=[{
+                "index": 0, "finish_reason": "stop",
+                "message": {"role": "assistant", "content": "".join(tokens)}}]))
+            return
+
+        def event(delta: dict, finish: Optional[str] = None) -> None:
+            chunk = dict(base, object="chat.completion.chunk",
+                         choices=[{"index": 0, "delta": delta, "finish_reason": finish}])
+            self._write_chunk(f"data: {json.dumps(chunk)}\n\n".encode())
+
+        self._start_stream("text/event-stream")
+        event({"role": "assistant", "content": ""})
+        for token in tokens:
+            self._token_delay()
+            event({"content": token})
+        event({}, "stop")
+        if (body.get("stream_options") or {}).get("include_usage"):
+            chunk = dict(base, object="chat.completion.chunk", choices=[], usage=usage)
+            self._write_chunk(f"data: {json.dumps(chunk)}\n\n".encode())
+        self._write_chunk(b"data: [DONE]\n\n")
+        self._end_stream()
+
+    # ---------- Ollama ----------
+    def _ollama(self, path: str, body: dict) -> None:
+        model = body.get("model", "")
+        if model not in self.mock.config.models:
+            self._send_json({"error": f"model '{model}' not found"}, 404)
+            return
+        start = time.perf_counter()
+        is_chat = path == "/api/chat"
+        messages = body.get("messages", []) if is_chat else [{"role": "user", "content": body.get("prompt", "")}]
+        if not is_chat and body.get("system"):
+            messages.insert(0, {"role": "system", "content": body["system"]})
+
+        empty = not any((m.get("content") or "").strip() for m in messages)
+        unload = empty and _keep_alive_seconds(body.get("keep_alive")) == 0
+        load_seconds = 0.0 if unload else self.mock._load_model(model, body.get("keep_alive"))
+        if unload:
+            self.mock._unload_model(model)
+        time.sleep(load_seconds)
+        if empty:  # Load (or, with keep_alive 0, unload) only; nothing generated
+            reason = "unload" if unload else "load"
+            final = {"model": model, "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ"), "done": True,
+                     "done_reason": reason, "load_duration": int(load_seconds * 1e9),
+                     "total_duration": int((time.perf_counter() - start) * 1e9)}
+            final.update({"message": {"role": "assistant", "content": ""}} if is_chat else {"response": ""})
+            self._send_json(final)
+            return
+
+        prompt = _tokens(" ".join(_message_text(m) for m in messages))
+        evaluated = max(1, len(prompt) - self.mock._cached_prefix(("ollama", model), prompt))
+        prompt_seconds = evaluated * self.mock.config.prompt_ms_per_token / 1000
+        time.sleep(prompt_seconds)
+
+        tokens = _tokens(self.mock.reply_text(messages, body.get("format")))
+        limit = (body.get("options") or {}).get("num_predict")
+        if limit and limit > 0:
+            tokens = tokens[:limit]
+
+        def piece(text: str, done: bool) -> dict:
+            data = {"model": model, "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ"), "done": done}
+            data.update({"message": {"role": "assistant", "content": text}} if is_chat else {"response": text})
+            return data
+
+        def final_stats(eval_seconds: float) -> dict:
+            return {"done_reason": "stop", "total_duration": int((time.perf_counter() - start) * 1e9),
+                    "load_duration": int(load_seconds * 1e9), "prompt_eval_count": evaluated,
+                    "prompt_eval_duration": int(prompt_seconds * 1e9), "eval_count": len(tokens),
+                    "eval_duration": int(eval_seconds * 1e9)}
+
+        eval_start = time.perf_counter()
+        if body.get("stream") is False:
+            for _ in tokens:
+                self._token_delay()
+            self._send_json(dict(piece("".join(tokens), True), **final_stats(time.perf_counter() - eval_start)))
+            return
+
+        self._start_stream("application/x-ndjson")
+        for token in tokens:
+            self._token_delay()
+            self._write_chunk((json.dumps(piece(token, False)) + "\n").encode())
+        done = dict(piece("", True), **final_stats(time.perf_counter() - eval_start))
+        self._write_chunk((json.dumps(done) + "\n").encode())
+        self._end_stream()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[1])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11500)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="delay before every response")
+    parser.add_argument("--token-rate", type=float, default=0.0, help="generated tokens per second (0 = instant)")
+    parser.add_argument("--reply", default=DEFAULT_REPLY)
+    parser.add_argument("--transcript", default=DEFAULT_TRANSCRIPT)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests that fail")
+    parser.add_argument("--error-status", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=0, help="seed for deterministic error injection")
+    parser.add_argument("--load-ms", type=float, default=0.0, help="Ollama model load time when not resident")
+    parser.add_argument("--prompt-ms-per-token", type=float, default=0.0,
+                        help="Ollama prompt evaluation cost per token outside the cached prefix")
+    parser.add_argument("--model", action="append", dest="models", help="model name to serve (repeatable)")
+    args = parser.parse_args()
+
+    config = MockConfig(latency_ms=args.latency_ms, token_rate=args.token_rate, reply=args.reply,
+                        transcript=args.transcript, error_rate=args.error_rate, error_status=args.error_status,
+                        seed=args.seed, load_ms=args.load_ms, prompt_ms_per_token=args.prompt_ms_per_token,
+                        models=args.models or DEFAULT_MODELS)
+    server = MockLLMServer(config, args.host, args.port)
+    print(f"🧪 Mock LLM server on {server.url} (OpenAI base URL {server.openai_base_url})")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,237 @@
+"""
+Ollama Client Module for MARVIN AI Assistant
+Streaming Ollama client on a pooled HTTP session that keeps the model loaded between turns
+"""
+
+import json
+import threading
+import time
+from typing import Callable, Iterator, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from speech_stream import stream_say
+
+# ========== Configuration Constants ==========
+DEFAULT_BASE_URL = "http://localhost:11434"
+KEEP_ALIVE = "30m"      # How long Ollama keeps the model in memory after a request ("-1" = forever)
+CONNECT_TIMEOUT = 5.0
+READ_TIMEOUT = 120.0    # Max silence between streamed lines; a cold 20B model load happens before the first one
+POOL_SIZE = 4           # Keep-alive connections per Ollama server
+WARMUP_TIMEOUT = 600.0  # Loading a 20B model from disk can take minutes on a cold start
+WARMUP_RETRY_SECONDS = 2.0
+WARMUP_MAX_WAIT = 120.0  # Keep retrying this long while the Ollama server itself is still starting
+
+_lock = threading.Lock()
+_sessions: dict = {}
+
+
+class OllamaError(Exception):
+    """Error reported by the Ollama server (bad model name, out of memory...)."""
+
+
+def get_session(base_url: str = DEFAULT_BASE_URL) -> requests.Session:
+    """The process-wide keep-alive session for `base_url`, created on first use."""
+    with _lock:
+        session = _sessions.get(base_url)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=POOL_SIZE)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _sessions[base_url] = session
+        return session
+
+
+def close_sessions() -> None:
+    with _lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
+
+
+class OllamaClient:
+    """
+    Streaming client for one Ollama model.
+
+    Requests go over a shared keep-alive session and ask the server to keep
+    the model resident for `keep_alive`, so neither the TCP connection nor the
+    model load is paid again between turns. Replies are read as NDJSON while
+    they are generated; `last_stats` holds time-to-first-token and tokens/sec
+    for the latest call.
+    """
+
+    def __init__(self, base_url: str = DEFAULT_BASE_URL, model: str = "gpt-oss:20b",
+                 keep_alive: str = KEEP_ALIVE, session: Optional[requests.Session] = None):
+        self.base_url = base_url.rstrip("/")
+        self.model = model
+        self.keep_alive = keep_alive
+        self.session = session or get_session(self.base_url)
+        self.last_stats: dict = {}
+
+    def _stream(self, path: str, payload: dict) -> Iterator[dict]:
+        """POST `payload` with streaming on and yield each NDJSON object."""
+        body = dict(payload, model=self.model, stream=True, keep_alive=self.keep_alive)
+        with self.session.post(f"{self.base_url}{path}", json=body, stream=True,
+                               timeout=(CONNECT_TIMEOUT, READ_TIMEOUT)) as response:
+            if response.status_code >= 400:
+                try:
+                    message = response.json().get("error", response.text)
+                except ValueError:
+                    message = response.text
+                raise OllamaError(f"{response.status_code}: {message}")
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                data = json.loads(line)
+                if "error" in data:
+                    raise OllamaError(data["error"])
+                yield data
+
+    def _text_chunks(self, path: str, payload: dict, text_of: Callable[[dict], str]) -> Iterator[str]:
+        """Yield reply text as it streams in and fill `last_stats` when the stream ends."""
+        start = time.perf_counter()
+        first = None
+        chunks = 0
+        final = {}
+        for data in self._stream(path, payload):
+            text = text_of(data)
+            if text:
+                if first is None:
+                    first = time.perf_counter()
+                chunks += 1
+                yield text
+            if data.get("done"):
+                final = data
+        end = time.perf_counter()
+        self.last_stats = self._stats(start, first, end, chunks, final)
+
+    @staticmethod
+    def _stats(start: float, first: Optional[float], end: float, chunks: int, final: dict) -> dict:
+        # Server-side counters (nanoseconds) when present, wall-clock estimates otherwise
+        tokens = final.get("eval_count", chunks)
+        eval_seconds = final.get("eval_duration", 0) / 1e9 or (end - first if first else 0.0)
+        return {
+            "ttft_ms": ((first or end) - start) * 1000,
+            "total_ms": (end - start) * 1000,
+            "tokens": tokens,
+            "tokens_per_sec": tokens / eval_seconds if eval_seconds else 0.0,
+            "prompt_tokens": final.get("prompt_eval_count", 0),
+            "prompt_eval_ms": final.get("prompt_eval_duration", 0) / 1e6,
+            "load_ms": final.get("load_duration", 0) / 1e6,
+        }
+
+    def generate(self, prompt: str, on_sentence: Optional[Callable[[str], None]] = None,
+                 system: Optional[str] = None, options: Optional[dict] = None) -> str:
+        """
+        Complete `prompt` with /api/generate and return the full reply.
+
+        With `on_sentence`, each finished sentence is passed on as soon as it
+        has streamed in, so speech can start long before the reply is done.
+        """
+        payload = {"prompt": prompt}
+        if system:
+            payload["system"] = system
+        if options:
+            payload["options"] = options
+        chunks = self._text_chunks("/api/generate", payload, lambda data: data.get("response", ""))
+        return self._reply(chunks, on_sentence)
+
+    def chat(self, messages: list, on_sentence: Optional[Callable[[str], None]] = None,
+             options: Optional[dict] = None) -> str:
+        """
+        Answer the last of `messages` with /api/chat and return the reply.
+
+        Send the same system prompt and earlier turns unchanged each time: the
+        server keeps the evaluated prefix in its KV cache, so only the new
+        turns are evaluated (see `prompt_tokens` in `last_stats`).
+        """
+        return self._reply(self.stream_chat(messages, options), on_sentence)
+
+    def stream_chat(self, messages: list, options: Optional[dict] = None,
+                    format: Optional[str] = None) -> Iterator[str]:
+        """Reply text for /api/chat as it is generated; `last_stats` is set once the stream is exhausted."""
+        payload = {"messages": messages}
+        if options:
+            payload["options"] = options
+        if format:
+            payload["format"] = format
+        return self._text_chunks("/api/chat", payload, lambda data: (data.get("message") or {}).get("content", ""))
+
+    @staticmethod
+    def _reply(chunks: Iterator[str], on_sentence: Optional[Callable[[str], None]]) -> str:
+        if on_sentence is None:
+            return "".join(chunks).strip()
+        return stream_say(chunks, on_sentence, field=None).strip()
+
+    def warm_up(self) -> dict:
+        """Load the model with an empty prompt (no tokens generated) and keep it resident for `keep_alive`."""
+        start = time.perf_counter()
+        response = self.session.post(f"{self.base_url}/api/generate",
+                                     json={"model": self.model, "prompt": "", "stream": False,
+                                           "keep_alive": self.keep_alive},
+                                     timeout=(CONNECT_TIMEOUT, WARMUP_TIMEOUT))
+        if response.status_code >= 400:
+            raise OllamaError(f"{response.status_code}: {response.text}")
+        data = response.json()
+        return {"load_ms": data.get("load_duration", 0) / 1e6, "total_ms": (time.perf_counter() - start) * 1000}
+
+    def tags(self, timeout: float = CONNECT_TIMEOUT) -> list:
+        """Names of the models the server has pulled."""
+        response = self.session.get(f"{self.base_url}/api/tags", timeout=timeout)
+        response.raise_for_status()
+        return [m.get("name") for m in response.json().get("models", [])]
+
+
+class ModelWarmup:
+    """
+    Loads a model in the background so the user's first question doesn't pay for it.
+
+    `ready` turns true once the warm-up has finished (or given up); callers
+    only block in `wait()` if they arrive before that. While the server is
+    still starting, connection errors are retried for up to `max_wait` seconds.
+    """
+
+    def __init__(self, client: OllamaClient, max_wait: float = WARMUP_MAX_WAIT,
+                 retry_seconds: float = WARMUP_RETRY_SECONDS):
+        self.client = client
+        self.max_wait = max_wait
+        self.retry_seconds = retry_seconds
+        self.stats: dict = {}
+        self.error: Optional[str] = None
+        self._done = threading.Event()
+        self._started = False
+        self._lock = threading.Lock()
+
+    @property
+    def ready(self) -> bool:
+        return self._done.is_set()
+
+    def _run(self) -> None:
+        deadline = time.monotonic() + self.max_wait
+        while True:
+            try:
+                self.stats = self.client.warm_up()
+                self.error = None
+                break
+            except requests.exceptions.ConnectionError as e:
+                self.error = str(e)
+                if time.monotonic() + self.retry_seconds > deadline:
+                    break
+                time.sleep(self.retry_seconds)
+            except Exception as e:
+                self.error = str(e)
+                break
+        self._done.set()
+
+    def start(self) -> None:
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+        threading.Thread(target=self._run, name="ollama-warmup", daemon=True).start()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until the warm-up has finished. Returns False on timeout."""
+        return self._done.wait(timeout)
@@ -0,0 +1,224 @@
+"""
+PATH Index Module for MARVIN AI Assistant
+Indexes every executable on PATH in a background thread, with an on-disk cache keyed by directory mtime
+"""
+
+import json
+import os
+import re
+import shlex
+import subprocess
+import threading
+from typing import Optional
+
+# ========== Configuration Constants ==========
+CACHE_VERSION = 1
+DEFAULT_WINDOWS_PATHEXT = ".EXE;.BAT;.CMD;.COM"
+PROGRAM_NAME = re.compile(r"^[\w.+-]+$")  # Anything else (subshells, globs, paths) is left to the shell
+LOGIN_SHELL = "/bin/bash" if os.name != "nt" and os.path.exists("/bin/bash") else None  # How MARVIN runs commands
+LOGIN_SHELL_TIMEOUT = 5  # Seconds for `command -v` in a login shell before giving the command the benefit of the doubt
+
+# Commands that run another program, with their options that take a separate argument
+WRAPPERS = {
+    "sudo": frozenset("-u -g -p -r -t -U -C -D -R -T -h".split()),
+    "env": frozenset("-u -C -S".split()),
+    "nice": frozenset(["-n"]),
+    "nohup": frozenset(),
+    "exec": frozenset(["-a"]),
+}
+
+# Shell keywords and builtins: valid first words that are never files on PATH
+SHELL_BUILTINS = frozenset(
+    ". : [ alias bg break cd command continue declare dirs echo eval exec exit export false fg "
+    "for hash history if jobs kill popd printf pushd pwd read return set shift source test "
+    "time trap true type ulimit umask unalias unset wait while "
+    # cmd.exe
+    "assoc call cls copy del dir erase md mkdir move rd ren rename rmdir start title ver vol".split()
+)
+
+
+def _windows_exts() -> list:
+    return [e for e in os.getenv("PATHEXT", DEFAULT_WINDOWS_PATHEXT).lower().split(";") if e]
+
+
+def scan_directory(directory: str) -> list:
+    """Executable names in one directory (extension stripped on Windows), sorted."""
+    names = set()
+    exts = _windows_exts() if os.name == "nt" else []
+    try:
+        with os.scandir(directory) as it:
+            for entry in it:
+                if os.name == "nt":
+                    lower = entry.name.lower()
+                    for ext in exts:
+                        if lower.endswith(ext):
+                            names.add(lower[:-len(ext)])
+                            break
+                    continue
+                try:
+                    # Unix: regular file (following symlinks) with any executable bit
+                    if entry.is_file() and entry.stat().st_mode & 0o111:
+                        names.add(entry.name)
+                except OSError:
+                    continue
+    except OSError:
+        return []
+    return sorted(names)
+
+
+class PathIndex:
+    """
+    Complete, deduplicated set of executables on PATH.
+
+    `start()` scans in a daemon thread; results are saved to `cache_path` per
+    directory along with its mtime, so on a warm start only directories whose
+    mtime changed are rescanned. `refresh()` repeats that check (one stat per
+    directory) when PATH or a directory changes. Lookups with `has()` are O(1).
+
+    `missing_program()` only reports a program missing if `login_shell` (the
+    shell commands are run with) can't find it either: its login PATH,
+    aliases and functions differ from this process's PATH.
+    """
+
+    def __init__(self, cache_path: Optional[str] = None, login_shell: Optional[str] = LOGIN_SHELL):
+        self.cache_path = cache_path
+        self.login_shell = login_shell
+        self._login_found: dict = {}  # name -> whether `command -v` found it in the login shell
+        self.ready = threading.Event()
+        self._lock = threading.Lock()
+        self._dirs: dict = {}       # directory -> {"mtime_ns": int, "names": [...]}
+        self._names: list = []      # PATH order, first occurrence wins
+        self._name_set = frozenset()
+        self._path = None
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "PathIndex":
+        """Build the index in the background; returns immediately."""
+        self._thread = threading.Thread(target=self.refresh, daemon=True)
+        self._thread.start()
+        return self
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self.ready.wait(timeout)
+
+    def _load_cache(self) -> dict:
+        if not self.cache_path:
+            return {}
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if data.get("version") != CACHE_VERSION or data.get("os") != os.name:
+            return {}
+        return data.get("dirs", {})
+
+    def _save_cache(self) -> None:
+        if not self.cache_path:
+            return
+        tmp_path = f"{self.cache_path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"version": CACHE_VERSION, "os": os.name, "dirs": self._dirs}, f)
+            os.replace(tmp_path, self.cache_path)
+        except OSError as e:
+            print(f"⚠️ Could not save PATH index cache: {e}")
+
+    def refresh(self) -> int:
+        """Rescan directories that are new or whose mtime changed. Returns how many were rescanned."""
+        with self._lock:
+            if not self._dirs:
+                self._dirs = self._load_cache()
+            path = os.getenv("PATH", "")
+            directories = list(dict.fromkeys(d for d in path.split(os.pathsep) if d))
+            dirs, rescanned = {}, 0
+            for directory in directories:
+                try:
+                    mtime = os.stat(directory).st_mtime_ns
+                except OSError:
+                    continue
+                cached = self._dirs.get(directory)
+                if cached and cached.get("mtime_ns") == mtime:
+                    dirs[directory] = cached
+                else:
+                    dirs[directory] = {"mtime_ns": mtime, "names": scan_directory(directory)}
+                    rescanned += 1
+            dirs_changed = set(dirs) != set(self._dirs)
+            changed = rescanned or dirs_changed or path != self._path
+            self._dirs = dirs
+            self._path = path
+            if changed:
+                names = dict.fromkeys(n for d in directories if d in dirs for n in dirs[d]["names"])
+                self._names = list(names)
+                self._name_set = frozenset(names)
+            if rescanned or dirs_changed:
+                self._save_cache()
+        self.ready.set()
+        return rescanned
+
+    def names(self) -> list:
+        """All executable names, in PATH order (the first directory providing a name wins)."""
+        return self._names
+
+    def has(self, name: str) -> bool:
+        """Whether `name` is an executable on PATH (O(1))."""
+        if os.name == "nt":
+            name = name.lower()
+            for ext in _windows_exts():
+                if name.endswith(ext):
+                    name = name[:-len(ext)]
+                    break
+        return name in self._name_set
+
+    def __len__(self):
+        return len(self._name_set)
+
+    def missing_program(self, command: str) -> Optional[str]:
+        """
+        The program a shell command starts with, if it is neither a builtin, a path nor on PATH.
+
+        Wrappers (`sudo -u postgres psql`) are looked through to the program
+        they run. Commands with fallbacks (`a || b`) are left to the shell, as
+        is everything before the first scan has finished.
+        """
+        if "||" in command or not self.ready.is_set():
+            return None
+        try:
+            words = shlex.split(command, posix=os.name != "nt")
+        except ValueError:
+            return None
+        wrapper_options = None  # Options of the wrapper just seen, while skipping them
+        skip_argument = False
+        for word in words:
+            if skip_argument:
+                skip_argument = False
+                continue
+            if wrapper_options is not None and word.startswith("-"):
+                skip_argument = word in wrapper_options
+                continue
+            if "=" in word and not word.startswith("="):
+                continue  # VAR=value prefix
+            if word in WRAPPERS:
+                wrapper_options = WRAPPERS[word]
+                continue
+            if word.lower() in SHELL_BUILTINS or not PROGRAM_NAME.match(word):
+                return None
+            return None if self.has(word) or self._in_login_shell(word) else word
+        return None
+
+    def _in_login_shell(self, name: str) -> bool:
+        """Whether the login shell resolves `name` (PATH, alias or function); checked once per name."""
+        if not self.login_shell:
+            return False
+        with self._lock:
+            if name in self._login_found:
+                return self._login_found[name]
+        try:
+            found = subprocess.run([self.login_shell, "-lc", f"command -v {shlex.quote(name)}"],
+                                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, stdin=subprocess.DEVNULL,
+                                   timeout=LOGIN_SHELL_TIMEOUT).returncode == 0
+        except (OSError, subprocess.TimeoutExpired):
+            return True  # Can't tell; let the shell report it
+        with self._lock:
+            self._login_found[name] = found
+        return found
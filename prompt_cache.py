@@ -0,0 +1,132 @@
+"""
+Prompt Cache Module for MARVIN AI Assistant
+Rebuilds system prompt components only when their inputs (PATH, working directory, memory) change
+and tracks how much of each prompt the API served from its prefix cache
+"""
+
+import os
+import threading
+
+_MISSING = object()
+
+
+def _mtime(path: str):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def path_key() -> tuple:
+    """$PATH plus each directory's mtime: installing or removing a binary changes it."""
+    path = os.getenv("PATH", "")
+    return (path, os.getenv("PATHEXT", ""), tuple(_mtime(d) for d in path.split(os.pathsep) if d))
+
+
+def cwd_key() -> tuple:
+    """Working directory plus its mtime: creating, deleting or renaming an entry changes it."""
+    cwd = os.getcwd()
+    return (cwd, _mtime(cwd))
+
+
+class KeyedCache:
+    """Single-entry cache that recomputes its value only when the key changes."""
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self._key = _MISSING
+        self._value = None
+        self._lock = threading.Lock()
+
+    def get(self, key, compute):
+        with self._lock:
+            if key == self._key:
+                self.hits += 1
+                return self._value
+        value = compute()
+        with self._lock:
+            self.misses += 1
+            self._key, self._value = key, value
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._key = _MISSING
+            self._value = None
+
+
+class PromptCache:
+    """
+    Separate caches for each prompt component plus the assembled blocks.
+
+    - path_bins: PATH executables, keyed on `path_key()`
+    - dir_items: working directory listing, keyed on `cwd_key()`
+    - memory: memory summary, keyed on store version/generation and the request text
+    - prefix: the static system prompt, keyed on `path_key()`
+    - context: the volatile per-turn block, keyed on the directory key and memory summary
+    """
+
+    COMPONENTS = ("path_bins", "dir_items", "memory", "prefix", "context")
+
+    def __init__(self):
+        for name in self.COMPONENTS:
+            setattr(self, name, KeyedCache())
+
+    def stats(self) -> dict:
+        """Hit/miss counters per component."""
+        return {name: {"hits": getattr(self, name).hits, "misses": getattr(self, name).misses}
+                for name in self.COMPONENTS}
+
+    def clear(self) -> None:
+        for name in self.COMPONENTS:
+            getattr(self, name).clear()
+
+
+def _field(obj, key):
+    """Attribute of an SDK response object, or key of its dict form; None if absent."""
+    if obj is None:
+        return None
+    return obj.get(key) if isinstance(obj, dict) else getattr(obj, key, None)
+
+
+class UsageStats:
+    """
+    Prompt and cached-token counts per request, read from the API's `usage` field.
+
+    OpenAI reports `usage.prompt_tokens_details.cached_tokens` for prompt
+    prefixes it served from cache (prompts of 1024+ tokens), which are cheaper
+    and faster; comparing latency of cached and uncached turns shows the gain.
+    """
+
+    def __init__(self):
+        self.turns: list = []
+        self._lock = threading.Lock()
+
+    def record(self, usage, latency: float) -> dict:
+        """Store one request's usage (object or dict) and wall time in seconds."""
+        details = _field(usage, "prompt_tokens_details")
+        turn = {
+            "prompt_tokens": _field(usage, "prompt_tokens") or 0,
+            "cached_tokens": _field(details, "cached_tokens") or 0,
+            "latency_ms": latency * 1000,
+        }
+        with self._lock:
+            self.turns.append(turn)
+        return turn
+
+    def summary(self) -> dict:
+        with self._lock:
+            turns = list(self.turns)
+        prompt = sum(t["prompt_tokens"] for t in turns)
+        cached = sum(t["cached_tokens"] for t in turns)
+        hit = [t["latency_ms"] for t in turns if t["cached_tokens"]]
+        miss = [t["latency_ms"] for t in turns if not t["cached_tokens"]]
+        return {
+            "turns": len(turns),
+            "prompt_tokens": prompt,
+            "cached_tokens": cached,
+            "cached_ratio": cached / prompt if prompt else 0.0,
+            "avg_latency_ms_cached": sum(hit) / len(hit) if hit else None,
+            "avg_latency_ms_uncached": sum(miss) / len(miss) if miss else None,
+        }
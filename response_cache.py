@@ -0,0 +1,222 @@
+"""
+Response Cache Module for MARVIN AI Assistant
+Reuses GPT decisions for repeated requests: LRU + TTL, optional fuzzy/embedding lookup, saved to disk
+"""
+
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Optional
+
+try:
+    from rapidfuzz import fuzz, process
+except ImportError:  # Fall back to difflib when rapidfuzz isn't installed
+    fuzz = process = None
+    import difflib
+
+from fast_intent import normalize
+
+# ========== Configuration Constants ==========
+DEFAULT_MAX_ENTRIES = 256
+DEFAULT_CHAT_TTL = 7 * 24 * 3600  # Chat answers at temperature 0 stay valid for a week
+DEFAULT_RUN_TTL = 24 * 3600       # Commands depend more on the machine's state
+DEFAULT_FUZZY_RATIO = None        # rapidfuzz ratio for a near-identical wording to count as a hit (None: exact only)
+DEFAULT_MIN_SIMILARITY = 0.92     # Cosine similarity for embedding hits
+
+# Commands that change things are never cached: re-running them should always be GPT's decision
+SIDE_EFFECTS = re.compile(
+    r"(^|[\s;&|(])(rm|del|erase|rmdir|rd|mv|move|cp|copy|kill|pkill|taskkill|shutdown|reboot|restart|"
+    r"sudo|chmod|chown|dd|mkfs|format|pip|npm|apt|apt-get|brew|choco|winget|git|curl|wget)\b"
+    r"|>|\b(install|uninstall|delete|remove)\b", re.IGNORECASE)
+# Follow-ups like "which of those is bigger" depend on the conversation, not just the text
+CONTEXT_WORDS = frozenset("that those these them it its this again another more else previous last same".split())
+# Replies to Marvin ("yes", "why", "do it") carry no request of their own
+REPLY_WORDS = frozenset("yes yeah yep sure ok okay no nope nah why how what do go ahead please thanks".split())
+MIN_CONTENT_WORDS = 2
+NUMBER = re.compile(r"\d+(?:[.,]\d+)?")
+
+
+def has_side_effects(action: dict) -> bool:
+    """Whether repeating `action` from cache could do something the user didn't ask for this time."""
+    mode = action.get("mode")
+    if mode in ("memory", "camera"):
+        return True
+    return mode == "run" and bool(SIDE_EFFECTS.search(action.get("command", "")))
+
+
+def is_context_dependent(text: str) -> bool:
+    words = normalize(text).split()
+    return len(words) < MIN_CONTENT_WORDS or all(w in REPLY_WORDS for w in words) \
+        or any(w in CONTEXT_WORDS for w in words)
+
+
+def numbers(text: str) -> list:
+    """The numbers in `text`; wordings that differ in one ask a different question ("12 times 13" vs "14")."""
+    return NUMBER.findall(text)
+
+
+class ResponseCache:
+    """
+    Cache of routed actions keyed on normalized user text plus a fingerprint of
+    everything else the decision depended on (prompt, memories, conversation).
+
+    Chat-only answers and run decisions live in separate LRU namespaces with
+    their own TTLs. Lookups try the exact key first, then (optionally) the
+    closest chat wording under the same fingerprint and with the same numbers,
+    by rapidfuzz ratio and/or embedding cosine similarity; run decisions only
+    ever match exactly. Decisions with side effects, fallback replies and
+    requests that refer back to the conversation (or are just a reply like
+    "yes" or "why") are never cached.
+    """
+
+    def __init__(self, path: Optional[str] = None, max_entries: int = DEFAULT_MAX_ENTRIES,
+                 chat_ttl: float = DEFAULT_CHAT_TTL, run_ttl: float = DEFAULT_RUN_TTL,
+                 fuzzy_ratio: Optional[float] = DEFAULT_FUZZY_RATIO,
+                 embedder: Optional[Callable] = None, min_similarity: float = DEFAULT_MIN_SIMILARITY):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = {"chat": chat_ttl, "run": run_ttl}
+        self.fuzzy_ratio = fuzzy_ratio
+        self.embedder = embedder
+        self.min_similarity = min_similarity
+        self.hits = 0
+        self.misses = 0
+        self._entries = {"chat": OrderedDict(), "run": OrderedDict()}  # (fingerprint, text) -> entry
+        self._vectors = {}  # (namespace, key) -> unit vector, when an embedder is set
+        self._lock = threading.Lock()
+        self._load()
+
+    # ---------- Persistence ----------
+    def _load(self) -> None:
+        if not self.path:
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        now = time.time()
+        for namespace, entries in self._entries.items():
+            for entry in data.get(namespace, []):
+                if now - entry.get("created", 0) < self.ttl[namespace]:
+                    key = (entry["fingerprint"], entry["text"])
+                    entries[key] = entry
+                    self._embed(namespace, key)
+
+    def _save(self) -> None:
+        """Write the cache atomically (caller holds the lock)."""
+        if not self.path:
+            return
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({ns: list(entries.values()) for ns, entries in self._entries.items()},
+                          f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"⚠️ Could not save response cache: {e}")
+
+    def _embed(self, namespace: str, key: tuple) -> None:
+        if self.embedder is None or namespace != "chat":
+            return
+        import numpy as np
+        vector = np.asarray(self.embedder([key[1]])[0], dtype=np.float32)
+        norm = float(np.linalg.norm(vector)) or 1.0
+        self._vectors[(namespace, key)] = vector / norm
+
+    # ---------- Lookup ----------
+    def _fresh(self, namespace: str, key: tuple) -> Optional[dict]:
+        entry = self._entries[namespace].get(key)
+        if entry is None:
+            return None
+        if time.time() - entry["created"] >= self.ttl[namespace]:
+            del self._entries[namespace][key]
+            self._vectors.pop((namespace, key), None)
+            return None
+        self._entries[namespace].move_to_end(key)
+        return entry
+
+    def _similar(self, text: str, fingerprint: str):
+        """Closest cached chat wording with the same fingerprint and numbers, as (namespace, key), or None."""
+        wanted = numbers(text)
+        candidates = [("chat", key) for key in self._entries["chat"]
+                      if key[0] == fingerprint and numbers(key[1]) == wanted]
+        if not candidates:
+            return None
+        if self.fuzzy_ratio is not None:
+            texts = [key[1] for _, key in candidates]
+            if process is not None:
+                match = process.extractOne(text, texts, scorer=fuzz.ratio, score_cutoff=self.fuzzy_ratio)
+                if match:
+                    return candidates[match[2]]
+            else:
+                close = difflib.get_close_matches(text, texts, n=1, cutoff=self.fuzzy_ratio / 100)
+                if close:
+                    return candidates[texts.index(close[0])]
+        if self.embedder is not None:
+            import numpy as np
+            query = np.asarray(self.embedder([text])[0], dtype=np.float32)
+            query /= float(np.linalg.norm(query)) or 1.0
+            best, best_sim = None, self.min_similarity
+            for candidate in candidates:
+                vector = self._vectors.get(candidate)
+                sim = float(vector @ query) if vector is not None else -1.0
+                if sim >= best_sim:
+                    best, best_sim = candidate, sim
+            return best
+        return None
+
+    def get(self, user_text: str, fingerprint: str) -> Optional[list]:
+        """Cached actions for `user_text` under `fingerprint`, or None."""
+        text = normalize(user_text)
+        if not text or is_context_dependent(user_text):
+            return None
+        key = (fingerprint, text)
+        with self._lock:
+            for namespace in ("chat", "run"):
+                entry = self._fresh(namespace, key)
+                if entry is not None:
+                    self.hits += 1
+                    return [dict(a) for a in entry["actions"]]
+            similar = self._similar(text, fingerprint)
+            entry = self._fresh(*similar) if similar else None
+            if entry is not None:
+                self.hits += 1
+                return [dict(a) for a in entry["actions"]]
+            self.misses += 1
+            return None
+
+    def put(self, user_text: str, fingerprint: str, actions: list) -> bool:
+        """Cache `actions` unless they have side effects or are a fallback reply. Returns whether they were stored."""
+        text = normalize(user_text)
+        if not text or not actions or is_context_dependent(user_text) \
+                or any(has_side_effects(a) or a.get("fallback") for a in actions):
+            return False
+        namespace = "chat" if all(a.get("mode") == "chat" for a in actions) else "run"
+        key = (fingerprint, text)
+        stored = [{k: v for k, v in a.items() if k != "spoken"} for a in actions]
+        with self._lock:
+            entries = self._entries[namespace]
+            entries[key] = {"fingerprint": fingerprint, "text": text, "actions": stored, "created": time.time()}
+            entries.move_to_end(key)
+            self._embed(namespace, key)
+            while len(entries) > self.max_entries:
+                old_key, _ = entries.popitem(last=False)
+                self._vectors.pop((namespace, old_key), None)
+            self._save()
+        return True
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses,
+                    "chat_entries": len(self._entries["chat"]), "run_entries": len(self._entries["run"])}
+
+    def clear(self) -> None:
+        with self._lock:
+            for entries in self._entries.values():
+                entries.clear()
+            self._vectors.clear()
+            self._save()
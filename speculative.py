@@ -0,0 +1,173 @@
+"""
+Speculative Module for MARVIN AI Assistant
+Starts the GPT request on the stable prefix of a partial transcript and commits it if the final text is the same
+"""
+
+import threading
+import time
+from typing import Callable, Iterable, Optional
+
+from fast_intent import normalize
+
+# ========== Configuration Constants ==========
+DEFAULT_MIN_WORDS = 3      # Don't speculate on fragments shorter than this
+
+
+class Cancelled(Exception):
+    """Raised inside a speculative request once it has been cancelled."""
+
+
+def cancellable(chunks: Iterable, cancel: Optional[threading.Event], on_cancel: Optional[Callable] = None):
+    """Yield from `chunks` until `cancel` is set; then call `on_cancel` (e.g. close the stream) and raise Cancelled."""
+    for chunk in chunks:
+        if cancel is not None and cancel.is_set():
+            if on_cancel:
+                on_cancel()
+            raise Cancelled()
+        yield chunk
+
+
+def stable_prefix(previous: str, current: str) -> str:
+    """Words two consecutive partial transcripts agree on; the recognizer is unlikely to revise them."""
+    words = []
+    for old, new in zip(normalize(previous).split(), normalize(current).split()):
+        if old != new:
+            break
+        words.append(new)
+    return " ".join(words)
+
+
+class _Speculation:
+    """One in-flight request on a prefix. Sentences are buffered until it is committed."""
+
+    def __init__(self, text: str):
+        self.text = text
+        self.cancel = threading.Event()
+        self.started = time.perf_counter()
+        self.finished: Optional[float] = None
+        self.result = None
+        self.error: Optional[BaseException] = None
+        self.done = threading.Event()
+        self._sentences = []
+        self._sink: Optional[Callable] = None
+        self._lock = threading.Lock()
+
+    def emit(self, sentence: str) -> None:
+        with self._lock:
+            if self.cancel.is_set():
+                return
+            if self._sink is None:
+                self._sentences.append(sentence)
+                return
+        self._sink(sentence)
+
+    def commit(self, sink: Optional[Callable]) -> None:
+        """Replay buffered sentences to `sink` and pass later ones straight through."""
+        with self._lock:
+            buffered, self._sentences = self._sentences, []
+            self._sink = sink or (lambda sentence: None)
+        for sentence in buffered:
+            self._sink(sentence)
+
+
+class SpeculativeDecoder:
+    """
+    Speculative-decode controller around a decide(text, on_sentence, cancel) function.
+
+    Feed it partial transcripts with `feed()`: once consecutive partials agree
+    on at least `min_words` words, a request for that stable prefix starts on a
+    background thread (replacing any earlier one that no longer matches).
+    `finish()` takes the final transcript: if it normalizes to exactly the
+    speculated text (near-misses like "12 times 13" vs "12 times 135" ask a
+    different question) the in-flight result is committed (its buffered sentences are replayed to
+    `on_sentence`), otherwise the speculation is cancelled and the request is
+    issued again for the final text. Nothing is spoken or recorded before
+    commit, so `decide` must be free of side effects.
+    """
+
+    def __init__(self, decide: Callable, min_words: int = DEFAULT_MIN_WORDS):
+        self.decide = decide
+        self.min_words = min_words
+        self.started = 0
+        self.committed = 0
+        self.cancelled = 0
+        self.requests = 0       # finish() calls
+        self.saved_seconds = 0.0
+        self._partial = ""
+        self._current: Optional[_Speculation] = None
+        self._lock = threading.Lock()
+
+    # ---------- Speculation ----------
+    def _run(self, spec: _Speculation) -> None:
+        try:
+            spec.result = self.decide(spec.text, spec.emit, spec.cancel)
+        except Exception as e:  # Includes Cancelled; a failed speculation is simply reissued
+            spec.error = e
+        spec.finished = time.perf_counter()
+        spec.done.set()
+
+    def _drop(self, spec: Optional[_Speculation]) -> None:
+        """Cancel `spec` (caller holds the lock)."""
+        if spec is not None and not spec.cancel.is_set():
+            spec.cancel.set()
+            self.cancelled += 1
+
+    def feed(self, partial: str) -> None:
+        """Take the next partial transcript; may start (or restart) a speculative request."""
+        with self._lock:
+            prefix = stable_prefix(self._partial, partial)
+            self._partial = partial
+            if len(prefix.split()) < self.min_words:
+                return
+            current = self._current
+            if current is not None and current.text == prefix:
+                return
+            self._drop(current)
+            spec = _Speculation(prefix)
+            self._current = spec
+            self.started += 1
+        threading.Thread(target=self._run, args=(spec,), name="speculative-decode", daemon=True).start()
+
+    def reset(self) -> None:
+        """Cancel any speculation and forget the partial transcript (e.g. the user stopped talking)."""
+        with self._lock:
+            self._drop(self._current)
+            self._current = None
+            self._partial = ""
+
+    # ---------- Commit ----------
+    def finish(self, final: str, on_sentence: Optional[Callable] = None):
+        """Result for the final transcript: the committed speculation if it is the same text, else a fresh request."""
+        with self._lock:
+            spec, self._current, self._partial = self._current, None, ""
+            self.requests += 1
+            matches = spec is not None and spec.text == normalize(final)
+            if spec is not None and not matches:
+                self._drop(spec)
+        if matches:
+            finished_at = time.perf_counter()
+            spec.commit(on_sentence)
+            spec.done.wait()
+            if spec.error is None:
+                # Perceived latency saved: the work already done when the final transcript arrived
+                saved = min(finished_at, spec.finished) - spec.started
+                with self._lock:
+                    self.committed += 1
+                    self.saved_seconds += saved
+                return spec.result
+            # The speculative request failed; a fresh one reports the error if it persists
+            with self._lock:
+                self.cancelled += 1
+        return self.decide(final, on_sentence, threading.Event())
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "speculations": self.started,
+                "committed": self.committed,
+                "cancelled": self.cancelled,
+                "commit_rate": self.committed / self.requests if self.requests else 0.0,
+                "saved_ms": self.saved_seconds * 1000,
+                "avg_saved_ms": self.saved_seconds * 1000 / self.committed if self.committed else 0.0,
+            }
@@ -0,0 +1,191 @@
+"""
+Speech Streaming Module for MARVIN AI Assistant
+Pulls the "say" reply out of a streamed JSON response and speaks it sentence by sentence while it arrives
+"""
+
+import queue
+import re
+import threading
+import time
+from typing import Callable, Iterable, Optional
+
+# ========== Configuration Constants ==========
+MIN_SENTENCE_CHARS = 12  # Don't hand the TTS tiny fragments like "Hi." on their own
+SENTENCE_END = re.compile(r"[.!?…]+[\"')\]]*\s+|\n+")
+_ESCAPES = {'"': '"', "\\": "\\", "/": "/", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+
+
+class JsonFieldStream:
+    """
+    Incrementally decodes one top-level string field of a streamed JSON object.
+
+    `feed(chunk)` returns the newly decoded characters of that field's value
+    (escapes resolved), so text can be used before the JSON is complete. The
+    other top-level string fields are captured whole in `fields`.
+    """
+
+    def __init__(self, field: str = "say"):
+        self.field = field
+        self.fields: dict = {}
+        self._state = "seek_key"  # seek_key -> key -> seek_value -> value -> seek_key ...
+        self._key = []
+        self._value = []
+        self._escape = None       # None, "" (after a backslash) or the collected \\u hex digits
+        self._pending_surrogate = None
+
+    def feed(self, chunk: str) -> str:
+        out = []
+        for ch in chunk:
+            state = self._state
+            if state == "seek_key":
+                if ch == '"':
+                    self._state, self._key = "key", []
+            elif state == "key":
+                if ch == '"':
+                    self._state = "seek_value"
+                else:
+                    self._key.append(ch)
+            elif state == "seek_value":
+                if ch == '"':
+                    self._state, self._value = "value", []
+                elif ch not in " \t\r\n:":
+                    self._state = "other_value"  # Non-string value: skip to the next key
+            elif state == "other_value":
+                if ch in ",}":
+                    self._state = "seek_key"
+            elif state == "value":
+                text = self._value_char(ch)
+                if text is None:
+                    self.fields["".join(self._key)] = "".join(self._value)
+                    self._state = "seek_key"
+                elif text:
+                    self._value.append(text)
+                    if "".join(self._key) == self.field:
+                        out.append(text)
+        return "".join(out)
+
+    def _value_char(self, ch: str) -> Optional[str]:
+        """Decode one character of a string value; None marks the closing quote."""
+        if self._escape is None:
+            if ch == "\\":
+                self._escape = ""
+                return ""
+            return None if ch == '"' else ch
+        if self._escape == "" and ch != "u":
+            self._escape = None
+            return _ESCAPES.get(ch, ch)
+        if self._escape == "":
+            self._escape = "u"
+            return ""
+        self._escape += ch
+        if len(self._escape) < 5:
+            return ""
+        try:
+            code = int(self._escape[1:], 16)
+        except ValueError:
+            code = 0xFFFD  # Malformed escape: keep going with a replacement character
+        self._escape = None
+        if 0xD800 <= code < 0xDC00:
+            self._pending_surrogate = code
+            return ""
+        if 0xDC00 <= code < 0xE000 and self._pending_surrogate is not None:
+            code = 0x10000 + ((self._pending_surrogate - 0xD800) << 10) + (code - 0xDC00)
+            self._pending_surrogate = None
+        return chr(code)
+
+
+class SentenceSplitter:
+    """Buffers streamed text and yields complete sentences as soon as they end."""
+
+    def __init__(self, min_chars: int = MIN_SENTENCE_CHARS):
+        self.min_chars = min_chars
+        self._buffer = ""
+
+    def feed(self, text: str) -> list:
+        self._buffer += text
+        sentences = []
+        start = 0
+        for match in SENTENCE_END.finditer(self._buffer):
+            candidate = self._buffer[start:match.end()].strip()
+            if len(candidate) >= self.min_chars:
+                sentences.append(candidate)
+                start = match.end()
+        self._buffer = self._buffer[start:]
+        return sentences
+
+    def flush(self) -> list:
+        rest, self._buffer = self._buffer.strip(), ""
+        return [rest] if rest else []
+
+
+class SpeechQueue:
+    """
+    Speaks queued sentences on a background thread, in order.
+
+    The first sentence starts playing while later ones are still being
+    generated; `wait()` blocks until everything queued has been spoken.
+    """
+
+    def __init__(self, speak: Callable[[str], None]):
+        self.speak = speak
+        self.first_audio_at: Optional[float] = None
+        self._queue: queue.Queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            sentence = self._queue.get()
+            try:
+                if sentence is None:
+                    return
+                if self.first_audio_at is None:
+                    self.first_audio_at = time.perf_counter()
+                self.speak(sentence)
+            except Exception as e:
+                print(f"TTS Error: {e}")
+            finally:
+                self._queue.task_done()
+
+    def put(self, sentence: str) -> None:
+        self._queue.put(sentence)
+
+    def wait(self) -> None:
+        self._queue.join()
+
+    def close(self) -> None:
+        self._queue.put(None)
+        self._thread.join()
+
+
+def stream_say(chunks: Iterable[str], on_sentence: Callable[[str], None],
+               field: Optional[str] = "say") -> str:
+    """
+    Consume streamed text chunks, passing each finished sentence of the reply to `on_sentence`.
+
+    With `field`, the stream is a JSON object and only that string field is
+    spoken; with `field=None` the whole stream is plain text. Returns the full
+    streamed content.
+    """
+    extractor = JsonFieldStream(field) if field else None
+    splitter = SentenceSplitter()
+    content = []
+    for chunk in chunks:
+        content.append(chunk)
+        text = extractor.feed(chunk) if extractor else chunk
+        for sentence in splitter.feed(text):
+            on_sentence(sentence)
+    for sentence in splitter.flush():
+        on_sentence(sentence)
+    return "".join(content)
+
+
+def openai_text_chunks(stream, usage_sink: Optional[Callable] = None):
+    """Yield content deltas from an OpenAI chat completion stream; pass the final usage to `usage_sink`."""
+    for chunk in stream:
+        if getattr(chunk, "usage", None) is not None and usage_sink is not None:
+            usage_sink(chunk.usage)
+        if chunk.choices:
+            delta = chunk.choices[0].delta.content
+            if delta:
+                yield delta
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Test script for MARVIN's token-budgeted conversation history
+"""
+
+import os
+import shutil
+import tempfile
+import threading
+
+import conversation
+from conversation import (ConversationHistory, SUMMARY_PREFIX, build_messages, count_tokens, estimate_tokens,
+                          history_text)
+
+
+def test_window_stays_within_budget():
+    """Long sessions and long replies never push the window past its token budget"""
+    print("💬 Testing conversation history budget")
+    history = ConversationHistory(token_budget=200, max_messages=50)
+    for i in range(100):
+        history.add("user", f"question number {i} about the weather in town")
+        history.add("assistant", f"answer number {i}: it is sunny and warm today")
+        assert history.tokens <= 200
+    assert history.messages()[-1]["content"].startswith("answer number 99")
+    print(f"✅ {len(history)} recent messages kept in {history.tokens} tokens")
+
+    history.add("assistant", "very long command output " * 500)
+    assert history.tokens <= 200
+    assert history.messages()[-1]["content"].endswith("[truncated]")
+    assert count_tokens(history.messages()[-1]["content"]) <= 110
+    print("✅ A single long reply is truncated instead of flushing the window")
+
+    capped = ConversationHistory(token_budget=10_000, max_messages=4)
+    for i in range(10):
+        capped.add("user", f"hi {i}")
+    assert [m["content"] for m in capped.messages()] == ["hi 6", "hi 7", "hi 8", "hi 9"]
+    print("✅ Message count cap still applies")
+
+    blocky = ConversationHistory(token_budget=10_000, max_messages=8, evict_ratio=0.5)
+    prefixes = []
+    for i in range(20):
+        blocky.add("user", f"hi {i}")
+        prefixes.append(blocky.messages()[0]["content"])
+    assert len(blocky) <= 8
+    changes = sum(1 for a, b in zip(prefixes, prefixes[1:]) if a != b)
+    assert changes <= 4, f"window start moved on {changes} of 19 turns"
+    print(f"✅ Block eviction keeps the history prefix stable (moved {changes} times in 20 turns)")
+
+
+def test_evicted_turns_fold_into_summary():
+    """Evicted turns reach the summarizer in order and come back as a system message"""
+    seen = []
+    release = threading.Event()
+
+    def summarizer(summary, messages):
+        release.wait(5)
+        seen.extend(m["content"] for m in messages)
+        return f"{summary} {' '.join(m['content'] for m in messages)}".strip()
+
+    history = ConversationHistory(token_budget=40, max_messages=4, summarizer=summarizer)
+    for i in range(8):
+        history.add("user", f"turn {i}")
+    assert len(history) == 4
+    assert history.messages()[0]["content"] == "turn 4", "summary must not block add()"
+    release.set()
+    history.wait(5)
+    assert seen == [f"turn {i}" for i in range(4)]
+    first = history.messages()[0]
+    assert first["role"] == "system" and first["content"] == SUMMARY_PREFIX + "turn 0 turn 1 turn 2 turn 3"
+    print("✅ Evicted turns were summarized in the background")
+
+    def failing(summary, messages):
+        raise RuntimeError("offline")
+
+    history = ConversationHistory(token_budget=40, max_messages=2, summarizer=failing)
+    for i in range(6):
+        history.add("user", f"turn {i}")
+        history.wait(5)
+    assert history.summary == ""
+    assert [m["content"] for m in history.messages()] == ["turn 4", "turn 5"]
+    print("✅ Summarizer failures leave the window intact")
+
+
+def test_history_survives_restart():
+    """The log restores the latest window and summary lazily and stays compact"""
+    tmp = tempfile.mkdtemp(prefix="marvin_history_")
+    try:
+        path = os.path.join(tmp, "history.jsonl")
+        history = ConversationHistory(token_budget=10_000, max_messages=4, log_path=path,
+                                      summarizer=lambda summary, messages: "user said hello")
+        for i in range(50):
+            history.add("user", f"turn {i}")
+            history.wait(5)
+        with open(path, encoding="utf-8") as f:
+            lines = f.readlines()
+        assert len(lines) < 4 * 4, f"log should be compacted, has {len(lines)} lines"
+
+        with open(path, "a", encoding="utf-8") as f:
+            f.write('{"type":"turn","role":"user","con')  # Torn line from a crash
+        restored = ConversationHistory(token_budget=10_000, max_messages=4, log_path=path)
+        assert restored._turns == [], "nothing should be read at construction"
+        messages = restored.messages()
+        assert messages[0]["content"] == SUMMARY_PREFIX + "user said hello"
+        assert [m["content"] for m in messages[1:]] == ["turn 46", "turn 47", "turn 48", "turn 49"]
+        print("✅ Restart restored the summary and the latest window")
+
+        restored.clear()
+        assert ConversationHistory(log_path=path).messages() == []
+        print("✅ Clearing history also clears the log")
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def test_message_builder_payload():
+    """The current utterance is sent once, after the history, and replies are stored as spoken"""
+    history = ConversationHistory()
+    assert build_messages("SYS", history, "hello") == [
+        {"role": "system", "content": "SYS"},
+        {"role": "user", "content": "hello"},
+    ]
+
+    history.add("user", "hello")
+    history.add("assistant", history_text({"mode": "chat", "command": "", "say": "Hi there!"}))
+    history.add("user", "list files")
+    history.add("assistant", history_text({"mode": "run", "command": "ls -la", "say": ""}))
+    history.summary = "User greeted Marvin."
+    assert build_messages("SYS", history, "thanks") == [
+        {"role": "system", "content": "SYS"},
+        {"role": "system", "content": SUMMARY_PREFIX + "User greeted Marvin."},
+        {"role": "user", "content": "hello"},
+        {"role": "assistant", "content": "Hi there!"},
+        {"role": "user", "content": "list files"},
+        {"role": "assistant", "content": "Ran: ls -la"},
+        {"role": "user", "content": "thanks"},
+    ]
+    assert build_messages("SYS", history, "thanks", context="CWD: /home")[-2:] == [
+        {"role": "system", "content": "CWD: /home"},
+        {"role": "user", "content": "thanks"},
+    ]
+    print("✅ Message builder sends each utterance exactly once")
+
+
+def test_unloadable_encoding_falls_back_to_estimate():
+    """If tiktoken is installed but can't fetch its encoding (offline), counting uses the byte estimate"""
+    class OfflineTiktoken:
+        def encoding_for_model(self, model):
+            raise KeyError(model)
+
+        def get_encoding(self, name):
+            raise ConnectionError("cannot download " + name)
+
+    saved, saved_encodings = conversation.tiktoken, dict(conversation._ENCODINGS)
+    conversation.tiktoken = OfflineTiktoken()
+    conversation._ENCODINGS.clear()
+    try:
+        assert count_tokens("hello there", "some-new-model") == estimate_tokens("hello there")
+        history = ConversationHistory(model="some-new-model")
+        history.add("user", "hi")
+        assert history.messages() == [{"role": "user", "content": "hi"}]
+    finally:
+        conversation.tiktoken = saved
+        conversation._ENCODINGS.clear()
+        conversation._ENCODINGS.update(saved_encodings)
+    print("✅ Offline tiktoken falls back to the byte estimate")
+
+
+if __name__ == "__main__":
+    test_window_stays_within_budget()
+    test_evicted_turns_fold_into_summary()
+    test_history_survives_restart()
+    test_message_builder_payload()
+    test_unloadable_encoding_falls_back_to_estimate()
+    print("\n🎉 Conversation history tests completed!")
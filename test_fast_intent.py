@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Test script for MARVIN's local fast-path intent classifier
+"""
+
+import json
+
+from fast_intent import FastIntentClassifier
+
+
+def test_routine_requests_answered_locally():
+    """Close matches become decisions; OS-specific commands come from the template table"""
+    print("⚡ Testing fast-path intents")
+    calls = []
+    values = {"time": lambda: calls.append("time") or "09:41 AM", "date": lambda: calls.append("date") or "17/10/2026"}
+    linux = FastIntentClassifier(system="Linux")
+    assert linux.decide("Hey Marvin, what time is it?", values)["say"] == "It's 09:41 AM."
+    assert calls == ["time"], "only the template's own fields are evaluated"
+    assert linux.decide("open chrome please")["command"].startswith("google-chrome")
+    assert FastIntentClassifier(system="Windows").decide("list the files here")["command"] == "dir"
+    assert FastIntentClassifier(system="Plan9").decide("list the files here") is None
+    print("✅ Routine requests are answered with OS-correct commands")
+
+    for text in ("what time is it in tokyo", "open chrome and search for cats", "tell me a joke", "",
+                 "open home", "show devices", "list filters", "show file", "show me the fines"):
+        assert linux.decide(text, values) is None, text
+    print("✅ Near misses fall through to GPT")
+
+
+def test_corpus_never_answers_wrongly():
+    """On the labelled corpus the fast path is precise and handles most routine requests"""
+    with open("intent_corpus.json", "r", encoding="utf-8") as f:
+        corpus = json.load(f)
+    classifier = FastIntentClassifier(system="Linux")
+    routine = [item for item in corpus if item["intent"]]
+    predicted = [(item, classifier.classify(item["text"])[0]) for item in corpus]
+    wrong = [item["text"] for item, intent in predicted if intent is not None and intent != item["intent"]]
+    hits = sum(1 for item, intent in predicted if item["intent"] and intent == item["intent"])
+    assert not wrong, wrong
+    assert hits >= 0.8 * len(routine), f"{hits}/{len(routine)} routine utterances matched"
+    print(f"✅ Corpus: {hits}/{len(routine)} routine utterances answered locally, none wrongly")
+
+
+if __name__ == "__main__":
+    test_routine_requests_answered_locally()
+    test_corpus_never_answers_wrongly()
+    print("\n🎉 Fast intent tests completed!")
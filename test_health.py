@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Test script for MARVIN's background health checks
+"""
+
+import threading
+import time
+
+from health import HealthCheck, start_all
+
+
+def test_probes_run_concurrently_in_background():
+    """start() returns immediately; two slow probes overlap instead of adding up"""
+    print("🩺 Testing background health checks")
+    release = threading.Event()
+
+    def slow_probe():
+        release.wait(2)
+
+    def failing_probe():
+        release.wait(2)
+        raise ConnectionError("connection refused")
+
+    checks = [HealthCheck("cloud", slow_probe), HealthCheck("local", failing_probe)]
+    started = time.perf_counter()
+    start_all(checks)
+    assert time.perf_counter() - started < 0.1, "starting the checks must not block"
+    assert [c.status() for c in checks] == [None, None], "unknown until a probe finishes"
+    release.set()
+    for check in checks:
+        assert check.wait(2)
+    assert checks[0].status() is True
+    assert checks[1].status() is False and "connection refused" in checks[1].error
+    print("✅ Probes ran concurrently without blocking startup")
+
+
+def test_result_cached_and_refreshed_by_requests():
+    """A fresh result skips the probe; real requests update it; failures expire sooner"""
+    calls = []
+    check = HealthCheck("svc", lambda: calls.append(1), ttl=0.3, failure_ttl=0.05)
+    assert check.check(timeout=1) is True
+    assert check.check(timeout=1) is True
+    assert not check.start()
+    assert len(calls) == 1, "cached result reused within the TTL"
+
+    check.record(False, "HTTP 503")
+    assert check.status() is False and check.error == "HTTP 503"
+    time.sleep(0.1)
+    assert check.status() is None, "failures expire after failure_ttl"
+    check.record(True)
+    assert check.check(timeout=1) is True and len(calls) == 1, "a successful request counts as a probe"
+    time.sleep(0.35)
+    assert check.check(timeout=1) is True and len(calls) == 2, "stale results are probed again"
+    print("✅ Results cached with a TTL and refreshed by real requests")
+
+
+if __name__ == "__main__":
+    test_probes_run_concurrently_in_background()
+    test_result_cached_and_refreshed_by_requests()
+    print("\n🎉 Health check tests completed!")
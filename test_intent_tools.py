@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Test script for MARVIN's tool-calling intent router
+"""
+
+from types import SimpleNamespace as NS
+
+from conversation import history_text
+from intent_tools import TOOLS, ToolCallCollector
+from speech_stream import stream_say
+
+
+def _chunk(content=None, tool_calls=None, usage=None):
+    choices = [] if usage else [NS(delta=NS(content=content, tool_calls=tool_calls))]
+    return NS(choices=choices, usage=usage)
+
+
+def _fragment(index, name=None, arguments=""):
+    return NS(index=index, function=NS(name=name, arguments=arguments))
+
+
+def test_tool_schemas_are_strict():
+    """Every tool is strict with all properties required, so arguments always parse"""
+    print("🧰 Testing tool-calling router")
+    for tool in TOOLS:
+        function = tool["function"]
+        params = function["parameters"]
+        assert function["strict"] and params["additionalProperties"] is False
+        assert sorted(params["required"]) == sorted(params["properties"]), function["name"]
+    print(f"✅ {len(TOOLS)} strict tool schemas")
+
+
+def test_streamed_reply_and_several_tool_calls():
+    """Text deltas are spoken while tool-call fragments are assembled into ordered actions"""
+    stream = [
+        _chunk(content="Sure thing. "),
+        _chunk(content="Opening Chrome and noting that now."),
+        _chunk(tool_calls=[_fragment(0, "run_command", '{"comm')]),
+        _chunk(tool_calls=[_fragment(0, None, 'and": "google-chrome"}'),
+                           _fragment(1, "memory", '{"action": "remember_note", ')]),
+        _chunk(tool_calls=[_fragment(1, None, '"text": "buy milk", "key": ""}')]),
+        _chunk(tool_calls=[_fragment(2, "camera", '{"action": "fly"}')]),  # Off-schema: dropped
+        _chunk(usage=NS(prompt_tokens=900)),
+    ]
+    calls, spoken, usage = ToolCallCollector(), [], []
+    content = stream_say(calls.wrap(iter(stream), usage.append), spoken.append, field=None)
+    assert spoken == ["Sure thing. Opening Chrome and noting that now."]
+    assert usage[0].prompt_tokens == 900
+
+    actions = calls.actions(content, spoken=True)
+    assert [a["mode"] for a in actions] == ["chat", "run", "memory"]
+    assert actions[0]["spoken"] and actions[1]["command"] == "google-chrome"
+    assert (actions[2]["action"], actions[2]["text"]) == ("remember_note", "buy milk")
+    assert history_text(actions[2]) == "Memory remember_note: buy milk"
+    print("✅ One round trip produced a spoken reply plus two actions")
+
+
+def test_whole_message_tool_calls():
+    """Non-streamed responses carry complete tool calls"""
+    message_calls = [NS(function=NS(name="camera", arguments='{"action": "describe"}'))]
+    calls = ToolCallCollector()
+    calls.add_message(message_calls)
+    assert calls.actions("") == [{"mode": "camera", "action": "describe", "command": "", "say": ""}]
+    print("✅ Whole-message tool calls become actions")
+
+
+if __name__ == "__main__":
+    test_tool_schemas_are_strict()
+    test_streamed_reply_and_several_tool_calls()
+    test_whole_message_tool_calls()
+    print("\n🎉 Intent tool tests completed!")
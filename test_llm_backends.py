@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Test script for MARVIN's pluggable LLM backends and routing policies
+"""
+
+import asyncio
+import threading
+import time
+
+from llm_backends import (BackendError, LLMBackend, LLMRouter, LocalFirst, OllamaBackend, OpenAIBackend,
+                          SingleBackend, TaskSplit)
+from mock_llm_server import MockConfig, MockLLMServer
+from speculative import Cancelled
+
+
+class FakeBackend(LLMBackend):
+    """Streams `reply` word by word after `ttft` seconds, or raises `error`."""
+
+    def __init__(self, name, reply="Hello there. How can I help?", ttft=0.0, error=None):
+        super().__init__()
+        self.name = name
+        self.reply = reply
+        self.ttft = ttft
+        self.error = error
+        self.calls = 0
+
+    def _stream(self, messages, **options):
+        self.calls += 1
+        time.sleep(self.ttft)
+        for i, word in enumerate(self.reply.split(" ")):
+            if self.error and i == 3:
+                raise self.error
+            yield word if i == 0 else " " + word
+        if self.error:
+            raise self.error
+
+
+class RecordingClient:
+    def __init__(self):
+        self.args = None
+
+    def stream_chat(self, messages, options=None, format=None):
+        self.args = (messages, options, format)
+        return iter(['{"mode": ', '"chat"}'])
+
+
+def test_backend_interface_and_metrics():
+    """Sync, streaming and async calls share one interface and are timed per backend"""
+    print("🔀 Testing LLM backends")
+    backend = FakeBackend("local", ttft=0.02)
+    sentences = []
+    assert backend.complete([], sentences.append) == "Hello there. How can I help?"
+    assert sentences == ["Hello there.", "How can I help?"]
+    assert "".join(backend.stream([])) == "Hello there. How can I help?"
+    assert asyncio.run(backend.acomplete([])) == "Hello there. How can I help?"
+    summary = backend.metrics.summary()
+    assert summary["calls"] == 3 and summary["errors"] == 0 and summary["p50_ttft_ms"] >= 20
+
+    client = RecordingClient()
+    assert OllamaBackend(client).complete([{"role": "user", "content": "hi"}],
+                                          max_tokens=64, temperature=0, json_mode=True) == '{"mode": "chat"}'
+    assert client.args[1:] == ({"num_predict": 64, "temperature": 0}, "json")
+
+    decision = FakeBackend("local", reply='{"mode": "chat", "command": "", "say": "Hello there. How can I help?"}')
+    sentences = []
+    assert LLMRouter(SingleBackend(decision)).complete([], on_sentence=sentences.append, field="say").startswith("{")
+    assert sentences == ["Hello there.", "How can I help?"], "only the JSON field is spoken"
+    print("✅ Sync, streaming and async calls timed per backend; options mapped for Ollama; JSON field spoken")
+
+
+def test_local_first_demotes_slow_backend():
+    """Local goes first until it misses the SLO, then the cloud leads until the retry window ends"""
+    local, cloud = FakeBackend("local", ttft=0.06), FakeBackend("cloud")
+    policy = LocalFirst(local, cloud, slo_ms=30, retry_after=0.1)
+    router = LLMRouter(policy)
+    router.complete([])
+    assert router.last_backend is local
+    router.complete([])
+    assert router.last_backend is cloud, "local was over its SLO"
+    time.sleep(0.12)
+    local.ttft = 0.0
+    router.complete([])
+    assert router.last_backend is local, "local is retried after retry_after"
+    router.complete([])
+    assert router.last_backend is local, "and judged only on calls since the retry"
+    assert router.stats()["local"]["calls"] == 3
+    print("✅ Local-first routing demotes and re-promotes on latency")
+
+
+def test_fallback_and_task_split():
+    """Failures fall through to the next backend unless speech already started; tasks map to backends"""
+    broken = FakeBackend("local", error=ConnectionError("refused"))
+    cloud = FakeBackend("cloud")
+    router = LLMRouter(LocalFirst(broken, cloud))
+    assert router.complete([]) == "Hello there. How can I help?" and router.last_backend is cloud
+    assert broken.metrics.errors == 1
+
+    spoken = []
+    late_failure = FakeBackend("local", reply="Hello there. Two three four.", error=ConnectionError("dropped"))
+    try:
+        LLMRouter(TaskSplit({}, default=late_failure)).complete([], on_sentence=spoken.append)
+        assert False, "a single failing backend must raise"
+    except BackendError as e:
+        assert isinstance(e.__cause__, ConnectionError)
+    spoken.clear()
+    late_failure = FakeBackend("local", reply="Hello there. Two three four.", error=ConnectionError("dropped"))
+    try:
+        LLMRouter(LocalFirst(late_failure, cloud)).complete([], on_sentence=spoken.append)
+        assert False, "no fallback once part of the reply was spoken"
+    except BackendError:
+        assert spoken == ["Hello there."]
+    print("✅ Failures fall back to the next backend, but never after speech started")
+
+    local, cloud = FakeBackend("local", reply='{"mode": "chat"}'), FakeBackend("cloud")
+    split = LLMRouter(TaskSplit({"intent": local, "chat": cloud}, default=local))
+    assert split.complete([], task="intent") == '{"mode": "chat"}' and split.last_backend is local
+    assert split.complete([], task="chat").startswith("Hello") and split.last_backend is cloud
+    assert asyncio.run(split.acomplete([], task="chat")).startswith("Hello")
+    assert LLMRouter(SingleBackend(local)).stats() == {"local": local.metrics.summary()}
+    print("✅ Intents go to the local model, long-form chat to the cloud")
+
+
+def test_cancel_tools_and_usage():
+    """Cancelling is not a failure; tool calls only go to backends that support them; usage is reported"""
+    local, cloud = FakeBackend("local", ttft=0.05), FakeBackend("cloud")
+    cloud.supports_tools = True
+    router = LLMRouter(LocalFirst(local, cloud))
+    cancel = threading.Event()
+    cancel.set()
+    try:
+        router.complete([], cancel=cancel)
+        assert False, "a cancelled request must raise Cancelled"
+    except Cancelled:
+        assert cloud.calls == 0 and local.metrics.errors == 0, "no fallback, no error recorded"
+    assert router.complete([], tools=[{"type": "function"}]).startswith("Hello") and router.last_backend is cloud
+    assert local.calls == 1, "the local backend was skipped for a tool-calling request"
+
+    with MockLLMServer(MockConfig(token_rate=1000)) as server:
+        usage = []
+        backend = OpenAIBackend("gpt-4o-mini", api_key="test", base_url=server.openai_base_url)
+        assert backend.complete([{"role": "user", "content": "hi"}], on_usage=usage.append)
+        assert usage and usage[-1].prompt_tokens > 0
+    print("✅ Cancellation, tool-capable routing and usage reporting")
+
+
+if __name__ == "__main__":
+    test_backend_interface_and_metrics()
+    test_local_first_demotes_slow_backend()
+    test_fallback_and_task_split()
+    test_cancel_tools_and_usage()
+    print("\n🎉 LLM backend tests completed!")
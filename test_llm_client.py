@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Test script for MARVIN's shared OpenAI client: connection reuse, retries and timeouts
+"""
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import llm_client
+
+COMPLETION = {
+    "id": "chatcmpl-test", "object": "chat.completion", "created": 0, "model": "gpt-4o-mini",
+    "choices": [{"index": 0, "finish_reason": "stop",
+                 "message": {"role": "assistant", "content": "pong"}}],
+    "usage": {"prompt_tokens": 3, "completion_tokens": 1, "total_tokens": 4},
+}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep-alive
+    failures_left = 0
+    ports = set()
+    requests = 0
+
+    def do_POST(self):
+        cls = type(self)
+        cls.requests += 1
+        cls.ports.add(self.client_address[1])
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if cls.failures_left:
+            cls.failures_left -= 1
+            body, status = b'{"error": {"message": "slow down"}}', 429
+        else:
+            body, status = json.dumps(COMPLETION).encode(), 200
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("retry-after-ms", "10")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def test_client_is_shared_pooled_and_retries():
+    """One client per key, one pooled connection across calls, 429s retried"""
+    print("🔌 Testing shared OpenAI client")
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        base_url = f"http://127.0.0.1:{server.server_port}/v1"
+        client = llm_client.get_client(api_key="test-key", base_url=base_url)
+        assert llm_client.get_client(api_key="test-key", base_url=base_url) is client
+        assert client.max_retries == llm_client.MAX_RETRIES
+        assert client.timeout.connect == llm_client.CONNECT_TIMEOUT
+        assert client.timeout.read == llm_client.READ_TIMEOUT
+
+        for _ in range(3):
+            reply = client.chat.completions.create(model="gpt-4o-mini",
+                                                   messages=[{"role": "user", "content": "ping"}])
+            assert reply.choices[0].message.content == "pong"
+        assert len(_Handler.ports) == 1, f"expected one keep-alive connection, saw {len(_Handler.ports)}"
+        print("✅ Three calls shared one pooled connection")
+
+        _Handler.failures_left = 2
+        before = _Handler.requests
+        reply = client.chat.completions.create(model="gpt-4o-mini", messages=[{"role": "user", "content": "ping"}])
+        assert reply.choices[0].message.content == "pong"
+        assert _Handler.requests - before == 3
+        print("✅ Rate-limited calls were retried")
+    finally:
+        llm_client.close_clients()
+        server.shutdown()
+        server.server_close()
+
+
+if __name__ == "__main__":
+    test_client_is_shared_pooled_and_retries()
+    print("\n🎉 LLM client tests completed!")
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Multiprocess stress test for MARVIN's memory store: concurrent writers must not lose facts
+"""
+
+import multiprocessing
+import os
+import shutil
+import tempfile
+
+from memory_store import open_memory_store
+
+WORKERS = 4
+FACTS_PER_WORKER = 50
+
+
+def _worker(path, backend, worker_id, options):
+    store = open_memory_store(path, backend=backend, **options)
+    for i in range(FACTS_PER_WORKER):
+        store.remember_fact(f"worker {worker_id} fact {i}")
+        if i % 10 == 0:
+            store.recall_facts()  # Interleave reads so refreshes race with writes
+    store.close()
+
+
+def _hammer(backend, **options):
+    tmp = tempfile.mkdtemp(prefix="marvin_stress_")
+    try:
+        path = os.path.join(tmp, "memory.json")
+        ctx = multiprocessing.get_context("spawn")
+        procs = [ctx.Process(target=_worker, args=(path, backend, w, options))
+                 for w in range(WORKERS)]
+        for p in procs:
+            p.start()
+        for p in procs:
+            p.join(timeout=120)
+            assert p.exitcode == 0, f"worker exited with {p.exitcode}"
+
+        store = open_memory_store(path, backend=backend)
+        contents = [f["content"] for f in store.entries("fact")]
+        store.close()
+        expected = {f"worker {w} fact {i}" for w in range(WORKERS) for i in range(FACTS_PER_WORKER)}
+        assert len(contents) == len(expected), f"{backend}: {len(contents)} of {len(expected)} facts"
+        assert set(contents) == expected, f"{backend}: facts lost or duplicated"
+        print(f"✅ {backend} backend {options}: "
+              f"{len(contents)} facts from {WORKERS} processes, none lost")
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def test_json_backend_concurrent_writers():
+    """Every write saves immediately: maximum lock contention on marvin_memory.json"""
+    _hammer("json", flush_delay=0)
+
+
+def test_json_backend_batched_writers():
+    """Batched background flushes must still merge other processes' saves"""
+    _hammer("json", flush_delay=0.01)
+
+
+def test_journal_backend_concurrent_writers():
+    """Journal appends from several processes, including compactions"""
+    _hammer("journal", flush_delay=0, compact_after=25)
+
+
+if __name__ == "__main__":
+    print("🧠 Stress-testing memory with concurrent processes")
+    test_json_backend_concurrent_writers()
+    test_json_backend_batched_writers()
+    test_journal_backend_concurrent_writers()
+    print("\n🎉 Memory concurrency tests completed!")
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Test script for MARVIN's relevance-ranked memory retrieval
+"""
+
+import os
+import shutil
+import tempfile
+
+from memory_retrieval import BM25Index, MemoryRetriever
+from memory_store import MemoryStore
+
+
+def test_bm25_ranking():
+    """BM25 ranks the matching document first and tolerates misheard terms"""
+    print("🔎 Testing BM25 memory index")
+    index = BM25Index()
+    index.add(1, "My sister lives in Berlin")
+    index.add(2, "I play the guitar every evening")
+    index.add(3, "My dentist appointment is on Friday")
+
+    assert index.search("where does my sister live")[0][1] == 1
+    assert index.search("guitar")[0][1] == 2
+    assert index.search("dentst appointment")[0][1] == 3
+    assert index.search("the") == []
+
+    index.remove(2)
+    assert index.search("guitar") == []
+    print("✅ BM25 ranking, fuzzy matching and removal work")
+
+
+def test_retriever_budget_and_incremental_sync():
+    """Only relevant memories are injected, within the token budget"""
+    tmp = tempfile.mkdtemp(prefix="marvin_mem_")
+    try:
+        store = MemoryStore(os.path.join(tmp, "memory.json"), flush_delay=60)
+        store.remember_fact("My favorite color is blue")
+        store.remember_fact("I work as a software developer")
+        store.set_preference("coffee", "black, no sugar")
+        retriever = MemoryRetriever(store, top_k=3, token_budget=200)
+
+        summary = retriever.summary("what color should I paint the room")
+        assert "favorite color is blue" in summary
+        assert "software developer" not in summary and "coffee" not in summary
+        assert retriever.summary("tell me a joke") == "No relevant memories"
+
+        store.remember_note("Buy coffee beans on the way home")
+        entries = retriever.retrieve("make me a coffee")
+        assert {e["kind"] for e in entries} == {"note", "pref"}
+        assert len(retriever.index) == 4
+        print("✅ New entries are indexed incrementally")
+
+        tight = retriever.retrieve("coffee", token_budget=8)
+        assert len(tight) == 1
+        print("✅ Token budget caps the injected memories")
+        store.close()
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def test_vector_memory_incremental_and_persistent():
+    """Semantic index appends new entries and reopens from the memory-mapped files"""
+    try:
+        from memory_vectors import HashingEmbedder, VectorMemory
+    except ImportError:
+        print("⚠️ numpy not installed - skipping vector memory test")
+        return
+    tmp = tempfile.mkdtemp(prefix="marvin_vec_")
+    try:
+        prefix = os.path.join(tmp, "memory")
+        store = MemoryStore(f"{prefix}.json", flush_delay=60)
+        store.remember_fact("My sister lives in Berlin")
+        store.remember_fact("I play the guitar every evening")
+        vectors = VectorMemory(store, prefix, embedder=HashingEmbedder())
+        assert vectors.sync() == 2
+
+        store.remember_note("Guitar lesson moved to Thursday")
+        assert vectors.sync() == 1, "only the new entry should be embedded"
+        assert vectors.search("guitars")[0][1] in {("fact", 1), ("note", 0)}
+        print("✅ New entries are embedded incrementally")
+
+        store.flush()
+        reopened_store = MemoryStore(f"{prefix}.json", flush_delay=60)
+        reopened = VectorMemory(reopened_store, prefix, embedder=HashingEmbedder())
+        assert len(reopened.index) == 3
+        assert reopened.sync() == 0, "persisted vectors should be reused"
+        assert reopened.search("berlin sister")[0][1] == ("fact", 0)
+        print("✅ Vectors reload from the memory-mapped .npy file")
+
+        retriever = MemoryRetriever(reopened_store, top_k=2, vectors=reopened)
+        assert "Berlin" in retriever.summary("where is my sister")
+        print("✅ Retriever fuses keyword and semantic rankings")
+        store.close()
+        reopened_store.close()
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    test_bm25_ranking()
+    test_retriever_budget_and_incremental_sync()
+    test_vector_memory_incremental_and_persistent()
+    print("\n🎉 Memory retrieval tests completed!")
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Test script for MARVIN's in-process memory store
+"""
+
+import json
+import os
+import shutil
+import tempfile
+import time
+
+from memory_retention import RetentionPolicy
+from memory_store import JournalBackend, MemoryStore, open_memory_store
+
+
+def _temp_dir():
+    return tempfile.mkdtemp(prefix="marvin_mem_")
+
+
+def test_reads_served_from_ram():
+    """Writes are visible immediately and the file is only written on flush"""
+    print("🧠 Testing write-behind memory store")
+    tmp = _temp_dir()
+    try:
+        path = os.path.join(tmp, "memory.json")
+        store = MemoryStore(path, flush_delay=60)
+
+        store.remember_fact("My favorite color is blue")
+        store.remember_note("Buy milk")
+        store.set_preference("theme", "dark")
+
+        assert [f["content"] for f in store.recall_facts()] == ["My favorite color is blue"]
+        assert [n["content"] for n in store.recall_notes()] == ["Buy milk"]
+        assert store.get_preferences()["theme"]["value"] == "dark"
+        assert store.version == 3
+        assert not os.path.exists(path), "write should be deferred to the debounce window"
+        print("✅ Reads served from RAM before flush")
+
+        assert store.flush()
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        assert len(data["facts"]) == 1 and len(data["notes"]) == 1
+        assert "last_updated" in data
+        print("✅ Explicit flush persisted the batch")
+
+        reopened = MemoryStore(path, flush_delay=60)
+        assert reopened.recall_facts()[0]["content"] == "My favorite color is blue"
+        store.close()
+        reopened.close()
+        print("✅ Reloaded store sees flushed data")
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def test_background_flush():
+    """The debounce timer saves a burst of writes without an explicit flush"""
+    tmp = _temp_dir()
+    try:
+        path = os.path.join(tmp, "memory.json")
+        store = MemoryStore(path, flush_delay=0.05)
+        for i in range(20):
+            store.remember_fact(f"fact {i}")
+
+        deadline = time.time() + 2
+        while not os.path.exists(path) and time.time() < deadline:
+            time.sleep(0.01)
+        time.sleep(0.1)
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        assert len(data["facts"]) == 20
+        store.close()
+        print("✅ Background flush wrote all batched facts")
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def test_journal_replay_and_compaction():
+    """Journal writes append one line per op and survive a restart and compaction"""
+    tmp = _temp_dir()
+    try:
+        legacy = os.path.join(tmp, "memory.json")
+        with open(legacy, "w", encoding="utf-8") as f:
+            json.dump({"facts": [{"content": "imported", "timestamp": "2024-01-01T00:00:00"}],
+                       "preferences": {}, "notes": []}, f)
+
+        store = open_memory_store(legacy, backend="journal", flush_delay=60, compact_after=5)
+        assert store.recall_facts()[0]["content"] == "imported"
+        store.remember_fact("one")
+        store.set_preference("drink", "coffee")
+        store.flush()
+        assert os.path.exists(store.backend.snapshot_path), "first save snapshots the import"
+
+        journal = store.backend.journal_path
+        store.remember_fact("two")
+        store.remember_fact("three")
+        store.flush()
+        with open(journal, "r", encoding="utf-8") as f:
+            assert len(f.readlines()) == 2
+        print("✅ Each write appended one journal line")
+
+        replayed = open_memory_store(legacy, backend="journal", flush_delay=60)
+        assert [f["content"] for f in replayed.recall_facts()] == ["imported", "one", "two", "three"]
+        assert replayed.get_preferences()["drink"]["value"] == "coffee"
+        print("✅ Startup replayed the journal")
+
+        for i in range(3):
+            store.remember_note(f"note {i}")
+        store.flush()
+        assert os.path.getsize(journal) == 0, "journal should be truncated after compaction"
+        assert os.path.exists(store.backend.snapshot_path)
+
+        compacted = MemoryStore(legacy, flush_delay=60,
+                                backend=JournalBackend(os.path.join(tmp, "memory")))
+        assert len(compacted.recall_facts(10)) == 4
+        assert len(compacted.recall_notes(10)) == 3
+        print("✅ Compaction folded the journal into the snapshot")
+
+        exported = os.path.join(tmp, "export.json")
+        assert compacted.export_json(exported)
+        with open(exported, "r", encoding="utf-8") as f:
+            assert len(json.load(f)["notes"]) == 3
+        print("✅ Export wrote the legacy JSON format")
+        for s in (store, replayed, compacted):
+            s.close()
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def test_sqlite_backend_and_search():
+    """SQLite backend migrates the JSON file, recalls in order and searches with FTS"""
+    tmp = _temp_dir()
+    try:
+        legacy = os.path.join(tmp, "memory.json")
+        with open(legacy, "w", encoding="utf-8") as f:
+            json.dump({"facts": [
+                {"content": "My sister lives in Berlin", "timestamp": "2024-01-01T00:00:00"},
+                {"content": "I play the guitar", "timestamp": "2024-01-02T00:00:00"},
+            ], "preferences": {"drink": {"value": "coffee", "timestamp": "2024-01-01T00:00:00"}},
+                "notes": []}, f)
+
+        store = open_memory_store(legacy, backend="sqlite")
+        store.remember_fact("My dog is called Rex")
+        store.remember_note("Call my sister on Sunday")
+
+        assert [f["content"] for f in store.recall_facts(2)] == ["I play the guitar", "My dog is called Rex"]
+        assert store.get_preferences()["drink"]["value"] == "coffee"
+        print("✅ SQLite recall returns the latest facts oldest-first")
+
+        matches = [m["content"] for m in store.search("sister")]
+        assert set(matches) == {"My sister lives in Berlin", "Call my sister on Sunday"}
+        assert store.search("what about berlin?")[0]["content"] == "My sister lives in Berlin"
+        assert store.search("") == []
+        print("✅ SQLite search finds entries by topic")
+
+        json_store = MemoryStore(legacy, flush_delay=60)
+        assert json_store.search("guitar")[0]["content"] == "I play the guitar"
+        json_store.close()
+        store.close()
+        print("✅ JSON store supports the same search API")
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def test_retention_prunes_hot_tier_into_archive():
+    """Old, excess and duplicate entries leave the hot tier; archived ones stay searchable"""
+    tmp = _temp_dir()
+    try:
+        old = {"content": "I used to live in Paris", "timestamp": "2001-01-01T00:00:00"}
+        facts = [old] + [{"content": f"fact number {i} about topic {i * 37}",
+                          "timestamp": f"2099-01-01T00:00:{i:02d}"} for i in range(8)]
+        facts.append({"content": "Fact number 7 about topic 259", "timestamp": "2099-01-01T00:01:00"})
+        for backend in ("json", "sqlite"):
+            path = os.path.join(tmp, backend, "memory.json")
+            os.makedirs(os.path.dirname(path))
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump({"facts": facts, "preferences": {}, "notes": []}, f)
+            policy = RetentionPolicy(max_entries=5, max_age_days=365, dedupe_ratio=95)
+            store = open_memory_store(path, backend=backend, flush_delay=60, retention=policy)
+            generation = store.generation
+            assert store.enforce_retention()
+            hot = [f["content"] for f in store.entries("fact")]
+            assert len(hot) == 5, hot
+            assert hot[-1] == "Fact number 7 about topic 259", "newest duplicate should survive"
+            assert "fact number 7 about topic 259" not in hot
+            assert store.generation > generation
+            assert store.search("paris") == []
+            assert store.search_archive("paris")[0]["content"] == "I used to live in Paris"
+            print(f"✅ {backend} retention archived old/excess facts and dropped duplicates")
+            store.close()
+
+        reopened = MemoryStore(os.path.join(tmp, "json", "memory.json"), flush_delay=60)
+        assert len(reopened.entries("fact")) == 5
+        reopened.close()
+
+        # Within the caps a startup pass is a no-op: nothing deduped, archived or rewritten
+        path = os.path.join(tmp, "json", "memory.json")
+        before = os.stat(path).st_mtime_ns
+        store = MemoryStore(path, flush_delay=60, retention=RetentionPolicy(max_entries=5))
+        assert store.enforce_retention()
+        assert os.stat(path).st_mtime_ns == before and len(store.entries("fact")) == 5
+        store.close()
+        print("✅ Retention within the caps leaves the store untouched")
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    test_reads_served_from_ram()
+    test_background_flush()
+    test_journal_replay_and_compaction()
+    test_sqlite_backend_and_search()
+    test_retention_prunes_hot_tier_into_archive()
+    print("\n🎉 Memory store tests completed!")
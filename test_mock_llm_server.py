@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Test script for the mock LLM server, driven by Marvin's own OpenAI and Ollama clients
+"""
+
+import json
+
+import openai
+
+import llm_client
+from mock_llm_server import MockConfig, MockLLMServer
+from ollama_client import ModelWarmup, OllamaClient, OllamaError, close_sessions
+from speech_stream import openai_text_chunks
+
+
+def test_openai_endpoints():
+    """Chat (plain, JSON, vision, streamed), model lookup and transcription through the real SDK"""
+    print("🧪 Testing mock LLM server")
+    with MockLLMServer(MockConfig(reply="Mars is red. It has two moons.")) as server:
+        client = llm_client.get_client(api_key="test-key", base_url=server.openai_base_url)
+        try:
+            assert client.models.retrieve("gpt-4o-mini").id == "gpt-4o-mini"
+            reply = client.chat.completions.create(model="gpt-4o-mini",
+                                                   messages=[{"role": "user", "content": "Tell me about Mars"}])
+            assert reply.choices[0].message.content == "Mars is red. It has two moons."
+            assert reply.usage.completion_tokens == 7
+
+            decision = client.chat.completions.create(model="gpt-4o-mini", response_format={"type": "json_object"},
+                                                      messages=[{"role": "user", "content": "hi"}])
+            assert json.loads(decision.choices[0].message.content)["mode"] == "chat"
+
+            image = [{"type": "text", "text": "What is in this image?"},
+                     {"type": "image_url", "image_url": {"url": "data:image/jpeg;base64,AAAA"}}]
+            vision = client.chat.completions.create(model="gpt-4o-mini", messages=[{"role": "user", "content": image}])
+            assert "desk" in vision.choices[0].message.content
+
+            usage = []
+            stream = client.chat.completions.create(model="gpt-4o-mini", stream=True,
+                                                    stream_options={"include_usage": True},
+                                                    messages=[{"role": "user", "content": "Tell me about Mars"}])
+            assert "".join(openai_text_chunks(stream, usage.append)) == "Mars is red. It has two moons."
+            assert usage and usage[-1].total_tokens > 7
+
+            transcript = client.audio.transcriptions.create(model="whisper-1", file=("audio.wav", b"RIFF0000WAVE"))
+            assert transcript.text == "what time is it"
+            print("✅ OpenAI chat, JSON, vision, streaming, models and transcription")
+        finally:
+            llm_client.close_clients()
+
+
+def test_ollama_endpoints_and_simulation():
+    """NDJSON streaming, model load + keep_alive, and prompt evaluation outside the cached prefix"""
+    config = MockConfig(token_rate=100, load_ms=200, prompt_ms_per_token=1.0)
+    with MockLLMServer(config) as server:
+        client = OllamaClient(server.url, "gpt-oss:20b", keep_alive="30m")
+        try:
+            assert "gpt-oss:20b" in client.tags()
+            warmup = ModelWarmup(client)
+            warmup.start()
+            assert warmup.wait(2) and warmup.stats["load_ms"] >= 200
+            print("✅ Empty-prompt warm-up pays the model load once")
+
+            history = [{"role": "system", "content": "You are Marvin. " * 50},
+                       {"role": "user", "content": "What is the capital of France?"}]
+            reply = client.chat(history)
+            first = dict(client.last_stats)
+            assert reply.startswith("This is a mock reply") and first["load_ms"] == 0, "model already resident"
+            assert first["tokens"] == len(reply.split()) and 50 < first["tokens_per_sec"] <= 100
+            history += [{"role": "assistant", "content": reply}, {"role": "user", "content": "And Germany?"}]
+            client.chat(history)
+            second = client.last_stats
+            assert second["prompt_tokens"] < first["prompt_tokens"] / 2, "shared prefix is not re-evaluated"
+            print(f"✅ Turn 2 evaluated {second['prompt_tokens']} of its prompt tokens "
+                  f"(turn 1: {first['prompt_tokens']})")
+
+            assert client.generate("hi", options={"num_predict": 3}) == "This is a"
+            try:
+                OllamaClient(server.url, "missing").generate("hi")
+                assert False, "unknown models must fail"
+            except OllamaError as e:
+                assert "not found" in str(e)
+            assert server.stats()["requests"]["/api/chat"] == 2
+        finally:
+            close_sessions()
+
+
+def test_latency_and_error_injection():
+    """Fixed latency before the first byte; injected 5xx errors are retried by the SDK, then surface"""
+    with MockLLMServer(MockConfig(latency_ms=100)) as server:
+        client = OllamaClient(server.url, "gpt-oss:20b")
+        try:
+            client.generate("hi")
+            assert client.last_stats["ttft_ms"] >= 100
+        finally:
+            close_sessions()
+
+    with MockLLMServer(MockConfig(error_rate=1.0, error_status=503)) as server:
+        client = llm_client.get_client(api_key="test-key", base_url=server.openai_base_url)
+        try:
+            client.with_options(max_retries=1).chat.completions.create(
+                model="gpt-4o-mini", messages=[{"role": "user", "content": "hi"}])
+            assert False, "every request fails"
+        except openai.InternalServerError as e:
+            assert e.status_code == 503
+        finally:
+            llm_client.close_clients()
+        assert server.stats()["injected_errors"] == 2, "one attempt plus one retry"
+
+    # The same seed injects errors into the same requests
+    outcomes = []
+    for _ in range(2):
+        with MockLLMServer(MockConfig(error_rate=0.5, seed=7)) as server:
+            client = OllamaClient(server.url, "gpt-oss:20b")
+            run = []
+            for _ in range(6):
+                try:
+                    client.generate("hi")
+                    run.append(True)
+                except OllamaError:
+                    run.append(False)
+            outcomes.append(run)
+            close_sessions()
+    assert outcomes[0] == outcomes[1] and not all(outcomes[0]) and any(outcomes[0])
+    print("✅ Latency, error injection and deterministic failures")
+
+
+if __name__ == "__main__":
+    test_openai_endpoints()
+    test_ollama_endpoints_and_simulation()
+    test_latency_and_error_injection()
+    print("\n🎉 Mock LLM server tests completed!")
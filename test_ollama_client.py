@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Test script for MARVIN's streaming Ollama client: NDJSON streaming, keep_alive and connection reuse
+"""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from ollama_client import ModelWarmup, OllamaClient, OllamaError, close_sessions
+
+TOKENS = ["Mars ", "is ", "red. ", "It ", "has ", "two ", "moons."]
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep-alive
+    ports = set()
+    bodies = []
+    load_seconds = 0.0
+
+    def do_POST(self):
+        cls = type(self)
+        cls.ports.add(self.client_address[1])
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+        cls.bodies.append(body)
+        if body.get("stream") is False:  # Warm-up: empty prompt, model load only
+            time.sleep(cls.load_seconds)
+            data = json.dumps({"done": True, "done_reason": "load", "load_duration": 250_000_000}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+            return
+        if body["model"] == "missing":
+            lines = [{"error": "model 'missing' not found"}]
+        elif self.path == "/api/chat":
+            lines = [{"message": {"role": "assistant", "content": t}, "done": False} for t in TOKENS]
+            lines.append({"message": {"role": "assistant", "content": ""}, "done": True,
+                          "eval_count": len(TOKENS), "prompt_eval_count": 5})
+        else:
+            lines = [{"response": t, "done": False} for t in TOKENS]
+            lines.append({"response": "", "done": True, "eval_count": len(TOKENS),
+                          "eval_duration": 70_000_000, "prompt_eval_count": 12})
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for line in lines:
+            data = (json.dumps(line) + "\n").encode()
+            self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+            self.wfile.flush()
+            time.sleep(0.01)
+        self.wfile.write(b"0\r\n\r\n")
+
+    def log_message(self, *args):
+        pass
+
+
+def test_streaming_keep_alive_and_stats():
+    """Sentences arrive while streaming, the model is pinned, the connection is reused"""
+    print("🦙 Testing streaming Ollama client")
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        client = OllamaClient(f"http://127.0.0.1:{server.server_port}", "gpt-oss:20b", keep_alive="30m")
+        sentences = []
+        reply = client.generate("Tell me about Mars", lambda s: sentences.append((s, time.perf_counter())))
+        done = time.perf_counter()
+        assert reply == "Mars is red. It has two moons."
+        assert [s for s, _ in sentences] == ["Mars is red.", "It has two moons."]
+        assert done - sentences[0][1] >= 0.03, "first sentence was passed on before the reply finished"
+        body = _Handler.bodies[-1]
+        assert body["stream"] is True and body["keep_alive"] == "30m" and body["model"] == "gpt-oss:20b"
+        print("✅ Sentences streamed with keep_alive set")
+
+        stats = client.last_stats
+        assert stats["tokens"] == len(TOKENS) and stats["prompt_tokens"] == 12
+        assert abs(stats["tokens_per_sec"] - 100.0) < 1e-6, "server eval counters are used when present"
+        assert 0 < stats["ttft_ms"] < stats["total_ms"]
+        print(f"✅ First token after {stats['ttft_ms']:.0f} ms, {stats['tokens_per_sec']:.0f} tokens/s")
+
+        assert client.generate("again") == "Mars is red. It has two moons."
+        assert len(_Handler.ports) == 1, f"expected one keep-alive connection, saw {len(_Handler.ports)}"
+        print("✅ Calls share one pooled connection")
+
+        messages = [{"role": "system", "content": "SYS"}, {"role": "user", "content": "Tell me about Mars"}]
+        assert client.chat(messages) == "Mars is red. It has two moons."
+        assert _Handler.bodies[-1]["messages"] == messages and client.last_stats["prompt_tokens"] == 5
+        print("✅ /api/chat replies stream from message content")
+
+        try:
+            OllamaClient(client.base_url, "missing").generate("hi")
+            assert False, "stream errors must raise"
+        except OllamaError as e:
+            assert "not found" in str(e)
+        print("✅ Errors in the stream raise OllamaError")
+    finally:
+        close_sessions()
+        server.shutdown()
+        server.server_close()
+
+
+def test_warmup_readiness():
+    """Warm-up loads the model in the background; only early callers wait for it"""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        _Handler.load_seconds = 0.2
+        client = OllamaClient(f"http://127.0.0.1:{server.server_port}", "gpt-oss:20b", keep_alive="30m")
+        warmup = ModelWarmup(client)
+        started = time.perf_counter()
+        warmup.start()
+        assert time.perf_counter() - started < 0.1 and not warmup.ready, "warm-up runs in the background"
+        assert warmup.wait(2) and warmup.ready and warmup.error is None
+        body = _Handler.bodies[-1]
+        assert body["prompt"] == "" and body["keep_alive"] == "30m"
+        assert warmup.stats["load_ms"] == 250
+        assert warmup.wait(0), "later callers don't wait at all"
+        print("✅ Model warmed up in the background with an empty prompt")
+    finally:
+        _Handler.load_seconds = 0.0
+        close_sessions()
+        server.shutdown()
+        server.server_close()
+
+    # No server yet: connection errors are retried until max_wait, then readiness is released with the error
+    unreachable = ModelWarmup(OllamaClient("http://127.0.0.1:9"), max_wait=0.3, retry_seconds=0.1)
+    unreachable.start()
+    assert unreachable.wait(2) and unreachable.error
+    close_sessions()
+    print("✅ Unreachable server: warm-up gives up without blocking callers forever")
+
+
+if __name__ == "__main__":
+    test_streaming_keep_alive_and_stats()
+    test_warmup_readiness()
+    print("\n🎉 Ollama client tests completed!")
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Test script for MARVIN's background PATH executable index
+"""
+
+import os
+import shutil
+import stat
+import tempfile
+
+from path_index import PathIndex
+
+
+def _make_tool(directory, name):
+    path = os.path.join(directory, name + (".exe" if os.name == "nt" else ""))
+    with open(path, "w") as f:
+        f.write("#!/bin/sh\n")
+    os.chmod(path, os.stat(path).st_mode | stat.S_IXUSR)
+
+
+def test_index_is_complete_and_cached():
+    """Every executable is indexed once; warm starts rescan only changed directories"""
+    print("🗂️ Testing PATH index")
+    tmp = tempfile.mkdtemp(prefix="marvin_path_")
+    old_path = os.environ.get("PATH", "")
+    try:
+        first, second = os.path.join(tmp, "a"), os.path.join(tmp, "b")
+        os.makedirs(first)
+        os.makedirs(second)
+        for i in range(600):
+            _make_tool(first, f"tool{i:03d}")
+        _make_tool(second, "tool000")  # Shadowed duplicate
+        _make_tool(second, "special")
+        with open(os.path.join(second, "readme.txt"), "w") as f:
+            f.write("not executable")
+        os.environ["PATH"] = os.pathsep.join([first, second, first])
+        cache = os.path.join(tmp, "index.json")
+
+        index = PathIndex(cache).start()
+        assert index.wait(10)
+        assert len(index) == 601 and len(index.names()) == 601, "no 500-entry cap, no duplicates"
+        assert index.names()[-1] == "special"
+        assert index.has("special") and index.has("tool599") and not index.has("readme.txt")
+        print(f"✅ Indexed {len(index)} executables from 3 PATH entries")
+
+        warm = PathIndex(cache)
+        assert warm.refresh() == 0, "unchanged directories come from the cache"
+        assert warm.has("tool599")
+        _make_tool(second, "newtool")
+        os.utime(second, ns=(1, 1))
+        assert warm.refresh() == 1 and warm.has("newtool")
+        print("✅ Warm start rescanned only the changed directory")
+
+        assert warm.missing_program("nosuchtool --flag") == "nosuchtool"
+        assert warm.missing_program("special --flag | nosuchtool") is None
+        assert warm.missing_program("FOO=1 sudo newtool") is None
+        assert warm.missing_program("cd /tmp && nosuchtool") is None
+        assert warm.missing_program("nosuchtool || special") is None
+        assert PathIndex().missing_program("nosuchtool") is None, "unknown until the first scan"
+        assert warm.missing_program("sudo -u postgres special -c 'select 1'") is None, "wrapper options skipped"
+        assert warm.missing_program("sudo -u postgres nosuchtool") == "nosuchtool"
+        assert warm.missing_program("env -u HOME nice -n 10 nohup special") is None
+        print("✅ Proposed commands are checked against the index")
+
+        if os.name != "nt":
+            # Programs the login shell resolves (its own PATH, aliases, functions) are never refused
+            shell = os.path.join(tmp, "loginsh")
+            with open(shell, "w") as f:
+                f.write('#!/bin/sh\ncase "$2" in *loginonly*) exit 0;; esac\nexit 1\n')
+            os.chmod(shell, 0o755)
+            login = PathIndex(cache, login_shell=shell)
+            login.refresh()
+            assert login.missing_program("loginonly --flag") is None
+            assert login.missing_program("nosuchtool") == "nosuchtool"
+            print("✅ Programs only the login shell knows are allowed")
+    finally:
+        os.environ["PATH"] = old_path
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    test_index_is_complete_and_cached()
+    print("\n🎉 PATH index tests completed!")
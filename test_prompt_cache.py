@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Test script for MARVIN's system prompt component caches
+"""
+
+import os
+import shutil
+import tempfile
+
+from prompt_cache import KeyedCache, PromptCache, UsageStats, cwd_key, path_key
+
+
+def test_keyed_cache_counts_hits_and_misses():
+    """Values are recomputed only when the key changes"""
+    print("🧩 Testing prompt component caches")
+    calls = []
+    cache = KeyedCache()
+    compute = lambda: calls.append(1) or len(calls)
+    assert cache.get("a", compute) == 1
+    assert cache.get("a", compute) == 1
+    assert cache.get("b", compute) == 2
+    assert (cache.hits, cache.misses) == (1, 2)
+
+    prompt = PromptCache()
+    prompt.memory.get((1, 0, "hi"), lambda: "No relevant memories")
+    prompt.memory.get((1, 0, "hi"), lambda: "unused")
+    assert prompt.stats()["memory"] == {"hits": 1, "misses": 1}
+    assert prompt.stats()["prefix"] == {"hits": 0, "misses": 0}
+    print("✅ Hit/miss counters track recomputation")
+
+
+def test_usage_stats_record_cached_tokens():
+    """Cached-token counts are read from object or dict usage payloads"""
+    class Details:
+        cached_tokens = 1024
+
+    class Usage:
+        prompt_tokens = 1500
+        prompt_tokens_details = Details()
+
+    usage = UsageStats()
+    assert usage.record(Usage(), 0.4) == {"prompt_tokens": 1500, "cached_tokens": 1024, "latency_ms": 400.0}
+    usage.record({"prompt_tokens": 1500, "prompt_tokens_details": None}, 0.8)
+    usage.record(None, 0.1)
+    summary = usage.summary()
+    assert summary["turns"] == 3 and summary["cached_tokens"] == 1024
+    assert summary["avg_latency_ms_cached"] == 400.0
+    assert round(summary["avg_latency_ms_uncached"]) == 450
+    print("✅ Usage stats record cached prompt tokens per turn")
+
+
+def test_keys_follow_filesystem_changes():
+    """Adding a binary to a PATH directory or a file to the CWD changes the key"""
+    tmp = tempfile.mkdtemp(prefix="marvin_prompt_")
+    old_cwd, old_path = os.getcwd(), os.environ.get("PATH", "")
+    try:
+        bin_dir = os.path.join(tmp, "bin")
+        os.makedirs(bin_dir)
+        os.environ["PATH"] = bin_dir
+        os.chdir(tmp)
+        before_path, before_cwd = path_key(), cwd_key()
+        assert path_key() == before_path and cwd_key() == before_cwd
+
+        with open(os.path.join(bin_dir, "tool"), "w") as f:
+            f.write("#!/bin/sh\n")
+        os.utime(bin_dir, ns=(1, 1))  # Make the mtime change visible on coarse-grained filesystems
+        assert path_key() != before_path
+        os.environ["PATH"] = bin_dir + os.pathsep + tmp
+        assert path_key() != before_path
+
+        with open(os.path.join(tmp, "notes.txt"), "w") as f:
+            f.write("hi")
+        os.utime(tmp, ns=(1, 1))
+        assert cwd_key() != before_cwd
+        print("✅ PATH and directory keys change with the filesystem")
+    finally:
+        os.chdir(old_cwd)
+        os.environ["PATH"] = old_path
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    test_keyed_cache_counts_hits_and_misses()
+    test_keys_follow_filesystem_changes()
+    test_usage_stats_record_cached_tokens()
+    print("\n🎉 Prompt cache tests completed!")
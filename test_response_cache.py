@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Test script for MARVIN's response cache
+"""
+
+import os
+import shutil
+import tempfile
+import time
+
+from response_cache import ResponseCache
+
+CHAT = [{"mode": "chat", "command": "", "say": "Mars is about 225 million km away.", "spoken": True}]
+RUN = [{"mode": "run", "command": "df -h", "say": ""}]
+
+
+def test_hits_misses_and_namespaces():
+    """Exact hits under the same fingerprint; chat and run stored separately"""
+    print("♻️ Testing response cache")
+    tmp = tempfile.mkdtemp(prefix="marvin_cache_")
+    try:
+        path = os.path.join(tmp, "cache.json")
+        cache = ResponseCache(path)
+        assert cache.get("How far away is Mars?", "fp1") is None
+        assert cache.put("How far away is Mars?", "fp1", CHAT)
+        assert cache.put("show disk usage", "fp1", RUN)
+
+        hit = cache.get("how far away is mars", "fp1")
+        assert hit == [{"mode": "chat", "command": "", "say": "Mars is about 225 million km away."}]
+        assert cache.get("how far away is mars?", "fp2") is None, "fingerprint is part of the key"
+        assert cache.get("how far away's mars", "fp1") is None, "fuzzy lookup is off by default"
+        assert cache.get("how far away is the moon", "fp1") is None
+        assert cache.stats() == {"hits": 1, "misses": 4, "chat_entries": 1, "run_entries": 1}
+        print("✅ Exact hits, fingerprint-scoped")
+
+        reloaded = ResponseCache(path)
+        assert reloaded.get("show disk usage", "fp1") == RUN
+        print("✅ Entries persist across restarts")
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def test_fuzzy_lookup():
+    """Opt-in fuzzy hits need the same numbers, and never return a run decision"""
+    cache = ResponseCache(fuzzy_ratio=92)
+    cache.put("How far away is Mars?", "fp", CHAT)
+    assert cache.get("how far away's mars", "fp") is not None, "near-identical wording is a fuzzy hit"
+
+    cache.put("what is 12 times 13", "fp", [{"mode": "chat", "command": "", "say": "156"}])
+    assert cache.get("what is 12 times 14", "fp") is None, "a different number is a different question"
+    cache.put("set volume to 30 percent", "fp", [{"mode": "run", "command": "amixer set Master 30%", "say": ""}])
+    assert cache.get("set volume to 80 percent", "fp") is None
+    assert cache.get("set the volume to 30 percent", "fp") is None, "run decisions only match exactly"
+    assert cache.get("set volume to 30 percent", "fp") is not None
+    print("✅ Fuzzy hits keep numbers and commands exact")
+
+
+def test_side_effects_context_lru_and_ttl():
+    """Side effects and follow-ups are never cached; LRU and TTL evict old entries"""
+    cache = ResponseCache(max_entries=2, run_ttl=0.05)
+    assert not cache.put("clean up my downloads", "fp", [{"mode": "run", "command": "rm -rf ~/Downloads/*"}])
+    assert not cache.put("install requests", "fp", [{"mode": "run", "command": "pip install requests"}])
+    assert not cache.put("remember i like tea", "fp", [{"mode": "memory", "action": "remember_fact"}])
+    assert not cache.put("which of those is biggest", "fp", RUN)
+    launch = [{"mode": "run", "command": "google-chrome", "say": ""}]
+    for reply in ("yes", "go ahead", "do it", "why", "ok sure"):
+        assert not cache.put(reply, "fp", launch), f"{reply!r} only means something after the last turn"
+    assert not cache.put("blorp the flibbet", "fp", [{"mode": "chat", "command": "", "say": "Sorry...", "fallback": True}])
+    print("✅ Side-effecting commands, fallback replies, follow-ups and bare replies are not cached")
+
+    cache.put("show disk usage", "fp", RUN)
+    time.sleep(0.1)
+    assert cache.get("show disk usage", "fp") is None, "run decisions expire after run_ttl"
+
+    cache.put("question one", "fp", CHAT)
+    cache.put("question two", "fp", CHAT)
+    cache.get("question one", "fp")
+    cache.put("question three", "fp", CHAT)
+    assert cache.get("question one", "fp") is not None
+    assert cache.get("question two", "fp") is None, "least recently used entry is evicted"
+    print("✅ TTL and LRU eviction")
+
+
+def test_embedding_lookup():
+    """With an embedder, paraphrases close in vector space are hits"""
+    try:
+        from memory_vectors import HashingEmbedder
+    except ImportError:
+        print("⏭️ numpy not installed, skipping embedding lookup")
+        return
+    cache = ResponseCache(fuzzy_ratio=None, embedder=HashingEmbedder(), min_similarity=0.7)
+    cache.put("tell me the distance to mars", "fp", CHAT)
+    assert cache.get("tell me the distance to planet mars", "fp") is not None
+    assert cache.get("write a poem about the sea", "fp") is None
+    print("✅ Embedding similarity finds paraphrases")
+
+
+if __name__ == "__main__":
+    test_hits_misses_and_namespaces()
+    test_fuzzy_lookup()
+    test_side_effects_context_lru_and_ttl()
+    test_embedding_lookup()
+    print("\n🎉 Response cache tests completed!")
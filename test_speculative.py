@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Test script for MARVIN's speculative decoding on partial transcripts
+"""
+
+import time
+
+from speculative import Cancelled, SpeculativeDecoder, cancellable, stable_prefix
+
+
+class FakeModel:
+    """decide(text, on_sentence, cancel): streams two sentences over `latency` seconds, honouring cancel."""
+
+    def __init__(self, latency=0.2):
+        self.latency = latency
+        self.calls = []
+        self.cancelled = []
+
+    def _chunks(self, text):
+        for sentence in (f"Answer to {text}.", "Done."):
+            time.sleep(self.latency / 2)
+            yield sentence
+
+    def __call__(self, text, on_sentence, cancel):
+        self.calls.append(text)
+        try:
+            for sentence in cancellable(self._chunks(text), cancel):
+                if on_sentence:
+                    on_sentence(sentence)
+        except Cancelled:
+            self.cancelled.append(text)
+            raise
+        return {"mode": "chat", "say": f"Answer to {text}."}
+
+
+def test_stable_prefix():
+    assert stable_prefix("what is the", "what is the weather") == "what is the"
+    assert stable_prefix("what is the whether", "What is the weather in") == "what is the"
+    assert stable_prefix("", "hello") == ""
+
+
+def test_matching_final_is_committed():
+    """A speculation whose text matches the final transcript is committed; latency saved is reported"""
+    print("🔮 Testing speculative decoding")
+    model = FakeModel(latency=0.2)
+    spec = SpeculativeDecoder(model, min_words=3)
+    for partial in ("how far", "how far is mars", "how far is mars from", "how far is mars from earth"):
+        spec.feed(partial)
+    spec.feed("how far is mars from earth")  # Recognizer settles on the full utterance
+    time.sleep(0.15)
+
+    spoken = []
+    started = time.perf_counter()
+    result = spec.finish("How far is Mars from Earth?", spoken.append)
+    waited = time.perf_counter() - started
+    assert result["say"] == "Answer to how far is mars from earth."
+    assert spoken == ["Answer to how far is mars from earth.", "Done."], "buffered sentences replayed in order"
+    assert waited < model.latency, "part of the request ran before the final transcript"
+    assert sorted(model.cancelled) == ["how far is mars", "how far is mars from"], "outdated prefixes cancelled"
+    stats = spec.stats()
+    assert stats["committed"] == 1 and stats["requests"] == 1 and stats["commit_rate"] == 1.0
+    assert stats["saved_ms"] >= 100
+    print(f"✅ Committed speculation, saved {stats['saved_ms']:.0f} ms")
+
+
+def test_mismatch_is_cancelled_and_reissued():
+    """If the user kept talking past the speculated prefix, the request is cancelled and reissued"""
+    model = FakeModel(latency=0.2)
+    spec = SpeculativeDecoder(model, min_words=3)
+    spec.feed("turn on the")
+    spec.feed("turn on the lights")
+    spoken = []
+    result = spec.finish("turn on the lights in the kitchen and the hallway", spoken.append)
+    assert result["say"] == "Answer to turn on the lights in the kitchen and the hallway."
+    assert spoken[0].startswith("Answer to turn on the lights in the kitchen"), "speculative text never spoken"
+    time.sleep(0.15)
+    assert model.cancelled == ["turn on the"]
+    stats = spec.stats()
+    assert stats["committed"] == 0 and stats["cancelled"] == 1 and stats["saved_ms"] == 0
+    print("✅ Mismatched speculation cancelled and reissued")
+
+
+def test_near_miss_is_not_committed():
+    """A final transcript that differs in one word or number asks a different question"""
+    for prefix, final in (("what is 12 times 13", "what is 12 times 135"),
+                          ("remind me to call my mother tomorrow", "remind me to call my brother tomorrow")):
+        model = FakeModel(latency=0.05)
+        spec = SpeculativeDecoder(model, min_words=3)
+        spec.feed(prefix)
+        spec.feed(prefix)
+        assert spec.finish(final, None)["say"] == f"Answer to {final}."
+        assert spec.stats()["committed"] == 0
+    print("✅ Near-miss final transcripts are reissued, not committed")
+
+
+def test_reset_and_no_speculation():
+    """Short fragments never speculate; reset() cancels a stale speculation"""
+    model = FakeModel(latency=0.05)
+    spec = SpeculativeDecoder(model, min_words=3)
+    spec.feed("hi")
+    spec.feed("hi there")
+    assert spec.finish("hi there", None)["say"] == "Answer to hi there."
+    assert spec.stats()["speculations"] == 0
+
+    spec.feed("what is the time")
+    spec.feed("what is the time")
+    spec.reset()
+    assert spec.finish("what is the time", None)["say"] == "Answer to what is the time."
+    assert spec.stats()["committed"] == 0
+    print("✅ Fragments and stale speculations are never committed")
+
+
+if __name__ == "__main__":
+    test_stable_prefix()
+    test_matching_final_is_committed()
+    test_mismatch_is_cancelled_and_reissued()
+    test_near_miss_is_not_committed()
+    test_reset_and_no_speculation()
+    print("\n🎉 Speculative decoding tests completed!")
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Test script for MARVIN's streamed reply extraction and sentence-level speech queue
+"""
+
+import json
+
+from speech_stream import JsonFieldStream, SentenceSplitter, SpeechQueue, stream_say
+
+
+def test_say_field_decoded_incrementally():
+    """The say field is decoded as it arrives, whatever the chunk boundaries"""
+    print("🔊 Testing streamed reply extraction")
+    say = 'Hi "there"!\nCafé ☕ 😀 costs 3\\4.'
+    reply = json.dumps({"mode": "chat", "command": "", "say": say})
+    assert "\\ud83d" in json.dumps(say), "fixture should exercise surrogate pairs"
+    for size in (1, 2, 3, 7, len(reply)):
+        stream = JsonFieldStream("say")
+        decoded = "".join(stream.feed(reply[i:i + size]) for i in range(0, len(reply), size))
+        assert decoded == say, (size, decoded)
+        assert stream.fields == {"mode": "chat", "command": "", "say": say}
+
+    stream = JsonFieldStream("say")
+    assert stream.feed('{"mode": "run", "timeout": 5, "command": "ls -la", "say": ""}') == ""
+    assert stream.fields["command"] == "ls -la"
+    print("✅ Escapes, unicode and non-string values decode correctly in any chunking")
+
+
+def test_sentences_emitted_as_they_complete():
+    """Sentences are released at their boundary, short fragments are merged"""
+    splitter = SentenceSplitter(min_chars=12)
+    assert splitter.feed("Hi. This is Marvin") == []
+    assert splitter.feed(" speaking. And") == ["Hi. This is Marvin speaking."]
+    assert splitter.feed(" more text") == []
+    assert splitter.flush() == ["And more text"]
+
+    spoken = []
+    reply = json.dumps({"mode": "chat", "command": "",
+                        "say": "The first sentence is here. The second one follows! Last"})
+    content = stream_say((reply[i:i + 4] for i in range(0, len(reply), 4)), spoken.append)
+    assert content == reply
+    assert spoken == ["The first sentence is here.", "The second one follows!", "Last"]
+    print("✅ Sentences are emitted as soon as they are complete")
+
+
+def test_speech_queue_speaks_in_order():
+    """Queued sentences are spoken in order on the background thread"""
+    spoken = []
+    speech = SpeechQueue(spoken.append)
+    for sentence in ("one", "two", "three"):
+        speech.put(sentence)
+    speech.wait()
+    assert spoken == ["one", "two", "three"]
+    assert speech.first_audio_at is not None
+    speech.close()
+    print("✅ Speech queue plays sentences in order")
+
+
+if __name__ == "__main__":
+    test_say_field_decoded_incrementally()
+    test_sentences_emitted_as_they_complete()
+    test_speech_queue_speaks_in_order()
+    print("\n🎉 Speech streaming tests completed!")